@@ -0,0 +1,107 @@
+"""
+Micro-benchmark: headline keyword scoring throughput.
+
+Compares the old per-keyword substring loop with the KeywordAutomaton on
+synthetic headlines, for the shipped news lexicon and for a large lexicon
+(market + per-symbol + sector terms).
+
+Before timing, checks that KeywordAutomaton.extended({}) scores exactly like
+the automaton it extends (India relevance boost included).
+
+Run from backend/:
+    python -m benchmarks.bench_keyword_scorer
+    python -m benchmarks.bench_keyword_scorer --headlines 20000 --extra-keywords 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from services.ai_decision import _NEWS_KEYWORDS, NEWS_KEYWORD_WEIGHTS, _score_news_impact
+from services.keyword_scorer import KeywordAutomaton
+
+WORDS = (
+    "nifty sensex rupee crude oil opec fed inflation tariffs sanctions missile attack china israel "
+    "iran usa market stocks bank earnings results quarter profit guidance shares rally slump "
+    "investors traders outlook global yields dollar recession growth policy rbi fii dii the a of "
+    "to in on for with after before amid as rises falls jumps drops record week session"
+).split()
+
+
+def _make_headlines(count: int, seed: int = 7) -> list[tuple[str, str]]:
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(count):
+        title = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(8, 16))).capitalize()
+        summary = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(20, 40)))
+        out.append((title, summary))
+    return out
+
+
+def _make_lexicon(base: dict[str, int], extra: int, seed: int = 11) -> dict[str, int]:
+    rnd = random.Random(seed)
+    lexicon = dict(base)
+    for i in range(extra):
+        if i % 3 == 0:
+            lexicon[f"sym{i} ltd"] = rnd.randint(1, 9)
+        elif i % 3 == 1:
+            lexicon[f"sector{i}*"] = rnd.randint(1, 9)
+        else:
+            lexicon[f"term{i}"] = rnd.randint(1, 9)
+    return lexicon
+
+
+def _substring_score(weights: dict[str, int], title: str, summary: str) -> int:
+    text = f"{title} {summary}".lower()
+    score = 0
+    for kw, weight in weights.items():
+        if kw.rstrip("*") in text:
+            score += weight
+    return score
+
+
+def _run(label: str, fn, headlines: list[tuple[str, str]]) -> float:
+    start = time.perf_counter()
+    for title, summary in headlines:
+        fn(title, summary)
+    elapsed = time.perf_counter() - start
+    rate = len(headlines) / elapsed if elapsed else float("inf")
+    print(f"  {label:<28} {elapsed * 1000:9.1f} ms  {rate:12,.0f} headlines/s")
+    return elapsed
+
+
+def _check_extended(headlines: list[tuple[str, str]]) -> None:
+    """An automaton extended with nothing must score exactly like the base one."""
+    extended = _NEWS_KEYWORDS.extended({})
+    for title, summary in [("India crude rises", ""), *headlines[:500]]:
+        base = _score_news_impact(title, summary)
+        again = _score_news_impact(title, summary, extended)
+        if base != again:
+            raise SystemExit(f"extended({{}}) changed the score of {title!r}: {base} -> {again}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--headlines", type=int, default=5000)
+    parser.add_argument("--extra-keywords", type=int, default=2000)
+    args = parser.parse_args()
+
+    headlines = _make_headlines(args.headlines)
+    _check_extended(headlines)
+    for name, lexicon in (
+        ("news lexicon", NEWS_KEYWORD_WEIGHTS),
+        ("large lexicon", _make_lexicon(NEWS_KEYWORD_WEIGHTS, args.extra_keywords)),
+    ):
+        build_start = time.perf_counter()
+        automaton = KeywordAutomaton(lexicon)
+        build_ms = (time.perf_counter() - build_start) * 1000
+        print(f"{name}: {len(lexicon)} keywords, {len(headlines)} headlines (automaton build {build_ms:.1f} ms)")
+        legacy = _run("substring loop", lambda t, s: _substring_score(lexicon, t, s), headlines)
+        fast = _run("aho-corasick automaton", lambda t, s: automaton.score(f"{t} {s}"), headlines)
+        print(f"  speedup: {legacy / fast:.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
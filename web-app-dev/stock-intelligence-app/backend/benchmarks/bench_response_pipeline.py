@@ -0,0 +1,190 @@
+"""
+Micro-benchmark: per-request CPU for /analyze and /advanced-analyze bodies.
+
+"legacy" reproduces what a cached /analyze hit used to cost: json.loads the
+cached text, rebuild AnalyzeResponse with nested IndicatorData / OhlcBar
+models, then FastAPI's response_model pass (dump -> validate -> dump in json
+mode) and json.dumps. "fast" is the current path: the cached text is sent
+as bytes. For /advanced-analyze, legacy builds the model and goes through the
+same response_model pass; fast validates once and encodes in pydantic-core.
+
+Run from backend/:
+    python -m benchmarks.bench_response_pipeline
+    python -m benchmarks.bench_response_pipeline --requests 5000 --candles 180
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from models.schemas import (
+    AdvancedAnalysis,
+    AnalyzeResponse,
+    BollingerData,
+    IndicatorData,
+    MacdData,
+    OhlcBar,
+    OptionStrikeData,
+)
+from services.value_codec import dumps_json, orjson
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def _analyze_payload(candles: int, seed: int = 3) -> dict:
+    rnd = random.Random(seed)
+    start = datetime(2026, 10, 19, 9, 15, tzinfo=IST)
+    price = 25000.0
+    bars = []
+    for i in range(candles):
+        o = price
+        c = o + rnd.uniform(-20, 20)
+        bars.append({
+            "time": (start + timedelta(minutes=5 * i)).isoformat(),
+            "open": round(o, 2),
+            "high": round(max(o, c) + rnd.uniform(0, 8), 2),
+            "low": round(min(o, c) - rnd.uniform(0, 8), 2),
+            "close": round(c, 2),
+        })
+        price = c
+    signals = {"ema20": "BUY", "rsi14": "NEUTRAL", "vwap": "BUY", "bollinger": "NEUTRAL", "macd": "SELL"}
+    return {
+        "symbol": "^NSEI",
+        "price": round(price, 2),
+        "day_open": 25000.0,
+        "indicators": {
+            "ema20": 25010.5,
+            "rsi14": 54.2,
+            "vwap": 24998.1,
+            "bollinger": {"upper": 25120.0, "middle": 25010.0, "lower": 24900.0},
+            "macd": {"macd_line": 3.2, "signal_line": 4.1, "histogram": -0.9},
+            "signals": signals,
+        },
+        "decision": "HOLD",
+        "reasoning": ["Price above EMA20", "RSI neutral", "MACD below signal"],
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "candles": bars,
+    }
+
+
+def _advanced_result() -> dict:
+    steps = {
+        f"step_{i}": {"name": f"Step {i}", "details": [f"detail line {j} for step {i}" for j in range(6)]}
+        for i in range(1, 8)
+    }
+    return {
+        "prompt_version": 2,
+        "date_time": datetime.now(IST).isoformat(),
+        "index": "NIFTY 50",
+        "spot_price": 25012.35,
+        "scalp_signal": "BUY/CE",
+        "three_min_confirm": "GREEN",
+        "htf_trend": "Bullish",
+        "trend_direction": "Sideways -> Bullish",
+        "option_strike": {
+            "strike": 25000, "strike_label": "ATM", "option_type": "CE",
+            "est_premium": 120, "sl_points": 20, "target_points": 40, "premium_valid": True,
+        },
+        "execute": "Strong",
+        "execute_reason": "HTF and 3m aligned",
+        "steps_detail": steps,
+    }
+
+
+def _response_model_pass(model) -> bytes:
+    """What FastAPI does with a returned model when response_model is set."""
+    cls = type(model)
+    validated = cls.model_validate(model.model_dump())
+    return json.dumps(validated.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _legacy_analyze(cached_text: str) -> bytes:
+    payload = json.loads(cached_text)
+    ind = payload["indicators"]
+    model = AnalyzeResponse(
+        symbol=payload["symbol"],
+        price=payload["price"],
+        indicators=IndicatorData(
+            ema20=ind["ema20"],
+            rsi14=ind["rsi14"],
+            vwap=ind["vwap"],
+            bollinger=BollingerData(**ind["bollinger"]),
+            macd=MacdData(**ind["macd"]),
+            signals=ind["signals"],
+        ),
+        decision=payload["decision"],
+        reasoning=payload["reasoning"],
+        timestamp=payload["timestamp"],
+        candles=[OhlcBar(**c) for c in payload["candles"]],
+    )
+    return _response_model_pass(model)
+
+
+def _fast_analyze(cached_text: str) -> bytes:
+    return cached_text.encode("utf-8")
+
+
+def _legacy_advanced(result: dict) -> bytes:
+    opt = result.get("option_strike")
+    model = AdvancedAnalysis(
+        prompt_version=result["prompt_version"],
+        date_time=result["date_time"],
+        index=result["index"],
+        spot_price=result["spot_price"],
+        scalp_signal=result["scalp_signal"],
+        three_min_confirm=result["three_min_confirm"],
+        htf_trend=result["htf_trend"],
+        trend_direction=result["trend_direction"],
+        option_strike=OptionStrikeData(**opt) if opt else None,
+        execute=result["execute"],
+        execute_reason=result["execute_reason"],
+        is_market_open=True,
+        market_message="Market is OPEN",
+        steps_detail=result["steps_detail"],
+    )
+    return _response_model_pass(model)
+
+
+def _fast_advanced(result: dict) -> bytes:
+    body = {name: result.get(name) for name in AdvancedAnalysis.model_fields}
+    body["is_market_open"] = True
+    body["market_message"] = "Market is OPEN"
+    return AdvancedAnalysis.model_validate(body).model_dump_json().encode("utf-8")
+
+
+def _run(label: str, fn, arg, requests: int) -> float:
+    fn(arg)
+    start = time.process_time()
+    for _ in range(requests):
+        fn(arg)
+    per_request_us = (time.process_time() - start) / requests * 1e6
+    print(f"  {label:<10} {per_request_us:10.1f} us CPU/request")
+    return per_request_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--candles", type=int, default=180)
+    args = parser.parse_args()
+
+    print(f"orjson: {'yes' if orjson is not None else 'no (stdlib json)'}")
+    cached_text = dumps_json(_analyze_payload(args.candles)).decode("utf-8")
+    print(f"/analyze cached hit, {args.candles} candles ({len(cached_text):,} bytes)")
+    legacy = _run("legacy", _legacy_analyze, cached_text, args.requests)
+    fast = _run("fast", _fast_analyze, cached_text, args.requests)
+    print(f"  speedup: {legacy / fast:.0f}x\n")
+
+    result = _advanced_result()
+    print("/advanced-analyze response encoding")
+    legacy = _run("legacy", _legacy_advanced, result, args.requests)
+    fast = _run("fast", _fast_advanced, result, args.requests)
+    print(f"  speedup: {legacy / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
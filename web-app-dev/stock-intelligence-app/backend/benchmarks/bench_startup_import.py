@@ -0,0 +1,78 @@
+"""
+Startup benchmark: how long `import main` takes in a fresh interpreter.
+
+Each run is a new `python -X importtime -c "import main"` subprocess, so
+module state is cold the same way it is on a Render cold start (one untimed
+run first warms the OS page cache). It reports the median wall time, the
+slowest top-level imports by cumulative time, and whether any of the lazily
+imported heavy modules (services/lazy_imports.py) were pulled in at import
+time, which would be a regression.
+
+Run from backend/:
+    python -m benchmarks.bench_startup_import
+    python -m benchmarks.bench_startup_import --runs 9 --top 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from services.lazy_imports import HEAVY_MODULES
+
+
+def _import_once() -> tuple[float, list[tuple[int, int, str]]]:
+    env = {**os.environ, "STORAGE_BACKEND": "memory", "AUTH_REQUIRED": "false"}
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    wall = time.perf_counter() - started
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return wall, rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    _import_once()  # warm the OS page cache
+    walls = []
+    rows: list[tuple[int, int, str]] = []
+    for _ in range(args.runs):
+        wall, rows = _import_once()
+        walls.append(wall)
+
+    main_us = next((cum for _, cum, name in rows if name.strip() == "main"), 0)
+    print(f"python -X importtime -c 'import main', {args.runs} runs")
+    print(f"  process wall   median {statistics.median(walls) * 1000:7.0f} ms  (min {min(walls) * 1000:.0f})")
+    print(f"  import main    {main_us / 1000:7.0f} ms (last run)\n")
+
+    # Direct children of main (two-space indent) are the app's own top-level imports.
+    top_level = [(cum, name.strip()) for _, cum, name in rows if name.startswith("   ") and not name.startswith("    ")]
+    print("  slowest imports under main (cumulative):")
+    for cum, name in sorted(top_level, reverse=True)[: args.top]:
+        print(f"    {cum / 1000:7.1f} ms  {name}")
+
+    loaded = {name.strip() for _, _, name in rows}
+    eager = [name for name in HEAVY_MODULES if name in loaded]
+    print(f"\n  heavy modules imported eagerly: {', '.join(eager) if eager else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -64,10 +64,95 @@ class Settings(BaseSettings):
             "NEXT_PUBLIC_SUPABASE_ANON_KEY",
         ),
     )
+    # Optional: lets HS256 (legacy) access tokens be verified without a call to Supabase.
+    supabase_jwt_secret: str = Field(
+        default="",
+        validation_alias=AliasChoices("SUPABASE_JWT_SECRET"),
+    )
     auth_required: bool = Field(
         default=True,
         validation_alias=AliasChoices("AUTH_REQUIRED"),
     )
+    # Run APScheduler jobs only on the worker holding the storage lease
+    # (services/leader_election.py); needed when running several workers/instances.
+    scheduler_leader_election: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("SCHEDULER_LEADER_ELECTION"),
+    )
+    # Lease TTL; the leader renews every third of it and failover takes at most one lease.
+    scheduler_lease_seconds: int = Field(
+        default=60,
+        validation_alias=AliasChoices("SCHEDULER_LEASE_SECONDS"),
+    )
+    # Where queued background jobs run (services/job_queue.py): "embedded" in the
+    # API process, or "external" when a separate `python worker.py` consumes them.
+    job_worker_mode: str = Field(
+        default="embedded",
+        validation_alias=AliasChoices("JOB_WORKER_MODE"),
+    )
+    # At least the number of captures sharing a slot (10:00: checkpoint + AI snapshot)
+    # so none waits for another to finish.
+    job_worker_concurrency: int = Field(
+        default=2,
+        validation_alias=AliasChoices("JOB_WORKER_CONCURRENCY"),
+    )
+    # Fallback poll for retries and expired leases; new jobs wake workers via pub/sub.
+    job_worker_poll_seconds: float = Field(
+        default=30.0,
+        validation_alias=AliasChoices("JOB_WORKER_POLL_SECONDS"),
+    )
+    # Worker processes for the CPU-bound analysis pipelines (services/cpu_pool.py).
+    # 0 runs them inline on the event loop; -1 uses one worker per core.
+    cpu_pool_workers: int = Field(
+        default=0,
+        validation_alias=AliasChoices("CPU_POOL_WORKERS"),
+    )
+    # Request/job tracing spans (services/tracing.py): kept in an in-memory ring
+    # buffer of this many spans and, when TRACE_FILE is set, appended there as JSON lines.
+    tracing_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("TRACING_ENABLED"),
+    )
+    trace_buffer_spans: int = Field(
+        default=5000,
+        validation_alias=AliasChoices("TRACE_BUFFER_SPANS"),
+    )
+    trace_file: str = Field(
+        default="",
+        validation_alias=AliasChoices("TRACE_FILE"),
+    )
+    # Seconds before each scheduled capture (checkpoints, AI snapshots, EOD) to queue
+    # its job, which pre-warms (services/prewarm.py) and then waits for the slot;
+    # 0 disables it.
+    prewarm_lead_seconds: int = Field(
+        default=60,
+        validation_alias=AliasChoices("PREWARM_LEAD_SECONDS"),
+    )
+    # Import numpy/pandas/yfinance in the background right after startup instead
+    # of on the first market-data request.
+    warm_imports: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("WARM_IMPORTS"),
+    )
+
+    # Key-value store for caches and checkpoints: "upstash" | "memory" | "sqlite".
+    # memory/sqlite are single-node only (local dev, tests, benchmarks).
+    storage_backend: str = Field(
+        default="upstash",
+        validation_alias=AliasChoices("STORAGE_BACKEND"),
+    )
+    storage_sqlite_path: str = Field(
+        default="trade_craft_store.sqlite3",
+        validation_alias=AliasChoices("STORAGE_SQLITE_PATH"),
+    )
+    upstash_redis_rest_url: str = Field(
+        default="",
+        validation_alias=AliasChoices("UPSTASH_REDIS_REST_URL"),
+    )
+    upstash_redis_rest_token: str = Field(
+        default="",
+        validation_alias=AliasChoices("UPSTASH_REDIS_REST_TOKEN"),
+    )
 
     @property
     def is_dev(self) -> bool:
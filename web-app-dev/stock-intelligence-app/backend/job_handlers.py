@@ -0,0 +1,95 @@
+"""
+Job kinds run by the job worker (services/job_queue.py).
+
+Imported by both entry points: main.py (embedded worker, and so enqueuers
+share the kind names) and worker.py (external worker process). A handler
+raises when the run should be retried. A checkpoint capture with failed
+symbols retries only those symbols, from the historical slice at the slot
+time: re-running a live capture later would overwrite the symbols that were
+already captured at the slot with later data.
+"""
+
+from routers.analyze import AI_DECISION_SYMBOLS, run_ai_snapshot_for_all_symbols, run_eod_ai_for_all_symbols
+from routers.checkpoints import (
+    SYMBOLS,
+    reconcile_missing_checkpoints,
+    run_catchup_sequential,
+    run_checkpoint_for_all_symbols,
+)
+from services.career_pulse import generate_career_pulse
+from services.job_queue import off_slot, register_job, set_retry_args
+from services.market_data import serve_staged_frames
+from services.prewarm import prewarm_then_wait
+
+# Frames each capture reads: checkpoints use all four intervals (1m feeds the
+# 3m frame), AI snapshots skip 1m, the EOD outlook reads 5m only.
+PREWARM_FRAMES = {
+    "checkpoint": (SYMBOLS, ("5m", "15m", "1h", "1m")),
+    "ai_snapshot": (AI_DECISION_SYMBOLS, ("5m", "15m", "1h")),
+    "eod_ai": (AI_DECISION_SYMBOLS, ("5m",)),
+}
+
+
+async def _prewarm(job: str, slot: str) -> None:
+    """
+    Pre-warm phase of a capture queued PREWARM_LEAD_SECONDS ahead of its slot.
+    Runs off the worker slot, so captures sharing a slot all start on time; the
+    rest of the job then reads the frames it staged.
+    """
+    symbols, intervals = PREWARM_FRAMES[job]
+    async with off_slot():
+        await prewarm_then_wait(slot, {sym: set(intervals) for sym in symbols}, news=job != "checkpoint")
+    serve_staged_frames()
+
+
+@register_job("checkpoint_capture")
+async def checkpoint_capture(
+    checkpoint_id: str,
+    date_str: str | None = None,
+    use_historical: bool = False,
+    symbols: list[str] | None = None,
+    prewarm: bool = False,
+    mode: str = "live",
+) -> dict:
+    if prewarm:
+        await _prewarm("checkpoint", checkpoint_id)
+    summary = await run_checkpoint_for_all_symbols(
+        checkpoint_id, date_str=date_str, use_historical=use_historical, symbols=symbols, mode=mode
+    )
+    if summary.get("failed_symbols"):
+        set_retry_args(symbols=summary["failed_symbols"], date_str=summary["date"], use_historical=True, prewarm=False)
+        raise RuntimeError(f"checkpoint {checkpoint_id} failed for {summary['failed_symbols']}")
+    return summary
+
+
+@register_job("checkpoint_reconcile")
+async def checkpoint_reconcile(date_str: str | None = None) -> dict:
+    result = await reconcile_missing_checkpoints(date_str=date_str)
+    if result.get("failed_checkpoint_ids"):
+        raise RuntimeError(f"reconcile failed for {result['failed_checkpoint_ids']}")
+    return result
+
+
+@register_job("checkpoint_catchup")
+async def checkpoint_catchup(checkpoint_ids: list[str], date_str: str | None = None) -> dict:
+    await run_catchup_sequential(checkpoint_ids, date_str=date_str)
+    return {"checkpoint_ids": checkpoint_ids, "date": date_str}
+
+
+@register_job("ai_snapshot")
+async def ai_snapshot(snapshot_id: str, prewarm: bool = False) -> dict:
+    if prewarm:
+        await _prewarm("ai_snapshot", snapshot_id)
+    return await run_ai_snapshot_for_all_symbols(snapshot_id)
+
+
+@register_job("eod_ai")
+async def eod_ai(prewarm: bool = False) -> dict:
+    if prewarm:
+        await _prewarm("eod_ai", "1530")
+    return await run_eod_ai_for_all_symbols()
+
+
+@register_job("career_pulse")
+async def career_pulse(force: bool = False) -> dict:
+    return await generate_career_pulse(force=force)
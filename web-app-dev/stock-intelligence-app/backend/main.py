@@ -1,34 +1,53 @@
 """FastAPI application entry point with checkpoint scheduler."""
 
+import asyncio
 import hmac
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+import job_handlers  # noqa: F401  (registers job kinds for the embedded worker)
 from config import settings
 from routers.analyze import (
     ensure_latest_eod_snapshot_cache as ensure_latest_eod_cache_for_startup,
     ensure_missed_intraday_ai_snapshots,
     router as analyze_router,
-    run_ai_snapshot_for_all_symbols,
-    run_eod_ai_for_all_symbols,
-)
-from routers.checkpoints import (
-    reconcile_missing_checkpoints,
-    router as checkpoints_router,
-    run_checkpoint_for_all_symbols,
 )
+from routers.checkpoints import router as checkpoints_router
 from routers.career_pulse import router as career_pulse_router
-from services.career_pulse import ensure_today_career_pulse_on_startup, generate_career_pulse
+from routers.dashboard import router as dashboard_router
+from routers.debug import router as debug_router
+from routers.jobs import router as jobs_router
+from routers.stream import router as stream_router
+from services.career_pulse import CAREER_PULSE_SCHEDULE, ensure_today_career_pulse_on_startup
+from services.auth_guard import auth_stats
+from services.cpu_pool import cpu_pool
+from services.event_bus import broadcaster, run_event_bridge
 from services.market_data import is_nse_trading_day
+from services.responses import FastJSONResponse
+from services.http_cache import ConditionalCacheMiddleware
+from services.job_queue import JobWorker, enqueue, job_ref
 from services.keepalive import ping_supabase_auth, ping_upstash_redis
+from services.lazy_imports import import_state, preload
+from services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, render as render_metrics
+from services.leader_election import elector, leader_only
+from services.prewarm import prewarm_stats
+from services.price_ticker import run_price_ticker
+from services.run_ledger import expect_runs, ledger_summary
+from services.snapshot_cache import run_invalidation_listener, snapshot_cache
+from services.storage import get_storage
+from services.task_supervisor import startup_tasks
+from services.tracing import TracingMiddleware, buffer_stats as trace_buffer_stats, flush_trace_file
+from services.value_codec import codec_stats
+from services.write_behind import flush_pending_writes
 
 IST = timezone(timedelta(hours=5, minutes=30))
 scheduler = AsyncIOScheduler(timezone="Asia/Kolkata")
+job_worker = JobWorker()
 
 CHECKPOINT_SCHEDULE = [
     ("0915", 9, 15),
@@ -45,9 +64,17 @@ AI_SNAPSHOT_SCHEDULE = [
     ("1430", 14, 30),
 ]
 
-CAREER_PULSE_SCHEDULE = [
-    ("0800", 8, 0),
-]
+
+def _capture_trigger(hour: int, minute: int) -> CronTrigger:
+    """
+    Weekday cron for a capture slot, PREWARM_LEAD_SECONDS early: the queued job
+    pre-warms in its own worker, then sleeps until the slot (services/prewarm.py).
+    """
+    fire_at = datetime(2000, 1, 1, hour, minute) - timedelta(seconds=settings.prewarm_lead_seconds)
+    return CronTrigger(day_of_week="mon-fri", hour=fire_at.hour, minute=fire_at.minute, second=fire_at.second)
+
+
+PREWARM_CAPTURES = settings.prewarm_lead_seconds > 0
 
 
 async def _run_scheduled_checkpoint(checkpoint_id: str):
@@ -57,22 +84,25 @@ async def _run_scheduled_checkpoint(checkpoint_id: str):
         print(f"[CHECKPOINT] skipped {checkpoint_id} | non-trading day {today_ist}")
         return
 
-    summary = await run_checkpoint_for_all_symbols(checkpoint_id)
-    print(
-        f"[CHECKPOINT] scheduler {checkpoint_id} | "
-        f"saved={summary.get('saved_symbols')} failed={summary.get('failed_symbols')} "
-        f"skipped={summary.get('skipped')}"
+    date_str = today_ist.strftime("%Y-%m-%d")
+    job = await enqueue(
+        "checkpoint_capture",
+        {"checkpoint_id": checkpoint_id, "date_str": date_str, "prewarm": PREWARM_CAPTURES},
+        idempotency_key=f"checkpoint_capture:{date_str}:{checkpoint_id}",
+        timeout_seconds=600 + settings.prewarm_lead_seconds,
     )
+    print(f"[CHECKPOINT] scheduler {checkpoint_id} | queued job={job['id']} dedup={job['deduplicated']}")
 
 
 for cp_id, hour, minute in CHECKPOINT_SCHEDULE:
     scheduler.add_job(
-        _run_scheduled_checkpoint,
-        CronTrigger(day_of_week="mon-fri", hour=hour, minute=minute),
+        leader_only(_run_scheduled_checkpoint),
+        _capture_trigger(hour, minute),
         args=[cp_id],
         id=f"checkpoint_{cp_id}",
         replace_existing=True,
     )
+expect_runs("checkpoint", [cp_id for cp_id, _, _ in CHECKPOINT_SCHEDULE])
 
 
 async def _run_scheduled_ai_snapshot(snapshot_id: str):
@@ -82,40 +112,43 @@ async def _run_scheduled_ai_snapshot(snapshot_id: str):
         print(f"[AI-SNAPSHOT] skipped {snapshot_id} | non-trading day {today_ist}")
         return
 
-    summary = await run_ai_snapshot_for_all_symbols(snapshot_id)
-    print(
-        f"[AI-SNAPSHOT] scheduler {snapshot_id} | "
-        f"saved={summary.get('saved_symbols')} fallback={summary.get('fallback_symbols')}"
+    date_str = today_ist.strftime("%Y-%m-%d")
+    job = await enqueue(
+        "ai_snapshot",
+        {"snapshot_id": snapshot_id, "prewarm": PREWARM_CAPTURES},
+        idempotency_key=f"ai_snapshot:{date_str}:{snapshot_id}",
+        timeout_seconds=900 + settings.prewarm_lead_seconds,
     )
+    print(f"[AI-SNAPSHOT] scheduler {snapshot_id} | queued job={job['id']} dedup={job['deduplicated']}")
 
 
 for snapshot_id, hour, minute in AI_SNAPSHOT_SCHEDULE:
     scheduler.add_job(
-        _run_scheduled_ai_snapshot,
-        CronTrigger(day_of_week="mon-fri", hour=hour, minute=minute),
+        leader_only(_run_scheduled_ai_snapshot),
+        _capture_trigger(hour, minute),
         args=[snapshot_id],
         id=f"ai_snapshot_{snapshot_id}",
         replace_existing=True,
     )
+expect_runs("ai_snapshot", [snapshot_id for snapshot_id, _, _ in AI_SNAPSHOT_SCHEDULE])
 
 
 async def _run_scheduled_career_pulse(job_id: str):
     """Generate the daily Data & AI Pulse digest."""
-    summary = await generate_career_pulse()
-    print(
-        f"[CAREER-PULSE] scheduler {job_id} | "
-        f"status={summary.get('status')} date={summary.get('date')}"
-    )
+    date_str = datetime.now(IST).strftime("%Y-%m-%d")
+    job = await enqueue("career_pulse", idempotency_key=f"career_pulse:{date_str}", timeout_seconds=600)
+    print(f"[CAREER-PULSE] scheduler {job_id} | queued job={job['id']} dedup={job['deduplicated']}")
 
 
 for job_id, hour, minute in CAREER_PULSE_SCHEDULE:
     scheduler.add_job(
-        _run_scheduled_career_pulse,
+        leader_only(_run_scheduled_career_pulse),
         CronTrigger(hour=hour, minute=minute),
         args=[job_id],
         id=f"career_pulse_{job_id}",
         replace_existing=True,
     )
+expect_runs("career_pulse", [job_id for job_id, _, _ in CAREER_PULSE_SCHEDULE], trading_days_only=False)
 
 
 async def _trigger_eod_analysis():
@@ -126,79 +159,102 @@ async def _trigger_eod_analysis():
         return
 
     try:
-        summary = await run_eod_ai_for_all_symbols()
-        print(
-            f"[EOD] ok | saved={summary.get('saved_symbols')} "
-            f"fallback={summary.get('fallback_symbols')}"
+        date_str = today_ist.strftime("%Y-%m-%d")
+        job = await enqueue(
+            "eod_ai",
+            {"prewarm": PREWARM_CAPTURES},
+            idempotency_key=f"eod_ai:{date_str}",
+            timeout_seconds=900 + settings.prewarm_lead_seconds,
         )
+        print(f"[EOD] queued job={job['id']} dedup={job['deduplicated']}")
     except Exception as exc:
-        print(f"[EOD] failed: {exc}")
+        print(f"[EOD] enqueue failed: {exc}")
 
 
 scheduler.add_job(
-    _trigger_eod_analysis,
-    CronTrigger(day_of_week="mon-fri", hour=15, minute=30),
+    leader_only(_trigger_eod_analysis),
+    _capture_trigger(15, 30),
     id="eod_analysis",
     replace_existing=True,
 )
+expect_runs("eod_ai", ["1530"])
 
 
-async def _run_eod_reconcile():
+async def _run_eod_reconcile(slot: str):
     """Backfill any missing checkpoint slots after market close."""
     try:
-        result = await reconcile_missing_checkpoints()
-        print(
-            f"[EOD-RECON] done | date={result.get('date')} "
-            f"filled={result.get('filled_checkpoint_ids')} "
-            f"failed={result.get('failed_checkpoint_ids')}"
+        date_str = datetime.now(IST).strftime("%Y-%m-%d")
+        job = await enqueue(
+            "checkpoint_reconcile",
+            {"date_str": date_str},
+            idempotency_key=f"checkpoint_reconcile:{date_str}:{slot}",
+            timeout_seconds=1800,
         )
+        print(f"[EOD-RECON] {slot} queued job={job['id']} dedup={job['deduplicated']}")
     except Exception as exc:
-        print(f"[EOD-RECON] failed: {exc}")
+        print(f"[EOD-RECON] enqueue failed: {exc}")
 
 
 scheduler.add_job(
-    _run_eod_reconcile,
+    leader_only(_run_eod_reconcile),
     CronTrigger(day_of_week="mon-fri", hour=15, minute=31),
+    args=["1531"],
     id="eod_reconcile_1531",
     replace_existing=True,
 )
 
 scheduler.add_job(
-    _run_eod_reconcile,
+    leader_only(_run_eod_reconcile),
     CronTrigger(day_of_week="mon-fri", hour=15, minute=36),
+    args=["1536"],
     id="eod_reconcile_1536",
     replace_existing=True,
 )
 
 
-async def _run_startup_eod_backfill():
+async def _run_startup_eod_backfill() -> dict:
     """Fill latest EOD cache on startup if the scheduled 15:30 run was missed."""
-    try:
-        summary = await ensure_latest_eod_cache_for_startup()
-        print(
-            f"[EOD-BOOTSTRAP] date={summary.get('date')} "
-            f"existing={len(summary.get('existing_symbols', []))} "
-            f"saved={len(summary.get('saved_symbols', []))} "
-            f"fallback={len(summary.get('fallback_symbols', []))}"
-        )
-    except Exception as exc:
-        print(f"[EOD-BOOTSTRAP] failed: {exc}")
+    summary = await ensure_latest_eod_cache_for_startup()
+    print(
+        f"[EOD-BOOTSTRAP] date={summary.get('date')} "
+        f"existing={len(summary.get('existing_symbols', []))} "
+        f"saved={len(summary.get('saved_symbols', []))} "
+        f"fallback={len(summary.get('fallback_symbols', []))}"
+    )
+    return summary
 
 
-async def _run_startup_career_pulse_backfill():
-    try:
-        summary = await ensure_today_career_pulse_on_startup()
-        print(f"[CAREER-PULSE-BOOTSTRAP] {summary}")
-    except Exception as exc:
-        print(f"[CAREER-PULSE-BOOTSTRAP] failed: {exc}")
+async def _run_startup_career_pulse_backfill() -> dict:
+    summary = await ensure_today_career_pulse_on_startup()
+    print(f"[CAREER-PULSE-BOOTSTRAP] {summary}")
+    return summary
 
 
-async def _run_startup_ai_snapshot_backfill():
-    try:
-        summary = await ensure_missed_intraday_ai_snapshots()
-        print(f"[AI-SNAPSHOT-BOOTSTRAP] {summary}")
-    except Exception as exc:
-        print(f"[AI-SNAPSHOT-BOOTSTRAP] failed: {exc}")
+async def _run_startup_ai_snapshot_backfill() -> dict:
+    summary = await ensure_missed_intraday_ai_snapshots()
+    print(f"[AI-SNAPSHOT-BOOTSTRAP] {summary}")
+    return summary
+
+
+async def _warm_heavy_imports() -> dict:
+    state = await asyncio.to_thread(preload)
+    print(f"[WARM-IMPORTS] {state}")
+    return state
+
+
+# (name, coroutine, timeout seconds). Run concurrently after startup; the app
+# serves cached / fallback payloads until they finish.
+STARTUP_BACKFILLS = [
+    ("eod_backfill", _run_startup_eod_backfill, 300),
+    ("career_pulse_backfill", _run_startup_career_pulse_backfill, 180),
+    ("ai_snapshot_backfill", _run_startup_ai_snapshot_backfill, 300),
+]
+
+
+def _start_startup_backfills() -> None:
+    for name, backfill, timeout in STARTUP_BACKFILLS:
+        startup_tasks.start(name, backfill, timeout)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -211,12 +267,37 @@ async def lifespan(app: FastAPI):
     print(f"[SCHEDULER] started with {len(AI_SNAPSHOT_SCHEDULE)} saved AI snapshot jobs (IST, Mon-Fri)")
     print(f"[SCHEDULER] started with {len(CAREER_PULSE_SCHEDULE)} career pulse jobs (IST, daily)")
     print("[SCHEDULER] external checkpoint wake/capture endpoints ready for GitHub Actions")
-    await _run_startup_eod_backfill()
-    await _run_startup_career_pulse_backfill()
-    await _run_startup_ai_snapshot_backfill()
+    if settings.warm_imports:
+        startup_tasks.start("warm_imports", _warm_heavy_imports, 120)
+    if cpu_pool.enabled:
+        startup_tasks.start("cpu_pool_warmup", cpu_pool.start, 120)
+    background_tasks = [
+        asyncio.create_task(run_invalidation_listener()),
+        asyncio.create_task(run_event_bridge()),
+        asyncio.create_task(run_price_ticker()),
+    ]
+    if settings.scheduler_leader_election:
+        # Backfills are scheduled work too: run them on whichever worker wins
+        # the lease, and again after a failover.
+        elector.on_elected(_start_startup_backfills)
+        background_tasks.append(asyncio.create_task(elector.run()))
+    else:
+        _start_startup_backfills()
+    if settings.job_worker_mode == "embedded":
+        background_tasks.append(asyncio.create_task(job_worker.run()))
     yield
+    for task in background_tasks:
+        task.cancel()
+    # Lets the job worker hand interrupted jobs back to the queue.
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await elector.release()
+    await startup_tasks.cancel_all()
+    cpu_pool.shutdown()
     scheduler.shutdown()
     print("[SCHEDULER] stopped")
+    await flush_pending_writes()
+    print("[STORAGE] pending writes flushed")
+    flush_trace_file()
 
 
 app = FastAPI(
@@ -224,8 +305,11 @@ app = FastAPI(
     version=settings.app_version,
     description="Intraday NIFTY 50 analyzer with checkpoint snapshot board",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# Added before CORS so CORS stays outermost and also decorates 304 responses.
+app.add_middleware(ConditionalCacheMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -233,10 +317,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TracingMiddleware)
+# Outermost, so route latency includes compression and CORS handling.
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(analyze_router)
 app.include_router(checkpoints_router)
 app.include_router(career_pulse_router)
+app.include_router(dashboard_router)
+app.include_router(jobs_router)
+app.include_router(debug_router)
+app.include_router(stream_router)
 
 
 def _require_cron_secret(x_checkpoint_cron_secret: str | None) -> None:
@@ -261,11 +352,29 @@ async def health_check():
         "git_branch": settings.git_branch or None,
         "git_commit": settings.short_commit,
         "scheduler": "running" if scheduler.running else "stopped",
+        "scheduler_leader": elector.status(),
         "next_jobs": [
             {"id": job.id, "next_run": str(job.next_run_time)}
             for job in scheduler.get_jobs()
         ],
         "server_time_ist": now_ist,
+        "storage": {
+            "backend": get_storage().name,
+            "codec": codec_stats(),
+            "l1": snapshot_cache.stats(),
+        },
+        "events": broadcaster.stats(),
+        "auth": auth_stats(),
+        "startup_tasks": startup_tasks.status(),
+        "heavy_imports": import_state(),
+        "cpu_pool": cpu_pool.stats(),
+        "tracing": trace_buffer_stats(),
+        "run_ledger": ledger_summary(),
+        "prewarm": prewarm_stats(),
+        "jobs": {
+            "mode": settings.job_worker_mode,
+            "worker": job_worker.stats() if settings.job_worker_mode == "embedded" else None,
+        },
     }
 
 
@@ -298,23 +407,43 @@ async def health_keepalive(
     }
 
 
-@app.post("/api/v1/career-pulse/cron-generate", tags=["career-pulse"])
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition for this worker (see services/metrics.py)."""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.post("/api/v1/career-pulse/cron-generate", tags=["career-pulse"], status_code=202)
 async def career_pulse_cron_generate(
     x_checkpoint_cron_secret: str | None = Header(default=None, alias="X-Checkpoint-Cron-Secret"),
     force: bool = Query(default=False),
 ):
-    """Secure endpoint for GitHub Actions to generate the daily career pulse."""
+    """Secure endpoint for GitHub Actions to queue the daily career pulse (202 + job id)."""
     _require_cron_secret(x_checkpoint_cron_secret)
-    return await generate_career_pulse(force=force)
+    date_str = datetime.now(IST).strftime("%Y-%m-%d")
+    job = await enqueue(
+        "career_pulse",
+        {"force": force},
+        idempotency_key=f"career_pulse:{date_str}",
+        timeout_seconds=600,
+        replace_finished=force,
+    )
+    return {"status": "accepted", "date": date_str, **job_ref(job)}
 
 
 @app.get("/api/v1/ai-snapshot/cron-generate", tags=["ai-snapshot"])
 async def ai_snapshot_cron_generate(
+    response: Response,
     snapshot_id: str = Query(..., description="1000 (morning) or 1430 (afternoon) IST"),
     force: bool = Query(default=False),
     x_checkpoint_cron_secret: str | None = Header(default=None, alias="X-Checkpoint-Cron-Secret"),
 ):
-    """Secure endpoint for GitHub Actions to wake Render and capture scheduled AI snapshots."""
+    """
+    Secure endpoint for GitHub Actions to wake Render and capture scheduled AI snapshots.
+
+    Returns 202 with a job id once queued; repeated triggers for the same
+    slot return the existing job.
+    """
     _require_cron_secret(x_checkpoint_cron_secret)
 
     valid_ids = {"1000", "1430"}
@@ -333,21 +462,30 @@ async def ai_snapshot_cron_generate(
         if probe and str(probe.get("analysis_status", "")).lower() != "fallback":
             return {"status": "skipped", "reason": "already_captured", "snapshot_id": snapshot_id, "date": date_str}
 
-    summary = await run_ai_snapshot_for_all_symbols(snapshot_id)
-    return {"status": "captured", **summary}
+    job = await enqueue(
+        "ai_snapshot",
+        {"snapshot_id": snapshot_id},
+        idempotency_key=f"ai_snapshot:{date_str}:{snapshot_id}",
+        replace_finished=force,
+    )
+    response.status_code = 202
+    return {"status": "accepted", "snapshot_id": snapshot_id, "date": date_str, **job_ref(job)}
 
 
 @app.get("/api/v1/ai-snapshot/cron-eod", tags=["ai-snapshot"])
 async def ai_snapshot_cron_eod(
+    response: Response,
     force: bool = Query(default=False),
     x_checkpoint_cron_secret: str | None = Header(default=None, alias="X-Checkpoint-Cron-Secret"),
 ):
-    """Secure endpoint for GitHub Actions to run EOD AI outlook at market close."""
+    """Secure endpoint for GitHub Actions to queue the EOD AI outlook at market close (202 + job id)."""
     _require_cron_secret(x_checkpoint_cron_secret)
 
     today_ist = datetime.now(IST).date()
     if not is_nse_trading_day(today_ist):
         return {"status": "skipped", "reason": "non_trading_day"}
 
-    summary = await run_eod_ai_for_all_symbols()
-    return {"status": "captured", **summary}
+    date_str = today_ist.strftime("%Y-%m-%d")
+    job = await enqueue("eod_ai", idempotency_key=f"eod_ai:{date_str}", replace_finished=force)
+    response.status_code = 202
+    return {"status": "accepted", "date": date_str, **job_ref(job)}
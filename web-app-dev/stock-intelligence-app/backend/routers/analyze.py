@@ -5,16 +5,11 @@ import json
 from datetime import date, datetime, timedelta, timezone, time as dt_time
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
 from models.schemas import (
     AnalyzeResponse,
-    IndicatorData,
-    BollingerData,
-    MacdData,
-    OhlcBar,
     AdvancedAnalysis,
-    OptionStrikeData,
 )
 from services.market_data import (
     fetch_intraday,
@@ -30,6 +25,7 @@ from services.market_data import (
     is_nse_trading_day as market_is_nse_trading_day,
 )
 from services.decision import make_decision
+from services.cpu_pool import run_cpu
 from services.decision_v2 import run_advanced_analysis
 from services.ai_decision import (
     EOD_CACHE_KEY_PREFIX,
@@ -43,6 +39,17 @@ from services.ai_decision import (
 )
 from services.stock_focus import get_stock_focus_outlook
 from services.auth_guard import require_authenticated_user
+from services.event_bus import publish_event
+from services.job_queue import report_progress
+from services.metrics import track_upstream
+from services.prewarm import boundary_refresh
+from services.materialized_views import load_view, store_view
+from services.projection import check_view, is_projected, parse_fields, project
+from services.responses import FastJSONResponse, raw_json_response
+from services.run_ledger import start_run, succeeded_slots
+from services.snapshot_cache import snapshot_cache
+from services.value_codec import dumps_json, loads_json
+from services.write_behind import write_batch
 from config import settings
 
 router = APIRouter(prefix="/api/v1", tags=["analyze"], dependencies=[Depends(require_authenticated_user)])
@@ -185,12 +192,13 @@ async def _fetch_nse_expiry_dates(index_symbol: str) -> list[str]:
     }
     async with httpx.AsyncClient(timeout=20, headers=headers, follow_redirects=True) as client:
         # Prime NSE cookies before API call.
-        await client.get("https://www.nseindia.com/option-chain")
-        resp = await client.get(
-            "https://www.nseindia.com/api/option-chain-contract-info",
-            params={"symbol": index_symbol},
-        )
-        resp.raise_for_status()
+        with track_upstream("nse"):
+            await client.get("https://www.nseindia.com/option-chain")
+            resp = await client.get(
+                "https://www.nseindia.com/api/option-chain-contract-info",
+                params={"symbol": index_symbol},
+            )
+            resp.raise_for_status()
         data = resp.json()
     raw_dates = data.get("expiryDates", []) if isinstance(data, dict) else []
     return sorted({d for d in (_parse_nse_expiry(x) for x in raw_dates) if d})
@@ -204,11 +212,12 @@ async def _fetch_bse_expiry_dates(scrip_cd: int) -> list[str]:
         "Accept": "application/json, text/plain, */*",
     }
     async with httpx.AsyncClient(timeout=20, headers=headers, follow_redirects=True) as client:
-        resp = await client.get(
-            "https://api.bseindia.com/BseIndiaAPI/api/ddlExpiry_IV/w",
-            params={"ProductType": "IO", "scrip_cd": str(scrip_cd)},
-        )
-        resp.raise_for_status()
+        with track_upstream("bse"):
+            resp = await client.get(
+                "https://api.bseindia.com/BseIndiaAPI/api/ddlExpiry_IV/w",
+                params={"ProductType": "IO", "scrip_cd": str(scrip_cd)},
+            )
+            resp.raise_for_status()
         data = resp.json()
 
     table1 = data.get("Table1", []) if isinstance(data, dict) else []
@@ -337,13 +346,18 @@ def _analyze_cache_key(symbol: str, include_candles: bool) -> str:
 
 
 async def _build_analyze_payload(sym: str, include_candles: bool = True, max_candles: int = 180) -> dict:
-    cache_key = _analyze_cache_key(sym, include_candles=include_candles)
-    cached = cache_get(cache_key)
+    cached = cache_get(_analyze_cache_key(sym, include_candles=include_candles))
     if cached:
         try:
-            return json.loads(cached)
+            return loads_json(cached)
         except Exception:
             pass
+    return await _compute_analyze_payload(sym, include_candles=include_candles, max_candles=max_candles)
+
+
+async def _compute_analyze_payload(sym: str, include_candles: bool = True, max_candles: int = 180) -> dict:
+    """Fetch + compute, validate once against AnalyzeResponse, then cache the encoded body."""
+    cache_key = _analyze_cache_key(sym, include_candles=include_candles)
 
     # For lightweight endpoints, avoid 1m fetch/resample.
     frames = await fetch_multi_timeframe(sym, include_1m=False)
@@ -394,7 +408,9 @@ async def _build_analyze_payload(sym: str, include_candles: bool = True, max_can
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "candles": candles,
     }
-    cache_set(cache_key, json.dumps(payload), ANALYZE_CACHE_TTL_SECONDS)
+    # Validated here, once per cache fill; reads serve the stored bytes as-is.
+    AnalyzeResponse.model_validate(payload)
+    cache_set(cache_key, dumps_json(payload).decode("utf-8"), ANALYZE_CACHE_TTL_SECONDS)
     return payload
 
 
@@ -519,36 +535,92 @@ async def analyze(
     sym = symbol or settings.default_symbol
 
     try:
-        payload = await _build_analyze_payload(sym, include_candles=include_candles)
+        cached = cache_get(_analyze_cache_key(sym, include_candles=include_candles))
+        if cached:
+            return raw_json_response(cached)
+        payload = await _compute_analyze_payload(sym, include_candles=include_candles)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Failed to fetch data: {exc}")
 
-    return AnalyzeResponse(
-        symbol=payload["symbol"],
-        price=payload["price"],
-        indicators=IndicatorData(
-            ema20=payload["indicators"]["ema20"],
-            rsi14=payload["indicators"]["rsi14"],
-            vwap=payload["indicators"]["vwap"],
-            bollinger=BollingerData(
-                upper=payload["indicators"]["bollinger"]["upper"],
-                middle=payload["indicators"]["bollinger"]["middle"],
-                lower=payload["indicators"]["bollinger"]["lower"],
-            ),
-            macd=MacdData(
-                macd_line=payload["indicators"]["macd"]["macd_line"],
-                signal_line=payload["indicators"]["macd"]["signal_line"],
-                histogram=payload["indicators"]["macd"]["histogram"],
-            ),
-            signals=payload["indicators"]["signals"],
-        ),
-        decision=payload["decision"],
-        reasoning=payload["reasoning"],
-        timestamp=payload["timestamp"],
-        candles=[OhlcBar(**c) for c in payload["candles"]],
-    )
+    return FastJSONResponse(payload)
+
+
+def _frame_version(payload: dict) -> int:
+    """Build time of the cached analyze payload in ms; only ever moves forward."""
+    try:
+        return int(datetime.fromisoformat(payload["timestamp"]).timestamp() * 1000)
+    except (KeyError, TypeError, ValueError):
+        return 0
+
+
+def _bars_since(candles: list[dict], since: datetime) -> list[dict] | None:
+    """Bars at or after since (the client's last bar may still be forming); None if since predates the window."""
+    if not candles:
+        return []
+    start = len(candles)
+    while start > 0:
+        try:
+            bar_time = datetime.fromisoformat(candles[start - 1]["time"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if bar_time.tzinfo is None or since.tzinfo is None:
+            return None
+        if bar_time < since:
+            break
+        start -= 1
+    if start == 0:
+        return None
+    return candles[start:]
+
+
+@router.get("/candles")
+async def candles_delta(
+    symbol: str = Query(default=None),
+    since: str | None = Query(default=None, description="ISO time of the last bar the client holds"),
+    version: int | None = Query(default=None, description="frame_version the client holds"),
+):
+    """
+    Chart candles with delta updates.
+
+    Without since (or when since is older than the served window) every bar
+    is returned with full=true. Otherwise only bars at/after since are
+    returned (new bars plus the possibly-updated last one); the client
+    replaces bars with the same time and appends the rest. When version
+    equals the current frame_version nothing changed and bars is empty.
+    """
+    sym = symbol or settings.default_symbol
+
+    try:
+        payload = await _build_analyze_payload(sym, include_candles=True)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch data: {exc}")
+
+    frame_version = _frame_version(payload)
+    candles = payload.get("candles") or []
+    bars: list[dict] | None
+    if version is not None and version == frame_version:
+        bars = []
+    elif since:
+        try:
+            bars = _bars_since(candles, datetime.fromisoformat(since.replace("Z", "+00:00")))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid since. Use an ISO-8601 timestamp with offset.")
+    else:
+        bars = None
+
+    return FastJSONResponse({
+        "symbol": payload["symbol"],
+        "frame_version": frame_version,
+        "full": bars is None,
+        "bars": candles if bars is None else bars,
+        "price": payload["price"],
+        "indicators": payload["indicators"],
+        "timestamp": payload["timestamp"],
+    })
 
 
 @router.get("/watchlist-snapshot")
@@ -608,12 +680,18 @@ async def watchlist_snapshot(symbols: str = Query(default=",".join(WATCHLIST_DEF
 
 
 @router.get("/advanced-analyze", response_model=AdvancedAnalysis)
-async def advanced_analyze(symbol: str = Query(default=None)):
+async def advanced_analyze(
+    symbol: str = Query(default=None),
+    view: str = Query(default="full", description="lite drops steps_detail"),
+    fields: str | None = Query(default=None, description="Comma-separated dotted paths to keep"),
+):
     """
     Multi-timeframe advanced analysis with 6-step pipeline:
     HTF Filter â†’ Reversal Check â†’ Market Structure â†’ Scalp â†’ 3-min Confirm â†’ Strike Selection â†’ Risk.
     """
     sym = symbol or settings.default_symbol
+    view = check_view(view)
+    field_paths = parse_fields(fields)
 
     try:
         frames = await fetch_multi_timeframe(sym)
@@ -624,28 +702,16 @@ async def advanced_analyze(symbol: str = Query(default=None)):
 
     now = datetime.now(timezone.utc)
     is_open, mkt_msg = is_indian_market_open(now)
-    result = run_advanced_analysis(frames, sym, now)
-
-    # Convert option dict to Pydantic model if present
-    opt = result.get("option_strike")
-    option_model = OptionStrikeData(**opt) if opt else None
-
-    return AdvancedAnalysis(
-        prompt_version=result["prompt_version"],
-        date_time=result["date_time"],
-        index=result["index"],
-        spot_price=result["spot_price"],
-        scalp_signal=result["scalp_signal"],
-        three_min_confirm=result["three_min_confirm"],
-        htf_trend=result["htf_trend"],
-        trend_direction=result["trend_direction"],
-        option_strike=option_model,
-        execute=result["execute"],
-        execute_reason=result["execute_reason"],
-        is_market_open=is_open,
-        market_message=mkt_msg,
-        steps_detail=result["steps_detail"],
-    )
+    result = await run_cpu(run_advanced_analysis, frames, sym, now)
+
+    body = {name: result.get(name) for name in AdvancedAnalysis.model_fields}
+    body["is_market_open"] = is_open
+    body["market_message"] = mkt_msg
+    # Validate once and encode in pydantic-core; FastAPI sends the Response as-is.
+    analysis = AdvancedAnalysis.model_validate(body)
+    if is_projected(view, field_paths):
+        return FastJSONResponse(project("advanced-analyze", analysis.model_dump(mode="json"), view, field_paths))
+    return raw_json_response(analysis.model_dump_json())
 
 
 # -- AI Price Action Decision Endpoint --
@@ -656,6 +722,7 @@ AI_SNAPSHOT_WINDOWS = [
     {"id": "1430", "time": "14:30", "hhmm": 1430, "label": "Afternoon"},
 ]
 AI_SNAPSHOT_CACHE_PREFIX = "ai_decision_snapshot:"
+snapshot_cache.track_prefix(AI_SNAPSHOT_CACHE_PREFIX)
 AI_SNAPSHOT_CACHE_TTL_SECONDS = 172800
 AI_PENDING_RETRY_SECONDS = 120
 EOD_PENDING_RETRY_SECONDS = 300
@@ -736,11 +803,15 @@ def _load_latest_scheduled_ai_snapshot(date_str: str, symbol: str, upto_hhmm: in
 
 
 
+ZERO_HERO_SNAPSHOT_CACHE_PREFIX = "ai_zero_hero_snapshot:"
+snapshot_cache.track_prefix(ZERO_HERO_SNAPSHOT_CACHE_PREFIX)
+
+
 def _zero_hero_snapshot_cache_key(index_abbr: str, date_str: str, snapshot_id: str) -> str:
     import hashlib
 
     return (
-        f"ai_zero_hero_snapshot:{date_str}:{snapshot_id}:"
+        f"{ZERO_HERO_SNAPSHOT_CACHE_PREFIX}{date_str}:{snapshot_id}:"
         f"{hashlib.md5(index_abbr.encode()).hexdigest()}"
     )
 
@@ -928,7 +999,49 @@ def _build_intraday_snapshot_fallback(
     return payload
 
 
-async def run_ai_snapshot_for_all_symbols(snapshot_id: str, now: datetime | None = None) -> dict:
+def _slot_start_ist(ist_now: datetime, slot: dict) -> datetime:
+    return ist_now.replace(hour=int(slot["hhmm"] // 100), minute=int(slot["hhmm"] % 100), second=0, microsecond=0)
+
+
+def _materialize_intraday_view(
+    symbol: str,
+    payload: dict,
+    snapshot_slot: dict,
+    next_slot: dict | None,
+    capture_ist: datetime,
+) -> None:
+    """Store the /ai-decision body served from this snapshot until the next slot."""
+    valid_until = _snapshot_valid_until_ist(capture_ist, next_slot)
+    response = _decorate_intraday_snapshot(
+        payload=payload,
+        symbol=symbol,
+        snapshot_slot=snapshot_slot,
+        next_slot=next_slot,
+        valid_until=valid_until,
+        next_refresh_at=valid_until,
+        snapshot_stale=False,
+    )
+    store_view("ai-decision", symbol, response, _slot_start_ist(capture_ist, snapshot_slot), valid_until)
+
+
+def _materialize_eod_view(symbol: str, payload: dict, session_day: date, next_open: datetime) -> None:
+    """Store the market-closed /ai-decision body from 15:30 until the next open (full analyses only)."""
+    if str(payload.get("analysis_status", "")).lower() == "fallback":
+        return
+    response = dict(payload)
+    response.setdefault("analysis_type", "EOD")
+    response.setdefault("session_date", session_day.strftime("%Y-%m-%d"))
+    response.setdefault("symbol", symbol)
+    response["next_refresh_at_ist"] = next_open.isoformat()
+    response["eod_cache_only"] = True
+    store_view("ai-decision", symbol, response, datetime.combine(session_day, dt_time(15, 30), tzinfo=IST), next_open)
+
+
+async def run_ai_snapshot_for_all_symbols(
+    snapshot_id: str,
+    now: datetime | None = None,
+    mode: str = "live",
+) -> dict:
     snapshot_slot = _ai_snapshot_slot(snapshot_id)
     if snapshot_slot is None:
         raise ValueError(f"Invalid AI snapshot_id: {snapshot_id}")
@@ -937,6 +1050,8 @@ async def run_ai_snapshot_for_all_symbols(snapshot_id: str, now: datetime | None
     date_str = current_now.astimezone(IST).strftime("%Y-%m-%d")
     idx = next((i for i, slot in enumerate(AI_SNAPSHOT_WINDOWS) if slot["id"] == snapshot_id), -1)
     next_slot = AI_SNAPSHOT_WINDOWS[idx + 1] if idx != -1 and idx + 1 < len(AI_SNAPSHOT_WINDOWS) else None
+    run = start_run("ai_snapshot", snapshot_id, date_str, mode=mode)
+    await boundary_refresh(AI_DECISION_SYMBOLS)
 
     summary = {
         "snapshot_id": snapshot_id,
@@ -946,41 +1061,63 @@ async def run_ai_snapshot_for_all_symbols(snapshot_id: str, now: datetime | None
         "fallback_symbols": [],
     }
 
-    for sym in AI_DECISION_SYMBOLS:
-        try:
-            frames = await fetch_multi_timeframe(sym, include_1m=False)
-            horizon_target = next_slot["time"] if next_slot else "15:30"
-            horizon_text = (
-                f"Scheduled live snapshot captured at {snapshot_slot['time']} IST. "
-                f"Predict the most probable next move ONLY until {horizon_target} IST. "
-                "Do not provide full-day forecast."
+    async with write_batch(f"ai_snapshot_{snapshot_id}") as batch:
+        for sym in AI_DECISION_SYMBOLS:
+            try:
+                frames = await fetch_multi_timeframe(sym, include_1m=False)
+                horizon_target = next_slot["time"] if next_slot else "15:30"
+                horizon_text = (
+                    f"Scheduled live snapshot captured at {snapshot_slot['time']} IST. "
+                    f"Predict the most probable next move ONLY until {horizon_target} IST. "
+                    "Do not provide full-day forecast."
+                )
+                payload = await get_ai_decision(
+                    frames,
+                    sym,
+                    current_now,
+                    checkpoint_horizon=horizon_text,
+                )
+            except Exception as exc:
+                payload = _fallback(f"Scheduled AI snapshot failed: {exc}")
+                payload["symbol"] = sym
+
+            payload.setdefault("symbol", sym)
+            payload.setdefault("captured_at", current_now.astimezone(IST).isoformat())
+            payload["scheduled_snapshot_id"] = snapshot_slot["id"]
+            payload["scheduled_snapshot_time_ist"] = snapshot_slot["time"]
+
+            cache_set(
+                _ai_snapshot_cache_key(sym, date_str, snapshot_id),
+                json.dumps(payload),
+                AI_SNAPSHOT_CACHE_TTL_SECONDS,
             )
-            payload = await get_ai_decision(
-                frames,
-                sym,
-                current_now,
-                checkpoint_horizon=horizon_text,
+            _materialize_intraday_view(sym, payload, snapshot_slot, next_slot, current_now.astimezone(IST))
+
+            if payload.get("analysis_status") == "fallback":
+                summary["fallback_symbols"].append(sym)
+            else:
+                summary["saved_symbols"].append(sym)
+            await report_progress(
+                symbols_done=len(summary["saved_symbols"]) + len(summary["fallback_symbols"]),
+                symbols_total=len(AI_DECISION_SYMBOLS),
             )
-        except Exception as exc:
-            payload = _fallback(f"Scheduled AI snapshot failed: {exc}")
-            payload["symbol"] = sym
-
-        payload.setdefault("symbol", sym)
-        payload.setdefault("captured_at", current_now.astimezone(IST).isoformat())
-        payload["scheduled_snapshot_id"] = snapshot_slot["id"]
-        payload["scheduled_snapshot_time_ist"] = snapshot_slot["time"]
-
-        cache_set(
-            _ai_snapshot_cache_key(sym, date_str, snapshot_id),
-            json.dumps(payload),
-            AI_SNAPSHOT_CACHE_TTL_SECONDS,
-        )
-
-        if payload.get("analysis_status") == "fallback":
-            summary["fallback_symbols"].append(sym)
-        else:
-            summary["saved_symbols"].append(sym)
 
+    summary["unsaved_symbols"] = [
+        sym
+        for sym in AI_DECISION_SYMBOLS
+        if not batch.confirmed(_ai_snapshot_cache_key(sym, date_str, snapshot_id))
+    ]
+    # A symbol whose write was not confirmed is not saved, whatever it computed.
+    summary["saved_symbols"] = [sym for sym in summary["saved_symbols"] if sym not in summary["unsaved_symbols"]]
+    for sym in summary["saved_symbols"] + summary["fallback_symbols"]:
+        if sym not in summary["unsaved_symbols"]:
+            await publish_event("ai_snapshot", {"symbol": sym, "date": date_str, "snapshot_id": snapshot_id})
+
+    not_saved = set(summary["fallback_symbols"]) | set(summary["unsaved_symbols"])
+    await run.finish(
+        saved=[sym for sym in AI_DECISION_SYMBOLS if sym not in not_saved],
+        failed=[sym for sym in AI_DECISION_SYMBOLS if sym in not_saved],
+    )
     return summary
 
 
@@ -991,27 +1128,51 @@ async def run_eod_ai_for_all_symbols(now: datetime | None = None) -> dict:
     ist_now = current_now.astimezone(IST)
     date_str = ist_now.strftime("%Y-%m-%d")
     next_open = _next_nse_market_open_ist(ist_now).isoformat()
+    run = start_run("eod_ai", "1530", date_str)
+    await boundary_refresh(AI_DECISION_SYMBOLS)
     summary = {
         "date": date_str,
         "saved_symbols": [],
         "fallback_symbols": [],
     }
 
-    for sym in AI_DECISION_SYMBOLS:
-        payload = await get_eod_analysis(sym, current_now)
-        payload.setdefault("analysis_type", "EOD")
-        payload.setdefault("session_date", date_str)
-        payload["symbol"] = sym
-        payload["next_refresh_at_ist"] = next_open
-
-        cache_key = f"{EOD_CACHE_KEY_PREFIX}{date_str}:{hashlib.md5(sym.encode()).hexdigest()}"
-        cache_set(cache_key, json.dumps(payload), EOD_CACHE_TTL)
-
-        if payload.get("analysis_status") == "fallback":
-            summary["fallback_symbols"].append(sym)
-        else:
-            summary["saved_symbols"].append(sym)
+    async with write_batch("eod_ai") as batch:
+        for sym in AI_DECISION_SYMBOLS:
+            payload = await get_eod_analysis(sym, current_now)
+            payload.setdefault("analysis_type", "EOD")
+            payload.setdefault("session_date", date_str)
+            payload["symbol"] = sym
+            payload["next_refresh_at_ist"] = next_open
+
+            cache_key = f"{EOD_CACHE_KEY_PREFIX}{date_str}:{hashlib.md5(sym.encode()).hexdigest()}"
+            cache_set(cache_key, json.dumps(payload), EOD_CACHE_TTL)
+            _materialize_eod_view(sym, payload, ist_now.date(), datetime.fromisoformat(next_open))
+
+            if payload.get("analysis_status") == "fallback":
+                summary["fallback_symbols"].append(sym)
+            else:
+                summary["saved_symbols"].append(sym)
+            await report_progress(
+                symbols_done=len(summary["saved_symbols"]) + len(summary["fallback_symbols"]),
+                symbols_total=len(AI_DECISION_SYMBOLS),
+            )
 
+    summary["unsaved_symbols"] = [
+        sym
+        for sym in AI_DECISION_SYMBOLS
+        if not batch.confirmed(f"{EOD_CACHE_KEY_PREFIX}{date_str}:{hashlib.md5(sym.encode()).hexdigest()}")
+    ]
+    # A symbol whose write was not confirmed is not saved, whatever it computed.
+    summary["saved_symbols"] = [sym for sym in summary["saved_symbols"] if sym not in summary["unsaved_symbols"]]
+    for sym in summary["saved_symbols"] + summary["fallback_symbols"]:
+        if sym not in summary["unsaved_symbols"]:
+            await publish_event("eod", {"symbol": sym, "date": date_str})
+
+    not_saved = set(summary["fallback_symbols"]) | set(summary["unsaved_symbols"])
+    await run.finish(
+        saved=[sym for sym in AI_DECISION_SYMBOLS if sym not in not_saved],
+        failed=[sym for sym in AI_DECISION_SYMBOLS if sym in not_saved],
+    )
     return summary
 
 
@@ -1033,6 +1194,14 @@ async def ensure_latest_eod_snapshot_cache(now: datetime | None = None) -> dict:
         "fallback_symbols": [],
     }
 
+    # A ledger record of a fully successful run means nothing to probe.
+    ledger_ok, _ = await succeeded_slots(target_date_str, "eod_ai", ["1530"])
+    if ledger_ok:
+        summary["existing_symbols"] = list(AI_DECISION_SYMBOLS)
+        summary["source"] = "ledger"
+        return summary
+
+    run = start_run("eod_ai", "1530", target_date_str, mode="backfill")
     for sym in AI_DECISION_SYMBOLS:
         cache_key = f"{EOD_CACHE_KEY_PREFIX}{target_date_str}:{hashlib.md5(sym.encode()).hexdigest()}"
         existing_payload = _load_json_cache(cache_key)
@@ -1053,6 +1222,10 @@ async def ensure_latest_eod_snapshot_cache(now: datetime | None = None) -> dict:
         else:
             summary["saved_symbols"].append(sym)
 
+    await run.finish(
+        saved=summary["existing_symbols"] + summary["saved_symbols"],
+        failed=summary["fallback_symbols"],
+    )
     return summary
 
 
@@ -1071,17 +1244,23 @@ async def ensure_missed_intraday_ai_snapshots(now: datetime | None = None) -> di
     hhmm = ist_now.hour * 100 + ist_now.minute
     summary: dict = {"status": "ok", "date": date_str, "ran": [], "skipped": []}
 
-    for slot in AI_SNAPSHOT_WINDOWS:
-        if hhmm < slot["hhmm"]:
-            continue
+    due_slots = [slot for slot in AI_SNAPSHOT_WINDOWS if hhmm >= slot["hhmm"]]
+    ledger_ok, ledger_unknown = await succeeded_slots(date_str, "ai_snapshot", [slot["id"] for slot in due_slots])
 
-        probe_sym = AI_DECISION_SYMBOLS[0]
-        existing = _load_scheduled_ai_snapshot(date_str, probe_sym, slot["id"])
-        if existing and str(existing.get("analysis_status", "")).lower() != "fallback":
+    for slot in due_slots:
+        if slot["id"] in ledger_ok:
             summary["skipped"].append(slot["id"])
             continue
 
-        result = await run_ai_snapshot_for_all_symbols(slot["id"], now=current_now)
+        # No ledger record (a run from before the ledger): probe the cache instead.
+        if slot["id"] in ledger_unknown:
+            probe_sym = AI_DECISION_SYMBOLS[0]
+            existing = _load_scheduled_ai_snapshot(date_str, probe_sym, slot["id"])
+            if existing and str(existing.get("analysis_status", "")).lower() != "fallback":
+                summary["skipped"].append(slot["id"])
+                continue
+
+        result = await run_ai_snapshot_for_all_symbols(slot["id"], now=current_now, mode="backfill")
         summary["ran"].append(
             {
                 "snapshot_id": slot["id"],
@@ -1170,15 +1349,31 @@ def _build_eod_cache_fallback(
 
 
 @router.get("/ai-decision")
-async def ai_decision_endpoint(symbol: str = Query(default=None)):
+async def ai_decision_endpoint(
+    symbol: str = Query(default=None),
+    view: str = Query(default="full", description="lite drops reasoning and news lists"),
+    fields: str | None = Query(default=None, description="Comma-separated dotted paths to keep"),
+):
     """
     Saved AI decision flow. Gemini runs only on scheduled backend jobs:
     - Market OPEN  -> Saved intraday AI snapshots at 10:00 and 14:30 IST
     - Market CLOSED -> Saved EOD next-day outlook from 15:30 IST
     Refresh only reloads the latest saved snapshot.
     """
+    sym = symbol or settings.default_symbol
+    view = check_view(view)
+    field_paths = parse_fields(fields)
+    if field_paths is None:
+        materialized = load_view("ai-decision", sym, view=view)
+        if materialized is not None:
+            return Response(content=materialized, media_type="application/json")
+
+    payload = await _ai_decision_payload(sym)
+    return FastJSONResponse(project("ai-decision", payload, view, field_paths))
+
+
+async def _ai_decision_payload(sym: str) -> dict:
     try:
-        sym = symbol or settings.default_symbol
         now = datetime.now(timezone.utc)
         ist_now = datetime.now(timezone(timedelta(hours=5, minutes=30)))
 
@@ -1352,7 +1547,8 @@ async def market_focus(
     )
     payload["asset_kind"] = asset["kind"]
     payload["options_count"] = len(MARKET_FOCUS_OPTIONS)
-    payload["served_at"] = now.astimezone(IST).isoformat()
+    # No per-request timestamp in the body: it would change the ETag on every
+    # poll (the Date header already says when it was served).
     return payload
 
 @router.get("/expiry-calendar")
@@ -1379,6 +1575,10 @@ async def expiry_zero_hero_endpoint(index: str = Query(..., description="NIFTY|B
     if not cfg:
         raise HTTPException(status_code=400, detail="Invalid index. Use NIFTY, BANKNIFTY, FINNIFTY, or SENSEX.")
 
+    materialized = load_view("expiry-zero-hero", idx)
+    if materialized is not None:
+        return Response(content=materialized, media_type="application/json")
+
     now = datetime.now(timezone.utc)
     ist_now = now.astimezone(IST)
     fallback_next = _fallback_next_expiry_date(
@@ -1487,7 +1687,7 @@ async def expiry_zero_hero_endpoint(index: str = Query(..., description="NIFTY|B
         AI_SNAPSHOT_CACHE_TTL_SECONDS,
     )
 
-    return _decorate_zero_hero_snapshot(
+    response = _decorate_zero_hero_snapshot(
         payload=result,
         snapshot_slot=active_slot,
         next_slot=next_slot,
@@ -1495,4 +1695,6 @@ async def expiry_zero_hero_endpoint(index: str = Query(..., description="NIFTY|B
         next_refresh_at=valid_until,
         snapshot_stale=False,
     )
+    store_view("expiry-zero-hero", idx, response, _slot_start_ist(ist_now, active_slot), valid_until)
+    return response
 
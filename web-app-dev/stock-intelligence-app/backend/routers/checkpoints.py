@@ -11,9 +11,10 @@ The APScheduler inside main.py calls the trigger automatically at each
 checkpoint time (IST) on weekdays.
 """
 
+import asyncio
 import hmac
 
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Header
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
 from datetime import datetime, timezone, timedelta, time, date as date_cls
 from config import settings
 
@@ -23,7 +24,17 @@ from services.market_data import (
     is_indian_market_open,
 )
 from services.decision_v2 import run_advanced_analysis
+from services.cpu_pool import cpu_pool, run_cpu
 from services.auth_guard import require_authenticated_user
+from services.event_bus import publish_event
+from services.job_queue import enqueue, job_ref, report_progress
+from services.prewarm import boundary_refresh
+from services.storage import StorageError, get_storage
+from services.materialized_views import load_view, store_view
+from services.projection import check_view, parse_fields, project
+from services.responses import FastJSONResponse
+from services.run_ledger import start_run, succeeded_slots
+from services.write_behind import write_batch
 from services.checkpoint_store import (
     save_checkpoint,
     load_all_checkpoints,
@@ -34,6 +45,7 @@ from services.checkpoint_store import (
     log_debug,
     save_eod_close,
     load_eod_close,
+    checkpoint_key,
 )
 
 router = APIRouter(prefix="/api/v1/checkpoints", tags=["checkpoints"])
@@ -54,6 +66,9 @@ def _require_cron_secret(x_checkpoint_cron_secret: str | None) -> None:
 
 
 async def _checkpoint_already_saved(date_str: str, checkpoint_id: str) -> bool:
+    ledger_ok, ledger_unknown = await succeeded_slots(date_str, "checkpoint", [checkpoint_id])
+    if checkpoint_id not in ledger_unknown:
+        return checkpoint_id in ledger_ok
     for sym in SYMBOLS:
         if await load_checkpoint(date_str, checkpoint_id, sym) is None:
             return False
@@ -148,16 +163,24 @@ async def _compute_session_close_price(symbol: str, date_str: str) -> float | No
 # Read all 7 panels
 @router.get("", dependencies=[Depends(require_authenticated_user)])
 async def get_checkpoints(
-    background_tasks: BackgroundTasks,
     symbol: str = Query(default="^NSEI"),
     date: str = Query(default=None),
     allow_catchup: bool = Query(default=True),
+    view: str = Query(default="full", description="lite drops per-panel steps_detail and forecast reasons"),
+    fields: str | None = Query(default=None, description="Comma-separated dotted paths to keep, e.g. panels.*.data.scalp_signal"),
 ):
     """
     Return all 7 checkpoint snapshots for a given day.
     If today's checkpoints are missing but should have been captured,
-    trigger a catch-up in the background.
+    queue a catch-up job.
     """
+    view = check_view(view)
+    field_paths = parse_fields(fields)
+    if not date and allow_catchup and field_paths is None:
+        materialized = load_view("checkpoints", symbol, view=view)
+        if materialized is not None:
+            return Response(content=materialized, media_type="application/json")
+
     now_ist = datetime.now(IST)
 
     if date:
@@ -180,7 +203,17 @@ async def get_checkpoints(
             if p["data"] is None and current_hhmm >= p["id"]
         ]
         if missing_ids:
-            background_tasks.add_task(run_catchup_sequential, missing_ids)
+            # One catch-up per date at a time: polling clients dedupe against the
+            # queued / running one; once it has finished a new one may be queued.
+            try:
+                await enqueue(
+                    "checkpoint_catchup",
+                    {"checkpoint_ids": missing_ids, "date_str": date_str},
+                    idempotency_key=f"checkpoint_catchup:{date_str}",
+                    replace_finished=True,
+                )
+            except StorageError as exc:
+                await log_debug(f"catch-up enqueue failed for {missing_ids}: {exc}")
 
     eod_close = await load_eod_close(date_str, symbol)
     today_str = now_ist.strftime("%Y-%m-%d")
@@ -201,6 +234,18 @@ async def get_checkpoints(
             }
             await save_eod_close(date_str, symbol, eod_close)
 
+    body = _checkpoints_response(date_str, date_source, symbol, panels, eod_close, bool(missing_ids))
+    return FastJSONResponse(project("checkpoints", body, view, field_paths))
+
+
+def _checkpoints_response(
+    date_str: str,
+    date_source: str,
+    symbol: str,
+    panels: list[dict],
+    eod_close: dict | None,
+    catchup_triggered: bool,
+) -> dict:
     return {
         "date": date_str,
         "date_source": date_source,
@@ -208,13 +253,49 @@ async def get_checkpoints(
         "panels": panels,
         "eod_close": eod_close,
         "checkpoints_meta": CHECKPOINTS,
-        "catchup_triggered": bool(missing_ids),
+        "catchup_triggered": catchup_triggered,
         "version": settings.app_version,
         "channel": settings.release_channel,
         "build_label": settings.build_label,
     }
 
 
+def _next_checkpoint_boundary_ist(now_ist: datetime) -> datetime:
+    """Next checkpoint time after now, or 15:30 (EOD close lookup starts) after the last one."""
+    for cp in CHECKPOINTS:
+        hour, minute = (int(part) for part in cp["time"].split(":"))
+        boundary = now_ist.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if boundary > now_ist:
+            return boundary
+    return now_ist.replace(hour=15, minute=30, second=0, microsecond=0)
+
+
+async def materialize_checkpoint_views(date_str: str) -> list[str]:
+    """
+    Store the default-date GET /checkpoints body per symbol until the next
+    checkpoint boundary. Skipped when any due slot is still missing (the live
+    path must run so it can trigger catch-up) or outside today's session.
+    """
+    now_ist = datetime.now(IST)
+    default_date, date_source = _resolve_default_date_ist(now_ist)
+    if date_str != default_date or date_source != "today" or now_ist.time() >= time(15, 30):
+        return []
+
+    current_hhmm = now_ist.strftime("%H%M")
+    valid_until = _next_checkpoint_boundary_ist(now_ist)
+    materialized = []
+    async with write_batch(f"materialize_checkpoints_{date_str}"):
+        for sym in SYMBOLS:
+            panels = await load_all_checkpoints(date_str, sym)
+            if any(p["data"] is None and current_hhmm >= p["id"] for p in panels):
+                continue
+            eod_close = await load_eod_close(date_str, sym)
+            body = _checkpoints_response(date_str, date_source, sym, panels, eod_close, False)
+            if store_view("checkpoints", sym, body, now_ist, valid_until):
+                materialized.append(sym)
+    return materialized
+
+
 LAST_ERROR = "None yet"
 
 
@@ -242,6 +323,8 @@ async def checkpoint_diag():
         "market_message": market_msg,
         "redis_configured": bool(UPSTASH_URL and UPSTASH_TOKEN),
         "redis_url_normalized": UPSTASH_URL[:15] + "..." if UPSTASH_URL else None,
+        "storage_backend": get_storage().name,
+        "storage_configured": get_storage().configured,
         "checkpoints_count": len(CHECKPOINTS),
         "last_error": LAST_ERROR,
         "durable_debug": debug_val,
@@ -284,17 +367,27 @@ async def reconcile_missing_checkpoints(date_str: str | None = None) -> dict:
     missing_by_symbol: dict[str, list[str]] = {}
     missing_union: set[str] = set()
 
-    for sym in SYMBOLS:
-        panels = await load_all_checkpoints(target_date, sym)
-        missing_ids = [p["id"] for p in panels if p["data"] is None]
-        if missing_ids:
-            missing_by_symbol[sym] = missing_ids
-            missing_union.update(missing_ids)
+    # The run ledger says which slots already saved every symbol; only slots
+    # without a ledger record (runs from before the ledger) need a cache probe.
+    slot_ids = [cp["id"] for cp in CHECKPOINTS]
+    ledger_ok, ledger_unknown = await succeeded_slots(target_date, "checkpoint", slot_ids)
+    for cp_id in slot_ids:
+        if cp_id not in ledger_ok and cp_id not in ledger_unknown:
+            missing_union.add(cp_id)
+
+    if ledger_unknown:
+        for sym in SYMBOLS:
+            panels = await load_all_checkpoints(target_date, sym)
+            missing_ids = [p["id"] for p in panels if p["data"] is None and p["id"] in ledger_unknown]
+            if missing_ids:
+                missing_by_symbol[sym] = missing_ids
+                missing_union.update(missing_ids)
 
     filled_ids: list[str] = []
     failed_ids: list[str] = []
 
-    for cp_id in sorted(missing_union):
+    for index, cp_id in enumerate(sorted(missing_union)):
+        await report_progress(slot=cp_id, slots_done=index, slots_total=len(missing_union))
         try:
             summary = await run_checkpoint_for_all_symbols(cp_id, date_str=target_date, use_historical=True)
             if summary.get("failed_symbols"):
@@ -352,13 +445,20 @@ async def reconcile_checkpoints(date: str = Query(default=None)):
 
 @router.get("/cron-capture")
 async def cron_capture_checkpoint(
+    response: Response,
     checkpoint_id: str = Query(..., description="e.g. 0915, 0930, 1000"),
     date: str = Query(default=None, description="Optional YYYY-MM-DD override"),
     historical: bool = Query(default=True, description="Capture exact historical slice up to checkpoint time."),
     force: bool = Query(default=False, description="Recompute even if all symbols are already saved."),
     x_checkpoint_cron_secret: str | None = Header(default=None, alias="X-Checkpoint-Cron-Secret"),
 ):
-    """Secure endpoint for external schedulers (e.g. GitHub Actions)."""
+    """
+    Secure endpoint for external schedulers (e.g. GitHub Actions).
+
+    Queues the capture and returns 202 with a job id at once; poll
+    /api/v1/jobs/{job_id} for progress and the capture summary. Repeated
+    triggers for the same date and slot return the existing job.
+    """
     _require_cron_secret(x_checkpoint_cron_secret)
 
     valid_ids = {cp["id"] for cp in CHECKPOINTS}
@@ -394,61 +494,66 @@ async def cron_capture_checkpoint(
             "symbols": SYMBOLS,
         }
 
-    summary = await run_checkpoint_for_all_symbols(
-        checkpoint_id,
-        date_str=target_date,
-        use_historical=historical,
+    job = await enqueue(
+        "checkpoint_capture",
+        {
+            "checkpoint_id": checkpoint_id,
+            "date_str": target_date,
+            "use_historical": historical,
+            # The external cron is a scheduled trigger even when it reads the historical slice.
+            "mode": "live" if target_date == _today_ist() else "backfill",
+        },
+        idempotency_key=f"checkpoint_capture:{target_date}:{checkpoint_id}",
+        timeout_seconds=600,
+        replace_finished=force,
     )
-    if summary.get("skipped"):
-        return {
-            "status": "skipped",
-            **summary,
-            "symbols": SYMBOLS,
-        }
-    if summary.get("failed_symbols"):
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "status": "partial_failure",
-                **summary,
-            },
-        )
-
+    response.status_code = 202
     return {
-        "status": "captured",
-        **summary,
+        "status": "accepted",
+        "date": target_date,
+        "checkpoint_id": checkpoint_id,
+        "historical": historical,
+        **job_ref(job),
     }
 
 
 @router.get("/cron-reconcile")
 async def cron_reconcile_checkpoints(
+    response: Response,
     date: str = Query(default=None, description="Optional YYYY-MM-DD override"),
     x_checkpoint_cron_secret: str | None = Header(default=None, alias="X-Checkpoint-Cron-Secret"),
 ):
-    """Secure reconcile endpoint for external schedulers."""
+    """Secure reconcile endpoint for external schedulers; queues the reconcile (202 + job id)."""
     _require_cron_secret(x_checkpoint_cron_secret)
 
-    result = await reconcile_missing_checkpoints(date_str=date)
-    if result.get("failed_checkpoint_ids"):
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "status": "partial_failure",
-                **result,
-            },
-        )
-    return {"status": "ok", **result}
+    target_date = date or _today_ist()
+    try:
+        _parse_target_day(target_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date. Use YYYY-MM-DD.")
+
+    # One reconcile per date at a time; a finished one may be re-run.
+    job = await enqueue(
+        "checkpoint_reconcile",
+        {"date_str": target_date},
+        idempotency_key=f"checkpoint_reconcile:{target_date}:cron",
+        timeout_seconds=1800,
+        replace_finished=True,
+    )
+    response.status_code = 202
+    return {"status": "accepted", "date": target_date, **job_ref(job)}
 
 
-async def run_catchup_sequential(checkpoint_ids: list[str]):
+async def run_catchup_sequential(checkpoint_ids: list[str], date_str: str | None = None):
     """Runs missing checkpoints using historical data at each slot's time."""
     import asyncio
 
     global LAST_ERROR
-    date_str = _today_ist()
+    date_str = date_str or _today_ist()
     await log_debug(f"Starting historical catch-up for {checkpoint_ids} on {date_str}")
 
-    for cp_id in checkpoint_ids:
+    for index, cp_id in enumerate(checkpoint_ids):
+        await report_progress(slot=cp_id, slots_done=index, slots_total=len(checkpoint_ids))
         try:
             await run_checkpoint_for_all_symbols(cp_id, date_str=date_str, use_historical=True)
             await asyncio.sleep(3)
@@ -490,7 +595,7 @@ async def trigger_checkpoint(
         raise HTTPException(status_code=500, detail=f"Data fetch failed: {exc}")
 
     try:
-        result = run_advanced_analysis(frames, symbol, now_utc)
+        result = await run_cpu(run_advanced_analysis, frames, symbol, now_utc)
     except Exception as exc:
         tb = traceback.format_exc()
         global LAST_ERROR
@@ -524,6 +629,7 @@ async def trigger_checkpoint(
             status_code=503,
             detail="Redis save failed - check UPSTASH_REDIS_REST_URL / TOKEN env vars.",
         )
+    await materialize_checkpoint_views(date_str)
 
     return {
         "status": "saved",
@@ -540,10 +646,15 @@ async def run_checkpoint_for_all_symbols(
     checkpoint_id: str,
     date_str: str = None,
     use_historical: bool = False,
+    symbols: list[str] | None = None,
+    mode: str | None = None,
 ):
     """
     Internal function called by APScheduler (use_historical=False)
     or catch-up / external schedulers (use_historical=True).
+    symbols limits the run to a subset, e.g. a retry of the failed symbols.
+    mode is the ledger mode of the trigger ("live" for scheduled and cron
+    captures, "backfill" for catch-up); by default it follows use_historical.
     Returns a summary so unattended schedulers can detect partial failures.
     """
     import traceback
@@ -567,14 +678,18 @@ async def run_checkpoint_for_all_symbols(
         await log_debug(f"CHECKPOINT skipped {checkpoint_id} on non-trading day {date_str}")
         return summary
 
-    for sym in SYMBOLS:
+    run_symbols = [sym for sym in SYMBOLS if symbols is None or sym in symbols]
+    run = start_run("checkpoint", checkpoint_id, date_str, mode=mode or ("backfill" if use_historical else "live"))
+
+    async def capture(sym: str) -> None:
+        global LAST_ERROR
         try:
             if use_historical:
                 frames = await fetch_multi_timeframe_at_time(sym, checkpoint_id, date_str)
             else:
                 frames = await fetch_multi_timeframe(sym)
 
-            result = run_advanced_analysis(frames, sym, now_utc)
+            result = await run_cpu(run_advanced_analysis, frames, sym, now_utc)
             is_open, mkt_msg = is_indian_market_open(now_utc)
 
             payload = {
@@ -606,5 +721,38 @@ async def run_checkpoint_for_all_symbols(
             summary["failed_symbols"].append(sym)
             await log_debug(f"CHECKPOINT CRASH {checkpoint_id}|{sym}: {tb}")
             print(f"[CHECKPOINT] error {checkpoint_id} | {sym} | Error: {e}")
+        await report_progress(
+            checkpoint_id=checkpoint_id,
+            symbols_done=len(summary["saved_symbols"]) + len(summary["failed_symbols"]),
+            symbols_total=len(run_symbols),
+        )
+
+    if not use_historical:
+        await boundary_refresh(run_symbols)
+
+    # One storage pipeline for the whole run; per-symbol delivery is checked
+    # after the batch flushes. With the CPU pool on, symbols are fetched and
+    # analysed concurrently so each analysis can take its own core.
+    async with write_batch(f"checkpoint_{checkpoint_id}") as batch:
+        if cpu_pool.enabled:
+            await asyncio.gather(*(capture(sym) for sym in run_symbols))
+        else:
+            for sym in run_symbols:
+                await capture(sym)
+        summary["saved_symbols"].sort(key=SYMBOLS.index)
+
+    for sym in list(summary["saved_symbols"]):
+        if not batch.confirmed(checkpoint_key(date_str, checkpoint_id, sym)):
+            summary["saved_symbols"].remove(sym)
+            summary["failed_symbols"].append(sym)
+            LAST_ERROR = f"{checkpoint_id}|{sym}: Redis save not confirmed"
+            print(f"[CHECKPOINT] error {checkpoint_id} | {sym} | Redis save not confirmed")
+
+    if summary["saved_symbols"]:
+        summary["materialized_symbols"] = await materialize_checkpoint_views(date_str)
+
+    for sym in summary["saved_symbols"]:
+        await publish_event("checkpoint", {"symbol": sym, "date": date_str, "checkpoint_id": checkpoint_id})
 
+    await run.finish(saved=summary["saved_symbols"], failed=summary["failed_symbols"])
     return summary
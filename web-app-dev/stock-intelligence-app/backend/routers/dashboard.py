@@ -0,0 +1,109 @@
+"""
+Dashboard bundle: one authenticated request for the whole dashboard load.
+
+Runs the same builders as the individual endpoints concurrently (so they
+share the in-process snapshot / materialized-view caches) and returns every
+section with its own status and timing. A section that misses the deadline
+is reported as "timeout" and keeps running in the background, so its result
+lands in the caches for the next load instead of being thrown away.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+
+from routers.analyze import (
+    IST,
+    WATCHLIST_DEFAULT_SYMBOLS,
+    ai_decision_endpoint,
+    expiry_calendar,
+    market_focus,
+    watchlist_snapshot,
+)
+from routers.career_pulse import career_pulse_endpoint
+from routers.checkpoints import get_checkpoints
+from services.auth_guard import require_authenticated_user
+from services.projection import check_view
+from services.responses import FastJSONResponse
+from services.value_codec import json_fragment
+
+router = APIRouter(prefix="/api/v1", tags=["dashboard"], dependencies=[Depends(require_authenticated_user)])
+
+DASHBOARD_SECTIONS = ("watchlist", "ai_decision", "checkpoints", "market_focus", "expiry_calendar", "career_pulse")
+DASHBOARD_DEFAULT_TIMEOUT_MS = 8000
+
+# Sections still running after their bundle returned (kept referenced until done).
+_overrun_tasks: set[asyncio.Task] = set()
+
+
+async def _run_section(builder) -> tuple[dict, float]:
+    started = time.perf_counter()
+    try:
+        result = await builder()
+        if isinstance(result, Response):
+            # Section handlers return pre-encoded JSON; embed it without re-parsing.
+            result = json_fragment(result.body)
+        section = {"status": "ok", "data": result}
+    except HTTPException as exc:
+        section = {"status": "error", "status_code": exc.status_code, "error": exc.detail}
+    except Exception as exc:
+        section = {"status": "error", "status_code": 500, "error": str(exc)}
+    return section, time.perf_counter() - started
+
+
+@router.get("/dashboard")
+async def dashboard_bundle(
+    symbol: str = Query(default="^NSEI", description="Symbol for ai_decision / checkpoints"),
+    watchlist: str = Query(default=",".join(WATCHLIST_DEFAULT_SYMBOLS)),
+    focus_symbol: str = Query(default="^NSEI", description="Symbol for market_focus"),
+    sections: str = Query(default=",".join(DASHBOARD_SECTIONS)),
+    timeout_ms: int = Query(default=DASHBOARD_DEFAULT_TIMEOUT_MS, ge=100, le=30000),
+    view: str = Query(default="full", description="lite applies to ai_decision and checkpoints"),
+):
+    """
+    Composite of /watchlist-snapshot, /ai-decision, /checkpoints,
+    /market-focus, /expiry-calendar and /career-pulse.
+
+    Each section is {"status": "ok"|"error"|"timeout", "elapsed_ms", "data"|"error"};
+    sections that fail or time out do not fail the bundle.
+    """
+    wanted = [s.strip() for s in sections.split(",") if s.strip()]
+    unknown = set(wanted) - set(DASHBOARD_SECTIONS)
+    if unknown or not wanted:
+        raise HTTPException(status_code=400, detail=f"Invalid sections. Use any of: {list(DASHBOARD_SECTIONS)}")
+    view = check_view(view)
+
+    builders = {
+        "watchlist": lambda: watchlist_snapshot(symbols=watchlist),
+        "ai_decision": lambda: ai_decision_endpoint(symbol=symbol, view=view, fields=None),
+        "checkpoints": lambda: get_checkpoints(
+            symbol=symbol, date=None, allow_catchup=True, view=view, fields=None
+        ),
+        "market_focus": lambda: market_focus(symbol=focus_symbol, refresh=False),
+        "expiry_calendar": lambda: expiry_calendar(refresh=False),
+        "career_pulse": career_pulse_endpoint,
+    }
+
+    started = time.perf_counter()
+    tasks = {name: asyncio.create_task(_run_section(builders[name])) for name in dict.fromkeys(wanted)}
+    await asyncio.wait(tasks.values(), timeout=timeout_ms / 1000)
+
+    body_sections = {}
+    for name, task in tasks.items():
+        if task.done():
+            section, elapsed = task.result()
+            body_sections[name] = {**section, "elapsed_ms": round(elapsed * 1000, 1)}
+        else:
+            body_sections[name] = {"status": "timeout", "elapsed_ms": timeout_ms, "error": "Section did not finish in time."}
+            _overrun_tasks.add(task)
+            task.add_done_callback(_overrun_tasks.discard)
+
+    return FastJSONResponse({
+        "symbol": symbol,
+        "served_at": datetime.now(IST).isoformat(),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "complete": all(s["status"] == "ok" for s in body_sections.values()),
+        "sections": body_sections,
+    })
@@ -0,0 +1,38 @@
+"""Dev-only diagnostics: recent request / job traces (services/tracing.py)."""
+
+from fastapi import APIRouter, HTTPException, Query
+
+from config import settings
+from services.responses import FastJSONResponse
+from services.tracing import buffer_stats, get_trace, recent_traces
+
+router = APIRouter(prefix="/api/v1/debug", tags=["debug"])
+
+
+def _require_dev() -> None:
+    if not settings.is_dev:
+        raise HTTPException(status_code=404, detail="Not found")
+
+
+@router.get("/traces")
+async def list_traces(
+    limit: int = Query(default=20, ge=1, le=200),
+    min_ms: float = Query(default=0.0, ge=0, description="Only traces at least this long"),
+    name: str | None = Query(default=None, description="Substring of the root span name"),
+):
+    """Most recent traces in this worker's ring buffer, newest first."""
+    _require_dev()
+    return FastJSONResponse({
+        "buffer": buffer_stats(),
+        "traces": recent_traces(limit=limit, min_ms=min_ms, name=name),
+    })
+
+
+@router.get("/traces/{trace_id}")
+async def trace_detail(trace_id: str):
+    """All spans of one trace in start order, with nesting depth and offsets."""
+    _require_dev()
+    spans = get_trace(trace_id)
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Trace not in buffer (evicted or from another worker).")
+    return FastJSONResponse({"trace_id": trace_id, "spans": spans})
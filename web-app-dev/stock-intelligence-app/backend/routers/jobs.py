@@ -0,0 +1,37 @@
+"""Background job status (services/job_queue.py) and scheduled run history (services/run_ledger.py)."""
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from routers.checkpoints import _require_cron_secret
+from services.auth_guard import require_authenticated_user
+from services.job_queue import get_job
+from services.responses import FastJSONResponse
+from services.run_ledger import run_report
+
+router = APIRouter(prefix="/api/v1", tags=["jobs"])
+
+
+async def _require_user_or_cron_secret(
+    authorization: str | None = Header(default=None, alias="Authorization"),
+    x_checkpoint_cron_secret: str | None = Header(default=None, alias="X-Checkpoint-Cron-Secret"),
+) -> None:
+    """Signed-in users, or cron callers polling the job they queued."""
+    if x_checkpoint_cron_secret:
+        _require_cron_secret(x_checkpoint_cron_secret)
+        return
+    await require_authenticated_user(authorization)
+
+
+@router.get("/jobs/{job_id}", dependencies=[Depends(_require_user_or_cron_secret)])
+async def job_status(job_id: str):
+    """Status, attempts, progress, result and last error of a queued job."""
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return FastJSONResponse(job)
+
+
+@router.get("/scheduler/runs", dependencies=[Depends(_require_user_or_cron_secret)])
+async def scheduler_runs(days: int = Query(default=7, ge=1, le=14)):
+    """Per-slot run status plus start-lag drift and missed-run counts per scheduled job."""
+    return FastJSONResponse(await run_report(days))
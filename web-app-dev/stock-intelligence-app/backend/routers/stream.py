@@ -0,0 +1,61 @@
+"""Server-Sent Events push channel for captures and price ticks."""
+
+import asyncio
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from services.auth_guard import require_authenticated_user
+from services.event_bus import EVENT_TOPICS, broadcaster
+
+router = APIRouter(prefix="/api/v1", tags=["stream"], dependencies=[Depends(require_authenticated_user)])
+
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+
+
+@router.get("/stream")
+async def event_stream(
+    request: Request,
+    topics: str = Query(default=",".join(EVENT_TOPICS), description="Comma-separated: checkpoint, ai_snapshot, eod, price"),
+    symbols: str | None = Query(default=None, description="Comma-separated symbols; omit for all"),
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
+):
+    """
+    Push checkpoint / AI snapshot / EOD saves and price ticks as they happen.
+
+    Each event's data names what changed (topic, symbol, ids); clients refetch
+    the affected endpoint. A "resync" event means the client missed events and
+    should refetch everything once.
+    """
+    wanted = {t.strip() for t in topics.split(",") if t.strip()}
+    unknown = wanted - set(EVENT_TOPICS)
+    if unknown or not wanted:
+        raise HTTPException(status_code=400, detail=f"Invalid topics. Use any of: {list(EVENT_TOPICS)}")
+    wanted_symbols = {s.strip() for s in (symbols or "").split(",") if s.strip()} or None
+
+    sub = broadcaster.subscribe(wanted, wanted_symbols, last_event_id)
+
+    async def frames():
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n".encode()
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keepalive\n\n"
+                    continue
+                yield event.frame()
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache, no-transform",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -20,6 +20,17 @@ from xml.etree import ElementTree as ET
 import httpx
 import pytz
 
+from services.cpu_pool import run_cpu
+from services.keyword_scorer import KeywordAutomaton
+from services.market_data import fetch_intraday
+from services.metrics import cache_prefix, record_cache, track_upstream
+from services.news_dedup import collapse_near_duplicates
+from services.snapshot_cache import MISSING, publish_invalidation, snapshot_cache
+from services.storage import get_storage
+from services.tracing import span, traced
+from services.value_codec import decode_text, encode_text
+from services.write_behind import pending_write, write_sync
+
 logger = logging.getLogger(__name__)
 
 IST = pytz.timezone("Asia/Kolkata")
@@ -38,6 +49,11 @@ GEMINI_BASE = "https://generativelanguage.googleapis.com/v1beta/models/{model}:g
 
 NEWS_CACHE_KEY_PREFIX = "ai_news:"
 NEWS_CACHE_TTL_SECONDS = 600  # 10 minutes
+# Feeds are newest-first; parsing stops once this many items were read.
+NEWS_FEED_MAX_ITEMS = 40
+
+# Per-feed conditional GET state (url -> etag / last_modified / parsed items).
+_feed_state: dict[str, dict] = {}
 
 # No-key RSS sources. Mix of global macro + India market relevance.
 NEWS_RSS_FEEDS: list[tuple[str, str]] = [
@@ -61,23 +77,23 @@ NEWS_RSS_FEEDS: list[tuple[str, str]] = [
 
 NEWS_KEYWORD_WEIGHTS: dict[str, int] = {
     "war": 8,
-    "attack": 8,
-    "missile": 8,
-    "sanction": 7,
+    "attack*": 8,
+    "missile*": 8,
+    "sanction*": 7,
     "military": 7,
     "iran": 8,
     "usa": 5,
-    "us ": 5,
+    "us": 5,
     "middle east": 8,
     "oil": 7,
     "crude": 9,
     "opec": 7,
     "federal reserve": 7,
     "fed": 6,
-    "interest rate": 7,
+    "interest rate*": 7,
     "inflation": 6,
     "recession": 6,
-    "bond yield": 6,
+    "bond yield*": 6,
     "dollar": 5,
     "rupee": 6,
     "fii": 7,
@@ -86,11 +102,17 @@ NEWS_KEYWORD_WEIGHTS: dict[str, int] = {
     "sensex": 7,
     "bank nifty": 6,
     "rbi": 6,
-    "tariff": 6,
+    "tariff*": 6,
     "china": 4,
     "israel": 6,
 }
 
+# Direct India market relevance adds a flat boost on top of keyword weights.
+NEWS_INDIA_RELEVANCE_TERMS = ("india", "indian", "nse", "bse", "nifty", "sensex", "bank nifty")
+NEWS_INDIA_RELEVANCE_BOOST = 5
+
+_NEWS_KEYWORDS = KeywordAutomaton(NEWS_KEYWORD_WEIGHTS, extra_terms=NEWS_INDIA_RELEVANCE_TERMS)
+
 
 def _clean_news_text(v: str) -> str:
     text = html.unescape((v or "").strip())
@@ -117,15 +139,17 @@ def _parse_news_dt(v: str | None) -> datetime | None:
         return None
 
 
-def _score_news_impact(title: str, summary: str) -> int:
-    text = f"{title} {summary}".lower()
-    score = 0
-    for kw, weight in NEWS_KEYWORD_WEIGHTS.items():
-        if kw in text:
-            score += weight
-    # Boost for direct India market relevance.
-    if any(x in text for x in ("india", "indian", "nse", "bse", "nifty", "sensex", "bank nifty")):
-        score += 5
+def _score_news_impact(title: str, summary: str, keywords: KeywordAutomaton | None = None) -> int:
+    """
+    Single-pass keyword score. Pass an extended automaton (see
+    KeywordAutomaton.extended) to add per-symbol or sector lexicons.
+    """
+    automaton = keywords or _NEWS_KEYWORDS
+    matched = automaton.matches(f"{title} {summary}")
+    weights = automaton.weights
+    score = sum(weights.get(kw, 0) for kw in matched)
+    if not matched.isdisjoint(NEWS_INDIA_RELEVANCE_TERMS):
+        score += NEWS_INDIA_RELEVANCE_BOOST
     return score
 
 
@@ -153,63 +177,164 @@ def _find_child_text(node, tag_names: set[str]) -> str:
     return ""
 
 
-def _parse_feed_entries(xml_text: str, source_name: str) -> list[dict]:
-    items: list[dict] = []
-    if not xml_text:
-        return items
-    try:
-        root = ET.fromstring(xml_text)
-    except Exception:
-        return items
-
-    for node in root.iter():
-        tag = node.tag.split("}")[-1].lower()
-        if tag not in ("item", "entry"):
-            continue
+def _feed_tag(node) -> str:
+    return node.tag.split("}")[-1].lower()
 
-        title = _find_child_text(node, {"title"})
-        if not title:
-            continue
 
-        summary = _find_child_text(node, {"description", "summary"})
-        pub_raw = _find_child_text(node, {"pubdate", "published", "updated"})
-        pub_dt = _parse_news_dt(pub_raw)
-        link = ""
-        for child in list(node):
-            ctag = child.tag.split("}")[-1].lower()
-            if ctag != "link":
-                continue
+def _feed_item_identity(node) -> str:
+    """GUID (RSS) / id (Atom), falling back to the link, for seen-item checks."""
+    ident = _find_child_text(node, {"guid", "id"})
+    if ident:
+        return ident
+    for child in list(node):
+        if _feed_tag(child) == "link":
             href = (child.attrib or {}).get("href")
             link = _clean_news_text(href or child.text or "")
             if link:
-                break
+                return link
+    return ""
 
-        items.append(
-            {
-                "title": title,
-                "summary": summary,
-                "source": source_name,
-                "link": link,
-                "published_at": pub_dt.isoformat() if pub_dt else "",
-            }
-        )
-    return items
 
+def _parse_feed_item(node, source_name: str) -> dict | None:
+    title = _find_child_text(node, {"title"})
+    if not title:
+        return None
+
+    summary = _find_child_text(node, {"description", "summary"})
+    pub_raw = _find_child_text(node, {"pubdate", "published", "updated"})
+    pub_dt = _parse_news_dt(pub_raw)
+    link = ""
+    for child in list(node):
+        if _feed_tag(child) != "link":
+            continue
+        href = (child.attrib or {}).get("href")
+        link = _clean_news_text(href or child.text or "")
+        if link:
+            break
+
+    return {
+        "title": title,
+        "summary": summary,
+        "source": source_name,
+        "link": link,
+        "published_at": pub_dt.isoformat() if pub_dt else "",
+    }
+
+
+class _FeedStreamParser:
+    """
+    Incremental RSS/Atom parser fed with raw response chunks.
+    Stops after max_items and reuses already-parsed items whose GUID/link was
+    seen on the previous fetch of the same feed.
+    """
+
+    def __init__(self, source_name: str, seen: dict[str, dict], max_items: int):
+        self._parser = ET.XMLPullParser(events=("end",))
+        self._source_name = source_name
+        self._seen = seen
+        self._max_items = max_items
+        self.items: list[dict] = []
+        self.by_id: dict[str, dict] = {}
+        self.reused = 0
+
+    @property
+    def done(self) -> bool:
+        return len(self.items) >= self._max_items
+
+    def feed(self, chunk: bytes) -> bool:
+        """Feed one chunk; returns True once enough items were collected."""
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> None:
+        self._parser.close()
+        self._drain()
+
+    def _drain(self) -> bool:
+        for _, node in self._parser.read_events():
+            if self.done:
+                break
+            if _feed_tag(node) not in ("item", "entry"):
+                continue
+
+            ident = _feed_item_identity(node)
+            item = self._seen.get(ident) if ident else None
+            if item is not None:
+                self.reused += 1
+            else:
+                item = _parse_feed_item(node, self._source_name)
+            node.clear()
+            if item is None:
+                continue
+            self.items.append(item)
+            if ident:
+                self.by_id[ident] = item
+        return self.done
+
+
+async def _fetch_single_news_feed(
+    client: httpx.AsyncClient,
+    source_name: str,
+    url: str,
+    max_items: int = NEWS_FEED_MAX_ITEMS,
+) -> list[dict]:
+    """
+    Conditional, streaming feed fetch.
+    - Sends If-None-Match / If-Modified-Since from the last 200 response;
+      a 304 returns the previously parsed items without touching XML.
+    - Parses while downloading and closes the stream after max_items.
+    """
+    state = _feed_state.get(url) or {}
+    req_headers: dict[str, str] = {}
+    if state.get("etag"):
+        req_headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        req_headers["If-Modified-Since"] = state["last_modified"]
 
-async def _fetch_single_news_feed(client: httpx.AsyncClient, source_name: str, url: str) -> list[dict]:
     try:
-        resp = await client.get(url)
-        if resp.status_code != 200:
-            return []
-        return _parse_feed_entries(resp.text, source_name)
+        with track_upstream("rss"):
+            async with client.stream("GET", url, headers=req_headers) as resp:
+                if resp.status_code == 304 and state.get("items") is not None:
+                    return list(state["items"])[:max_items]
+                if resp.status_code != 200:
+                    return []
+
+                parser = _FeedStreamParser(source_name, seen=state.get("by_id") or {}, max_items=max_items)
+                try:
+                    stopped_early = False
+                    async for chunk in resp.aiter_bytes():
+                        if parser.feed(chunk):
+                            stopped_early = True
+                            break
+                    if not stopped_early:
+                        parser.close()
+                except ET.ParseError:
+                    if not parser.items:
+                        return []
+
+                _feed_state[url] = {
+                    "etag": resp.headers.get("etag"),
+                    "last_modified": resp.headers.get("last-modified"),
+                    "items": parser.items,
+                    "by_id": parser.by_id,
+                }
+                logger.debug(
+                    "Feed %s parsed %d items (%d reused)", source_name, len(parser.items), parser.reused
+                )
+                return list(parser.items)
     except Exception:
         return []
 
 
-def _build_live_news_prompt_block(news_items: list[str]) -> str:
+def _build_live_news_prompt_block(news_items: list[str], cluster_sizes: list[int] | None = None) -> str:
     if not news_items:
         return "- No reliable live headlines fetched."
-    lines = [f"- {headline}" for headline in news_items]
+    sizes = cluster_sizes or []
+    lines = []
+    for i, headline in enumerate(news_items):
+        size = sizes[i] if i < len(sizes) else 1
+        suffix = f" ({size} similar reports)" if size > 1 else ""
+        lines.append(f"- {headline}{suffix}")
     return "\n".join(lines)
 
 
@@ -232,13 +357,16 @@ def _merge_unique_news(primary: list[str], secondary: list[str], limit: int = 5)
     return out
 
 
-async def _collect_live_market_news(now: datetime, max_items: int = 5) -> dict:
+@traced("news.collect")
+async def _collect_live_market_news(now: datetime, max_items: int = 5, bucket_time: datetime | None = None) -> dict:
     """
     Fetch latest global + India market relevant headlines from public RSS feeds,
     rank by likely market impact, and cache for a short interval.
+    bucket_time picks the 10-minute cache bucket (default: now's).
     """
     now_utc = now.astimezone(timezone.utc)
-    bucket = now.astimezone(IST).strftime("%Y%m%d%H") + f"{now.minute // 10}"
+    bucket_at = (bucket_time or now).astimezone(IST)
+    bucket = bucket_at.strftime("%Y%m%d%H") + f"{bucket_at.minute // 10}"
     cache_key = f"{NEWS_CACHE_KEY_PREFIX}{bucket}"
 
     cached = cache_get(cache_key)
@@ -287,16 +415,20 @@ async def _collect_live_market_news(now: datetime, max_items: int = 5) -> dict:
         ranked.append((rank_score, item))
 
     ranked.sort(key=lambda x: x[0], reverse=True)
-    selected = ranked[: max(12, max_items * 2)]
+    # Syndicated copies of one story collapse into its best-ranked version.
+    clustered = collapse_near_duplicates(ranked, text_of=lambda item: item.get("title", ""))
+    selected = clustered[: max(12, max_items * 2)]
 
     headline_list: list[str] = []
-    for _, item in selected:
+    cluster_sizes: list[int] = []
+    for _, item, cluster_size in selected:
         title = _clean_news_text(item.get("title", ""))
         if not title:
             continue
         source = _clean_news_text(item.get("source", "News"))
         title = title[:140]
         headline_list.append(f"[{source}] {title}")
+        cluster_sizes.append(cluster_size)
         if len(headline_list) >= max_items:
             break
 
@@ -314,13 +446,19 @@ async def _collect_live_market_news(now: datetime, max_items: int = 5) -> dict:
     payload = {
         "items": headline_list,
         "impact_summary": impact_summary,
-        "prompt_block": _build_live_news_prompt_block(headline_list),
+        "cluster_sizes": cluster_sizes,
+        "prompt_block": _build_live_news_prompt_block(headline_list, cluster_sizes),
         "fetched_at": now.astimezone(IST).isoformat(),
         "source_count": len(raw_items),
     }
     cache_set(cache_key, json.dumps(payload), NEWS_CACHE_TTL_SECONDS)
     return payload
 
+
+async def prewarm_market_news(boundary: datetime) -> dict:
+    """Collect headlines now into the cache bucket a capture at `boundary` will read."""
+    return await _collect_live_market_news(datetime.now(timezone.utc), bucket_time=boundary)
+
 # â”€â”€ Prompt template â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 
 PRICE_ACTION_PROMPT = """Expert NSE Nifty 50 intraday trader. Analyze using smart money concepts.
@@ -435,6 +573,37 @@ def _build_market_data_block(frames: dict, symbol: str, now: datetime) -> tuple:
     return "\n".join(lines), has_live_price
 
 
+_gemini_aclient: httpx.AsyncClient | None = None
+_gemini_aclient_loop: asyncio.AbstractEventLoop | None = None
+# Idle keep-alive long enough for a pre-warmed connection to survive until the slot.
+GEMINI_KEEPALIVE_SECONDS = 300
+
+
+def _gemini_client() -> httpx.AsyncClient:
+    """Shared per-event-loop client so the TLS connection to Gemini is reused."""
+    global _gemini_aclient, _gemini_aclient_loop
+    loop = asyncio.get_running_loop()
+    if _gemini_aclient is None or _gemini_aclient.is_closed or _gemini_aclient_loop is not loop:
+        _gemini_aclient = httpx.AsyncClient(
+            timeout=45,
+            limits=httpx.Limits(keepalive_expiry=GEMINI_KEEPALIVE_SECONDS),
+        )
+        _gemini_aclient_loop = loop
+    return _gemini_aclient
+
+
+async def warm_gemini_connection() -> bool:
+    """Open the Gemini TLS connection ahead of a scheduled call (any HTTP status will do)."""
+    try:
+        with span("gemini.connect"):
+            await _gemini_client().head(GEMINI_BASE.split("/v1beta")[0])
+        return True
+    except httpx.HTTPError as exc:
+        logger.warning("Gemini pre-connect failed: %s", exc)
+        return False
+
+
+@traced("gemini.call")
 async def _call_gemini(prompt: str, api_key: str) -> str:
     """Call Gemini via REST API, trying each model in GEMINI_MODELS until one succeeds.
     - 404: try next model (model not available)
@@ -449,28 +618,29 @@ async def _call_gemini(prompt: str, api_key: str) -> str:
         },
     }
     last_error: Exception | None = None
-    async with httpx.AsyncClient(timeout=45) as client:
-        for model in GEMINI_MODELS:
-            url = GEMINI_BASE.format(model=model) + f"?key={api_key}"
-            try:
+    client = _gemini_client()
+    for model in GEMINI_MODELS:
+        url = GEMINI_BASE.format(model=model) + f"?key={api_key}"
+        try:
+            with span("gemini.generate", model=model), track_upstream("gemini"):
                 resp = await client.post(url, json=payload, headers={"Content-Type": "application/json"})
-                if resp.status_code == 429:
-                    # Rate limit â€” don't retry other models, raise directly
-                    logger.warning("Gemini rate limit (429) hit on model %s", model)
-                    resp.raise_for_status()
-                if resp.status_code == 404:
-                    logger.warning("Model %s returned 404, trying next...", model)
-                    last_error = httpx.HTTPStatusError(f"{model} 404", request=resp.request, response=resp)
-                    continue
+            if resp.status_code == 429:
+                # Rate limit â€” don't retry other models, raise directly
+                logger.warning("Gemini rate limit (429) hit on model %s", model)
                 resp.raise_for_status()
-                data = resp.json()
-                logger.info("Gemini call succeeded with model: %s", model)
-                return data["candidates"][0]["content"]["parts"][0]["text"]
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 404:
-                    last_error = e
-                    continue
-                raise  # 429 and other errors propagate immediately
+            if resp.status_code == 404:
+                logger.warning("Model %s returned 404, trying next...", model)
+                last_error = httpx.HTTPStatusError(f"{model} 404", request=resp.request, response=resp)
+                continue
+            resp.raise_for_status()
+            data = resp.json()
+            logger.info("Gemini call succeeded with model: %s", model)
+            return data["candidates"][0]["content"]["parts"][0]["text"]
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                last_error = e
+                continue
+            raise  # 429 and other errors propagate immediately
     raise last_error or RuntimeError("All Gemini models returned 404")
 
 
@@ -635,6 +805,7 @@ async def get_ai_decision(
 
 EOD_CACHE_KEY_PREFIX = "ai_eod:"
 EOD_CACHE_TTL = 604800  # 7 days (survives weekends + holiday gaps)
+snapshot_cache.track_prefix(EOD_CACHE_KEY_PREFIX)
 
 EOD_NEXT_DAY_PROMPT = """You are an expert intraday trader specializing in smart money concepts for Indian markets (NSE Nifty 50).
 
@@ -1182,7 +1353,8 @@ async def get_expiry_zero_hero_ai(
 ) -> dict:
     from config import settings
 
-    rule_plan = _build_zero_hero_rule_plan(
+    rule_plan = await run_cpu(
+        _build_zero_hero_rule_plan,
         frames=frames,
         index_abbr=index_abbr,
         strike_step=strike_step,
@@ -1361,7 +1533,8 @@ async def _build_rule_based_eod_fallback(
         import yfinance as yf
 
         ticker = yf.Ticker(symbol)
-        intraday = ticker.history(period="7d", interval="5m", auto_adjust=False, actions=False, prepost=False)
+        with track_upstream("yfinance"):
+            intraday = ticker.history(period="7d", interval="5m", auto_adjust=False, actions=False, prepost=False)
         if intraday is None or intraday.empty:
             raise ValueError("No intraday market data available for rule fallback.")
 
@@ -1385,7 +1558,8 @@ async def _build_rule_based_eod_fallback(
 
         session_type, close_position, next_day_bias, bias_strength = _classify_eod_session(net_pct, close_pct)
 
-        daily_df = ticker.history(period="2mo", interval="1d", auto_adjust=False, actions=False)
+        with track_upstream("yfinance"):
+            daily_df = ticker.history(period="2mo", interval="1d", auto_adjust=False, actions=False)
         highs = [high_p]
         lows = [low_p]
         if daily_df is not None and not daily_df.empty:
@@ -1487,10 +1661,12 @@ async def get_eod_analysis(symbol: str, now: datetime) -> dict:
 
     # Fetch recent market data - get 5 days of 5m data for full day view
     try:
-        import yfinance as yf
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period="5d", interval="5m")
-        if df.empty:
+        # Through fetch_intraday so the pre-warmed 5m frame is used at 15:30.
+        try:
+            df = await fetch_intraday(symbol, interval="5m", period="5d")
+        except ValueError:
+            df = None
+        if df is None or df.empty:
             fallback_payload = await _build_rule_based_eod_fallback(
                 symbol=symbol,
                 now=now,
@@ -1501,7 +1677,10 @@ async def get_eod_analysis(symbol: str, now: datetime) -> dict:
             return fallback_payload
 
         # Convert to IST
-        df.index = df.index.tz_convert(IST)
+        if df.index.tz is None:
+            df.index = df.index.tz_localize("UTC").tz_convert(IST)
+        else:
+            df.index = df.index.tz_convert(IST)
 
         # Get the most recent trading day's data (last day with data)
         latest_date = df.index.date[-1]
@@ -1667,46 +1846,53 @@ def _eod_fallback(symbol: str, reason: str) -> dict:
 
 # â”€â”€ Upstash Redis cache helpers â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 
-UPSTASH_URL  = ""  # loaded lazily from env
-UPSTASH_TOKEN = ""
-
-def _upstash_headers() -> dict:
-    import os
-    return {"Authorization": f"Bearer {os.getenv('UPSTASH_REDIS_REST_TOKEN', '')}"}
-
-def _upstash_base() -> str:
-    import os
-    return os.getenv("UPSTASH_REDIS_REST_URL", "")
-
-
 def cache_get(key: str) -> str | None:
-    try:
-        base = _upstash_base()
-        if not base:
+    """
+    Read from the configured storage backend (Upstash by default); None on miss
+    or error. Snapshot keys (services.snapshot_cache prefixes) are served from
+    the in-process L1 when fresh.
+    """
+    with span("cache.get", prefix=cache_prefix(key)) as s:
+        try:
+            pending = pending_write(key)
+            if pending is not None:
+                _note_cache(s, key, "hit", "pending")
+                return decode_text(pending)
+            tracked = snapshot_cache.tracks(key)
+            if tracked:
+                cached = snapshot_cache.get(key)
+                if cached is not MISSING:
+                    _note_cache(s, key, "hit" if cached is not None else "miss", "l1")
+                    return cached
+            text = decode_text(get_storage().get(key))
+            if tracked:
+                snapshot_cache.put(key, text)
+            _note_cache(s, key, "hit" if text is not None else "miss", "storage")
+            return text
+        except Exception:
+            _note_cache(s, key, "error", "storage")
             return None
-        resp = httpx.get(f"{base}/get/{key}", headers=_upstash_headers(), timeout=5)
-        data = resp.json()
-        return data.get("result")
-    except Exception:
-        return None
+
+
+def _note_cache(s, key: str, result: str, tier: str) -> None:
+    record_cache(key, result, tier)
+    s.set(result=result, tier=tier)
 
 
 def cache_set(key: str, value: str, ttl_seconds: int = 300) -> None:
-    """Store value in Upstash using pipeline POST â€” avoids URL encoding issues with JSON payloads."""
-    try:
-        base = _upstash_base()
-        if not base:
-            return
-        # Use Upstash pipeline endpoint so JSON doesn't need to be URL-encoded
-        payload = [["SET", key, value, "EX", ttl_seconds]]
-        httpx.post(
-            f"{base}/pipeline",
-            headers={**_upstash_headers(), "Content-Type": "application/json"},
-            content=json.dumps(payload),
-            timeout=5,
-        )
-    except Exception:
-        pass
+    """
+    Write to the configured storage backend; failures are swallowed (cache is
+    best-effort). Large values are compressed by services.value_codec. Inside
+    a scheduler job's write_batch() the write is buffered and flushed with the
+    rest of the job's writes.
+    """
+    with span("cache.set", prefix=cache_prefix(key)):
+        try:
+            write_sync(key, encode_text(value), ttl_seconds)
+            if snapshot_cache.tracks(key):
+                publish_invalidation(key)
+        except Exception:
+            pass
 
 
 def _fallback(reason: str) -> dict:
@@ -1,16 +1,100 @@
-"""Supabase access-token verification dependency for FastAPI routes."""
+"""
+Supabase access-token verification dependency for FastAPI routes.
+
+Tokens are verified locally whenever possible:
+  - asymmetric tokens (ES256 / RS256) against the project's JWKS
+    (/auth/v1/.well-known/jwks.json), cached and re-fetched every
+    JWKS_REFRESH_SECONDS or when a token names an unknown kid; needs the
+    optional PyJWT[crypto] package
+  - legacy HS256 tokens with SUPABASE_JWT_SECRET, when configured
+Anything that cannot be decided locally (no key, no library, unknown alg)
+falls back to Supabase Auth /user; concurrent fallbacks for the same token
+share one upstream call.
+
+Verified users are kept in a bounded LRU until the token's exp (remote
+results for TOKEN_CACHE_REMOTE_TTL_SECONDS). Local verification does not see
+server-side logout before exp; Supabase access tokens are short-lived.
+"""
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
 
 import httpx
 from fastapi import Header, HTTPException
 
 from config import settings
+from services.metrics import track_upstream
+
+try:
+    import jwt
+    from jwt import PyJWK
+except ImportError:  # optional: asymmetric tokens fall back to Supabase /user
+    jwt = None
+    PyJWK = None
+
+TOKEN_CACHE_MAX_ENTRIES = 2048
+TOKEN_CACHE_REMOTE_TTL_SECONDS = 120
+TOKEN_CACHE_MAX_TTL_SECONDS = 3600
+JWKS_REFRESH_SECONDS = 600
+JWKS_MIN_REFETCH_SECONDS = 30
+CLOCK_LEEWAY_SECONDS = 30
+EXPECTED_AUDIENCE = "authenticated"
+
+_ASYMMETRIC_ALGS = ("ES256", "RS256", "EdDSA")
+
+
+class _UnverifiableLocally(Exception):
+    """Token is not invalid, but this process cannot check it; ask Supabase."""
+
+
+class _ClaimsCache:
+    """Bounded LRU: sha256(token) -> (expires_at monotonic, user)."""
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
 
-_TOKEN_CACHE_TTL_SECONDS = 120
-_token_cache: dict[str, tuple[datetime, dict]] = {}
+    def get(self, key: bytes) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: bytes, user: dict, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + min(ttl, TOKEN_CACHE_MAX_TTL_SECONDS), user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_token_cache = _ClaimsCache()
+_remote_inflight: dict[bytes, asyncio.Task] = {}
+_jwks: dict[str, object] = {}
+_jwks_fetched_at = 0.0
+_jwks_lock: asyncio.Lock | None = None
+_http_client: httpx.AsyncClient | None = None
+_stats = {"cache_hits": 0, "local_verified": 0, "remote_verified": 0, "remote_shared": 0, "rejected": 0, "jwks_fetches": 0}
 
 
 def _extract_bearer_token(authorization: str | None) -> str:
@@ -24,31 +108,128 @@ def _extract_bearer_token(authorization: str | None) -> str:
     return parts[1].strip()
 
 
-async def require_authenticated_user(
-    authorization: str | None = Header(default=None, alias="Authorization"),
-) -> dict:
-    """Validate Supabase JWT by calling Supabase Auth /user endpoint."""
-    if not settings.auth_required:
-        return {
-            "id": "dev-bypass",
-            "email": "dev@local",
-            "aud": "authenticated",
-            "role": "authenticated",
-        }
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
 
-    if not settings.supabase_url or not settings.supabase_publishable_key:
-        raise HTTPException(
-            status_code=503,
-            detail="Authentication is not configured on backend. Missing SUPABASE_URL or SUPABASE_PUBLISHABLE_KEY.",
-        )
 
-    token = _extract_bearer_token(authorization)
-    now = datetime.now(timezone.utc)
+def _client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=8.0)
+    return _http_client
+
+
+def _user_from_claims(claims: dict) -> dict:
+    return {
+        "id": claims["sub"],
+        "email": claims.get("email"),
+        "phone": claims.get("phone"),
+        "aud": claims.get("aud"),
+        "role": claims.get("role"),
+        "app_metadata": claims.get("app_metadata") or {},
+        "user_metadata": claims.get("user_metadata") or {},
+        "session_id": claims.get("session_id"),
+    }
+
+
+def _check_claims(claims: dict) -> float:
+    """Validate registered claims; return seconds until exp."""
+    now = time.time()
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)) or exp + CLOCK_LEEWAY_SECONDS <= now:
+        raise HTTPException(status_code=401, detail="Session expired or invalid token.")
+    nbf = claims.get("nbf")
+    if isinstance(nbf, (int, float)) and nbf - CLOCK_LEEWAY_SECONDS > now:
+        raise HTTPException(status_code=401, detail="Session expired or invalid token.")
+    aud = claims.get("aud")
+    audiences = aud if isinstance(aud, list) else [aud]
+    if EXPECTED_AUDIENCE not in audiences or not claims.get("sub"):
+        raise HTTPException(status_code=401, detail="Invalid user session.")
+    issuer = claims.get("iss")
+    expected_issuer = f"{settings.supabase_url.rstrip('/')}/auth/v1"
+    if not isinstance(issuer, str) or issuer.rstrip("/") != expected_issuer:
+        raise HTTPException(status_code=401, detail="Invalid user session.")
+    return exp - now
+
 
-    cached = _token_cache.get(token)
-    if cached and cached[0] > now:
-        return cached[1]
+async def _refresh_jwks(force: bool = False) -> None:
+    """Fetch the JWKS if stale (or forced, rate-limited); one fetch at a time."""
+    global _jwks, _jwks_fetched_at, _jwks_lock
+    age = time.monotonic() - _jwks_fetched_at
+    if not force and _jwks_fetched_at and age < JWKS_REFRESH_SECONDS:
+        return
+    if force and age < JWKS_MIN_REFETCH_SECONDS:
+        return
+    if _jwks_lock is None:
+        _jwks_lock = asyncio.Lock()
+    async with _jwks_lock:
+        if _jwks_fetched_at and time.monotonic() - _jwks_fetched_at < JWKS_MIN_REFETCH_SECONDS:
+            return  # refreshed while we waited
+        url = f"{settings.supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+        try:
+            with track_upstream("supabase"):
+                resp = await _client().get(url, headers={"apikey": settings.supabase_publishable_key})
+                resp.raise_for_status()
+            keys = {}
+            for jwk in resp.json().get("keys", []):
+                try:
+                    keys[jwk.get("kid", "")] = PyJWK(jwk)
+                except Exception as exc:
+                    print(f"[AUTH] skipping JWKS key {jwk.get('kid')}: {exc}")
+            _jwks = keys
+            _stats["jwks_fetches"] += 1
+        except Exception as exc:
+            print(f"[AUTH] JWKS fetch failed: {exc}")
+        # Also on failure, so an outage does not turn into a fetch per request.
+        _jwks_fetched_at = time.monotonic()
 
+
+async def _verify_locally(token: str) -> tuple[dict, float]:
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64url_decode(header_b64))
+        alg = header.get("alg")
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid user session.")
+
+    if alg == "HS256":
+        secret = (settings.supabase_jwt_secret or "").encode()
+        if not secret:
+            raise _UnverifiableLocally("no SUPABASE_JWT_SECRET for HS256")
+        expected = hmac.new(secret, f"{header_b64}.{payload_b64}".encode(), hashlib.sha256).digest()
+        try:
+            signature = _b64url_decode(signature_b64)
+        except Exception:
+            raise HTTPException(status_code=401, detail="Invalid user session.")
+        if not hmac.compare_digest(expected, signature):
+            raise HTTPException(status_code=401, detail="Invalid user session.")
+        claims = json.loads(_b64url_decode(payload_b64))
+    elif alg in _ASYMMETRIC_ALGS:
+        if jwt is None:
+            raise _UnverifiableLocally("PyJWT not installed")
+        kid = header.get("kid", "")
+        await _refresh_jwks()
+        if kid not in _jwks:
+            await _refresh_jwks(force=True)  # key rotation
+        key = _jwks.get(kid)
+        if key is None:
+            raise _UnverifiableLocally(f"unknown kid {kid!r}")
+        try:
+            # Claims are checked below with Supabase's rules.
+            claims = jwt.decode(token, key=key.key, algorithms=[alg], options={"verify_exp": False, "verify_aud": False})
+        except jwt.PyJWTError:
+            raise HTTPException(status_code=401, detail="Invalid user session.")
+    else:
+        raise _UnverifiableLocally(f"alg {alg!r}")
+
+    if not isinstance(claims, dict):
+        raise HTTPException(status_code=401, detail="Invalid user session.")
+    ttl = _check_claims(claims)
+    return _user_from_claims(claims), ttl
+
+
+async def _verify_remotely(token: str) -> dict:
+    """Validate via Supabase Auth /user endpoint."""
     url = f"{settings.supabase_url.rstrip('/')}/auth/v1/user"
     headers = {
         "Authorization": f"Bearer {token}",
@@ -56,8 +237,8 @@ async def require_authenticated_user(
     }
 
     try:
-        async with httpx.AsyncClient(timeout=8.0) as client:
-            resp = await client.get(url, headers=headers)
+        with track_upstream("supabase"):
+            resp = await _client().get(url, headers=headers)
     except Exception:
         raise HTTPException(status_code=503, detail="Auth service is unavailable. Please retry.")
 
@@ -73,6 +254,70 @@ async def require_authenticated_user(
 
     if not isinstance(user, dict) or not user.get("id"):
         raise HTTPException(status_code=401, detail="Invalid user session.")
+    return user
 
-    _token_cache[token] = (now + timedelta(seconds=_TOKEN_CACHE_TTL_SECONDS), user)
+
+async def _verify_remotely_once(token: str, cache_key: bytes) -> dict:
+    """Single-flight: concurrent requests with the same token share one upstream call."""
+    task = _remote_inflight.get(cache_key)
+    if task is not None:
+        _stats["remote_shared"] += 1
+    else:
+        task = asyncio.ensure_future(_verify_remotely(token))
+        _remote_inflight[cache_key] = task
+        task.add_done_callback(lambda _t: _remote_inflight.pop(cache_key, None))
+    # Shield so one caller disconnecting does not cancel the others' result.
+    user = await asyncio.shield(task)
+    _token_cache.put(cache_key, user, TOKEN_CACHE_REMOTE_TTL_SECONDS)
     return user
+
+
+async def require_authenticated_user(
+    authorization: str | None = Header(default=None, alias="Authorization"),
+) -> dict:
+    """Validate a Supabase access token (locally when possible)."""
+    if not settings.auth_required:
+        return {
+            "id": "dev-bypass",
+            "email": "dev@local",
+            "aud": "authenticated",
+            "role": "authenticated",
+        }
+
+    if not settings.supabase_url or not settings.supabase_publishable_key:
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication is not configured on backend. Missing SUPABASE_URL or SUPABASE_PUBLISHABLE_KEY.",
+        )
+
+    token = _extract_bearer_token(authorization)
+    cache_key = hashlib.sha256(token.encode()).digest()
+
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        _stats["cache_hits"] += 1
+        return cached
+
+    try:
+        user, ttl = await _verify_locally(token)
+    except _UnverifiableLocally:
+        user = await _verify_remotely_once(token, cache_key)
+        _stats["remote_verified"] += 1
+        return user
+    except HTTPException:
+        _stats["rejected"] += 1
+        raise
+
+    _token_cache.put(cache_key, user, ttl)
+    _stats["local_verified"] += 1
+    return user
+
+
+def auth_stats() -> dict:
+    return {
+        **_stats,
+        "cached_tokens": len(_token_cache),
+        "jwks_keys": len(_jwks),
+        "pyjwt": jwt is not None,
+        "hs256_secret": bool(settings.supabase_jwt_secret),
+    }
@@ -28,13 +28,25 @@ from services.ai_decision import (
     cache_get,
     cache_set,
 )
+from services.keyword_scorer import KeywordAutomaton
+from services.news_dedup import collapse_near_duplicates
+from services.run_ledger import start_run, succeeded_slots
+from services.snapshot_cache import snapshot_cache
 
 logger = logging.getLogger(__name__)
 
 IST = pytz.timezone("Asia/Kolkata")
 
+# One digest per day: (slot, hour, minute) in IST. main.py schedules it and the
+# run ledger records each run under the slot.
+CAREER_PULSE_SCHEDULE = [
+    ("0800", 8, 0),
+]
+CAREER_PULSE_SLOT, _CAREER_PULSE_HOUR, _CAREER_PULSE_MINUTE = CAREER_PULSE_SCHEDULE[0]
+
 CAREER_PULSE_CACHE_PREFIX = "career_pulse:"
 CAREER_PULSE_CACHE_TTL_SECONDS = 60 * 60 * 48  # 48 hours
+snapshot_cache.track_prefix(CAREER_PULSE_CACHE_PREFIX)
 CAREER_NEWS_CACHE_PREFIX = "career_news:"
 CAREER_NEWS_CACHE_TTL_SECONDS = 1800  # 30 minutes
 
@@ -62,14 +74,14 @@ CAREER_RSS_FEEDS: list[tuple[str, str]] = [
 ]
 
 CAREER_KEYWORD_WEIGHTS: dict[str, int] = {
-    "copilot": 9,
+    "copilot*": 9,
     "fabric": 9,
     "power bi": 10,
     "databricks": 9,
     "gemini": 8,
     "openai": 8,
     "chatgpt": 7,
-    "llm": 7,
+    "llm*": 7,
     "generative ai": 9,
     "machine learning": 6,
     "kql": 8,
@@ -84,10 +96,12 @@ CAREER_KEYWORD_WEIGHTS: dict[str, int] = {
     "telematics": 7,
     "fleet": 6,
     "iot": 5,
-    "agent": 6,
+    "agent*": 6,
     "automation": 5,
 }
 
+_CAREER_KEYWORDS = KeywordAutomaton(CAREER_KEYWORD_WEIGHTS)
+
 USER_PROFILE_BLOCK = """
 You are briefing Rupendra, a BI developer and data analyst who:
 - Builds Power BI and Grafana dashboards
@@ -128,12 +142,7 @@ Rules:
 
 
 def _score_career_item(title: str, summary: str) -> int:
-    text = f"{title} {summary}".lower()
-    score = 0
-    for kw, weight in CAREER_KEYWORD_WEIGHTS.items():
-        if kw in text:
-            score += weight
-    return score
+    return _CAREER_KEYWORDS.score(f"{title} {summary}")
 
 
 def _recent_bonus(pub_dt: datetime | None, now_utc: datetime) -> int:
@@ -204,23 +213,29 @@ async def collect_career_news(now: datetime | None = None, max_items: int = 12)
         ranked.append((rank_score, item))
 
     ranked.sort(key=lambda x: x[0], reverse=True)
+    clustered = collapse_near_duplicates(ranked, text_of=lambda item: item.get("title", ""))
 
     headline_list: list[str] = []
+    cluster_sizes: list[int] = []
     source_links: list[dict] = []
-    for _, item in ranked[: max_items * 2]:
+    for _, item, cluster_size in clustered[: max_items * 2]:
         title = _clean_news_text(item.get("title", ""))
         if not title:
             continue
         source = _clean_news_text(item.get("source", "News"))
         headline_list.append(f"[{source}] {title[:160]}")
+        cluster_sizes.append(cluster_size)
         link = _clean_news_text(item.get("link", ""))
         if link:
-            source_links.append({"title": title[:160], "source": source, "link": link})
+            source_links.append(
+                {"title": title[:160], "source": source, "link": link, "cluster_size": cluster_size}
+            )
         if len(headline_list) >= max_items:
             break
 
     payload = {
         "items": headline_list,
+        "cluster_sizes": cluster_sizes,
         "source_links": source_links[:8],
         "fetched_at": now.astimezone(IST).isoformat(),
         "source_count": len(raw_items),
@@ -229,10 +244,15 @@ async def collect_career_news(now: datetime | None = None, max_items: int = 12)
     return payload
 
 
-def _build_headlines_block(items: list[str]) -> str:
+def _build_headlines_block(items: list[str], cluster_sizes: list[int] | None = None) -> str:
     if not items:
         return "- No reliable headlines fetched."
-    return "\n".join(f"- {item}" for item in items)
+    sizes = cluster_sizes or []
+    lines = []
+    for i, item in enumerate(items):
+        size = sizes[i] if i < len(sizes) else 1
+        lines.append(f"- {item} ({size} similar reports)" if size > 1 else f"- {item}")
+    return "\n".join(lines)
 
 
 def _normalize_priority(value: str) -> str:
@@ -272,7 +292,7 @@ def _build_fallback_payload(date_str: str, news_ctx: dict, reason: str) -> dict:
         "analysis_type": "CAREER_PULSE",
         "analysis_status": "fallback",
         "date": date_str,
-        "headlines": items[:5] if items else ["No headlines fetched yet — check back after 08:00 IST."],
+        "headlines": items[:5] if items else [f"No headlines fetched yet — check back after {_CAREER_PULSE_HOUR:02d}:{_CAREER_PULSE_MINUTE:02d} IST."],
         "role_impact": _sanitize_role_impact({}),
         "action_this_week": "Review one Fabric or Power BI Copilot feature doc and note one dashboard use case.",
         "reasoning": reason,
@@ -305,6 +325,7 @@ def load_cached_career_pulse(date_str: str) -> dict | None:
 async def generate_career_pulse(
     now: datetime | None = None,
     force: bool = False,
+    mode: str = "live",
 ) -> dict:
     now = now or datetime.now(timezone.utc)
     ist_now = now.astimezone(IST)
@@ -315,17 +336,19 @@ async def generate_career_pulse(
         if existing and str(existing.get("analysis_status", "")).lower() != "fallback":
             return {"status": "skipped", "date": date_str, "reason": "already_cached"}
 
+    run = start_run("career_pulse", CAREER_PULSE_SLOT, date_str, mode=mode)
     news_ctx = await collect_career_news(now)
     headlines = news_ctx.get("items") or []
 
     if not settings.gemini_api_key:
         payload = _build_fallback_payload(date_str, news_ctx, "GEMINI_API_KEY not configured.")
         cache_set(_pulse_cache_key(date_str), json.dumps(payload), CAREER_PULSE_CACHE_TTL_SECONDS)
+        await run.finish(outcome="failed")
         return {"status": "fallback", "date": date_str, "analysis_status": "fallback"}
 
     prompt = CAREER_PULSE_PROMPT.format(
         profile_block=USER_PROFILE_BLOCK,
-        headlines_block=_build_headlines_block(headlines),
+        headlines_block=_build_headlines_block(headlines, news_ctx.get("cluster_sizes")),
     )
 
     try:
@@ -361,6 +384,7 @@ async def generate_career_pulse(
 
         cache_set(_pulse_cache_key(date_str), json.dumps(payload), CAREER_PULSE_CACHE_TTL_SECONDS)
         logger.info("Career pulse saved for %s", date_str)
+        await run.finish(outcome="ok")
         return {"status": "saved", "date": date_str, "analysis_status": payload["analysis_status"]}
 
     except Exception as exc:
@@ -371,6 +395,7 @@ async def generate_career_pulse(
             f"AI digest unavailable ({exc}). Showing RSS headlines only.",
         )
         cache_set(_pulse_cache_key(date_str), json.dumps(payload), CAREER_PULSE_CACHE_TTL_SECONDS)
+        await run.finish(outcome="failed")
         return {"status": "fallback", "date": date_str, "analysis_status": "fallback", "error": str(exc)}
 
 
@@ -398,19 +423,23 @@ async def get_career_pulse_snapshot(now: datetime | None = None) -> dict:
     return _build_fallback_payload(
         date_str,
         news_ctx,
-        "Today's AI brief will be ready after the 08:00 IST scheduled update.",
+        f"Today's AI brief will be ready after the {_CAREER_PULSE_HOUR:02d}:{_CAREER_PULSE_MINUTE:02d} IST scheduled update.",
     )
 
 
 async def ensure_today_career_pulse_on_startup() -> dict:
-    """Generate today's pulse on boot if missing and local time is after 08:00 IST."""
+    """Generate today's pulse on boot if missing and the scheduled IST time has passed."""
     ist_now = datetime.now(IST)
-    if ist_now.hour < 8:
-        return {"status": "skipped", "reason": "before_0800_ist"}
+    if (ist_now.hour, ist_now.minute) < (_CAREER_PULSE_HOUR, _CAREER_PULSE_MINUTE):
+        return {"status": "skipped", "reason": f"before_{CAREER_PULSE_SLOT}_ist"}
 
     date_str = ist_now.strftime("%Y-%m-%d")
+    ledger_ok, _ = await succeeded_slots(date_str, "career_pulse", [CAREER_PULSE_SLOT])
+    if ledger_ok:
+        return {"status": "skipped", "reason": "ledger_ok", "date": date_str}
+
     existing = load_cached_career_pulse(date_str)
     if existing and str(existing.get("analysis_status", "")).lower() != "fallback":
         return {"status": "skipped", "reason": "already_cached", "date": date_str}
 
-    return await generate_career_pulse(now=datetime.now(timezone.utc), force=False)
+    return await generate_career_pulse(now=datetime.now(timezone.utc), force=False, mode="backfill")
@@ -1,19 +1,23 @@
 """
-Checkpoint Store - Upstash Redis wrapper.
+Checkpoint Store - checkpoint persistence on the configured storage backend
+(Upstash Redis by default, see services/storage.py).
 
-Each checkpoint snapshot is saved as a JSON string under the key:
+Each checkpoint snapshot is saved as JSON (zlib-compressed by
+services/value_codec.py when large) under the key:
     checkpoint:{YYYY-MM-DD}:{HHMM}:{symbol}
 
 TTL expires at 09:00 IST on the next NSE trading day so timeline data
 remains visible across weekends/holidays until the next live market morning.
 """
 
-import json
 import os
 from datetime import datetime, timezone, timedelta, time, date as date_cls
 
-import httpx
 from services.market_data import is_nse_trading_day as market_is_nse_trading_day
+from services.storage import StorageError, get_storage
+from services.tracing import traced
+from services.value_codec import decode_value, encode_value
+from services.write_behind import pending_write, write as buffered_write
 
 IST = timezone(timedelta(hours=5, minutes=30))
 
@@ -32,11 +36,7 @@ CHECKPOINTS = [
 ]
 
 
-def _headers() -> dict:
-    return {"Authorization": f"Bearer {UPSTASH_TOKEN}"}
-
-
-def _make_key(date_str: str, checkpoint_id: str, symbol: str) -> str:
+def checkpoint_key(date_str: str, checkpoint_id: str, symbol: str) -> str:
     """e.g. checkpoint:2026-02-20:0915:^NSEI"""
     return f"checkpoint:{date_str}:{checkpoint_id}:{symbol}"
 
@@ -74,100 +74,75 @@ def _ttl_seconds() -> int:
     return max(ttl, 60)
 
 
-def _get_base_url() -> str:
-    """Normalize Upstash URL to base (no trailing slash)."""
-    url = UPSTASH_URL.strip()
-    if url.endswith("/"):
-        url = url[:-1]
-    for suffix in ["/set", "/get", "/keys", "/pipeline"]:
-        if url.endswith(suffix):
-            url = url[:-len(suffix)]
-    return url
+def _decode(raw: str | None) -> dict | None:
+    return decode_value(raw)
 
 
 async def log_debug(msg: str):
-    """Save a durable debug log to Redis."""
+    """Save a durable debug log to the store."""
     try:
-        url = _get_base_url()
         timestamp = datetime.now(IST).strftime("%H:%M:%S")
         entry = f"[{timestamp}] {msg}"
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                url,
-                json=["SET", "debug:last_run", entry, "EX", "3600"],
-                headers=_headers(),
-                timeout=5,
-            )
+        await buffered_write("debug:last_run", entry, 3600)
     except Exception:
         pass
 
 
+@traced("checkpoint_store.save_checkpoint")
 async def save_checkpoint(date_str: str, checkpoint_id: str, symbol: str, payload: dict) -> bool:
-    """Save checkpoint payload to Upstash Redis using command array for safety."""
-    base_url = _get_base_url()
-    if not base_url or not UPSTASH_TOKEN:
+    """
+    Save checkpoint payload with a TTL until the next trading-day reset.
+    Inside a write_batch() this only queues the write; delivery is confirmed
+    per key in batch.results when the batch flushes.
+    """
+    storage = get_storage()
+    if not storage.configured:
         print("[REDIS] missing credentials - cannot save")
         return False
 
-    key = _make_key(date_str, checkpoint_id, symbol)
-    ttl = _ttl_seconds()
-    value = json.dumps(payload)
-
-    async with httpx.AsyncClient() as client:
-        try:
-            command = ["SET", key, value, "EX", str(ttl)]
-            resp = await client.post(
-                base_url,
-                json=command,
-                headers=_headers(),
-                timeout=15,
-            )
-            if resp.status_code != 200:
-                print(f"[REDIS] SET failed for {key} | Status: {resp.status_code} | Body: {resp.text}")
-                return False
-            return True
-        except Exception as e:
-            print(f"[REDIS] connection error during SET {key}: {e}")
-            return False
+    key = checkpoint_key(date_str, checkpoint_id, symbol)
+    saved = await buffered_write(key, encode_value(payload), _ttl_seconds())
+    if not saved:
+        print(f"[REDIS] SET failed for {key}")
+    return saved
 
 
+@traced("checkpoint_store.load_checkpoint")
 async def load_checkpoint(date_str: str, checkpoint_id: str, symbol: str) -> dict | None:
-    """Load a single checkpoint snapshot using GET command."""
-    base_url = _get_base_url()
-    if not base_url or not UPSTASH_TOKEN:
+    """Load a single checkpoint snapshot."""
+    storage = get_storage()
+    if not storage.configured:
         return None
 
-    key = _make_key(date_str, checkpoint_id, symbol)
-
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.post(
-                base_url,
-                json=["GET", key],
-                headers=_headers(),
-                timeout=10,
-            )
-            if resp.status_code != 200:
-                print(f"[REDIS] GET failed for {key} | Status: {resp.status_code}")
-                return None
-
-            result = resp.json().get("result")
-            if not result:
-                return None
-            return json.loads(result)
-        except Exception as e:
-            print(f"[REDIS] connection error during GET {key}: {e}")
-            return None
+    key = checkpoint_key(date_str, checkpoint_id, symbol)
+    try:
+        return _decode(pending_write(key) or await storage.aget(key))
+    except (StorageError, ValueError) as e:
+        print(f"[REDIS] GET failed for {key}: {e}")
+        return None
 
 
+@traced("checkpoint_store.load_all_checkpoints")
 async def load_all_checkpoints(date_str: str, symbol: str) -> list[dict]:
     """
-    Load all 7 checkpoint slots for a given day + symbol.
+    Load all 7 checkpoint slots for a given day + symbol in one MGET.
     Returns a list of 7 dicts; data=None for slots not yet captured.
     """
+    raw_values: list[str | None] = [None] * len(CHECKPOINTS)
+    storage = get_storage()
+    if storage.configured:
+        try:
+            keys = [checkpoint_key(date_str, cp["id"], symbol) for cp in CHECKPOINTS]
+            raw_values = [pending_write(k) or raw for k, raw in zip(keys, await storage.amget(keys))]
+        except StorageError as e:
+            print(f"[REDIS] MGET failed for {date_str} {symbol}: {e}")
+
     out = []
-    for cp in CHECKPOINTS:
-        data = await load_checkpoint(date_str, cp["id"], symbol)
+    for cp, raw in zip(CHECKPOINTS, raw_values):
+        try:
+            data = _decode(raw)
+        except ValueError:
+            data = None
         out.append(
             {
                 "id": cp["id"],
@@ -179,48 +154,26 @@ async def load_all_checkpoints(date_str: str, symbol: str) -> list[dict]:
     return out
 
 
+@traced("checkpoint_store.save_eod_close")
 async def save_eod_close(date_str: str, symbol: str, payload: dict) -> bool:
     """Save session close payload (e.g. 15:30 close) for a day + symbol."""
-    base_url = _get_base_url()
-    if not base_url or not UPSTASH_TOKEN:
+    storage = get_storage()
+    if not storage.configured:
         return False
 
     key = _make_eod_close_key(date_str, symbol)
-    ttl = _ttl_seconds()
-    value = json.dumps(payload)
-
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.post(
-                base_url,
-                json=["SET", key, value, "EX", str(ttl)],
-                headers=_headers(),
-                timeout=15,
-            )
-            return resp.status_code == 200
-        except Exception:
-            return False
+    return await buffered_write(key, encode_value(payload), _ttl_seconds())
 
 
+@traced("checkpoint_store.load_eod_close")
 async def load_eod_close(date_str: str, symbol: str) -> dict | None:
     """Load saved session close payload for day + symbol."""
-    base_url = _get_base_url()
-    if not base_url or not UPSTASH_TOKEN:
+    storage = get_storage()
+    if not storage.configured:
         return None
 
     key = _make_eod_close_key(date_str, symbol)
-
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.post(
-                base_url,
-                json=["GET", key],
-                headers=_headers(),
-                timeout=10,
-            )
-            if resp.status_code != 200:
-                return None
-            result = resp.json().get("result")
-            return json.loads(result) if result else None
-        except Exception:
-            return None
+    try:
+        return _decode(pending_write(key) or await storage.aget(key))
+    except (StorageError, ValueError):
+        return None
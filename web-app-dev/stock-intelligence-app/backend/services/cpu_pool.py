@@ -0,0 +1,301 @@
+"""
+Optional process pool for the CPU-bound analysis pipelines.
+
+run_advanced_analysis, the stock-focus payload builders and the zero-hero
+rule plan are pure pandas functions; run inline they block the event loop and
+serialize multi-symbol captures on one core. With CPU_POOL_WORKERS > 0:
+
+    result = await run_cpu(run_advanced_analysis, frames, sym, now_utc)
+
+runs the function in a warm worker process instead. DataFrame arguments (and
+dicts of them, like the multi-timeframe `frames`) are not pickled: each frame
+is copied once into a multiprocessing.shared_memory segment (datetime index as
+int64 nanoseconds plus each numeric column in its own dtype) and only a small
+descriptor crosses the pipe. The worker copies the columns out, closes the
+segment, and the parent unlinks it when the call returns. Non-numeric or
+empty frames fall back to pickling. Results (plain dicts) come back pickled.
+
+Workers use the "spawn" start method (forking a process that runs an event
+loop and threads is unsafe), import pandas and the pipeline modules in their
+initializer, and are started from the lifespan so the first capture does not
+pay for process start-up. start() sends one ping per worker and each ping
+holds its worker at a shared barrier until all have arrived, so the pings
+land on distinct processes and every worker is known to be warm. With
+CPU_POOL_WORKERS=0 (the default, for the single-core free tier) run_cpu
+calls the function inline, exactly as before.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable
+
+from config import settings
+from services.lazy_imports import lazy_module
+from services.tracing import capture, current_context, record, span
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+# Imported by every worker at start so the first job does not pay for them.
+WARM_MODULES = ("numpy", "pandas", "services.decision_v2", "services.stock_focus")
+START_BARRIER_SECONDS = 60
+
+
+# ── Shared-memory frame transport ─────────────────────────────────────────────
+
+
+def _export_frame(df, segments: list) -> dict:
+    """Copy df into one shared-memory segment; return its descriptor."""
+    index = df.index
+    numeric = all(np.issubdtype(dtype, np.number) for dtype in df.dtypes)
+    if df.empty or not numeric or not isinstance(index, pd.DatetimeIndex):
+        return {"pickled": df}
+
+    arrays = [("__index__", np.ascontiguousarray(index.as_unit("ns").asi8))]
+    arrays += [(str(col), np.ascontiguousarray(df[col].to_numpy())) for col in df.columns]
+    size = sum(arr.nbytes for _, arr in arrays)
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    segments.append(shm)
+
+    columns, offset = [], 0
+    for name, arr in arrays:
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf, offset=offset)[:] = arr
+        columns.append((name, arr.dtype.str, offset))
+        offset += arr.nbytes
+    return {
+        "shm": shm.name,
+        "rows": len(df),
+        "columns": columns,
+        "tz": str(index.tz) if index.tz is not None else None,
+        "unit": index.unit,
+        "index_name": index.name,
+        "freq": index.freqstr,
+    }
+
+
+def _import_frame(desc: dict):
+    if "pickled" in desc:
+        return desc["pickled"]
+    shm = shared_memory.SharedMemory(name=desc["shm"])
+    try:
+        rows = desc["rows"]
+        data = {
+            name: np.ndarray((rows,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset).copy()
+            for name, dtype, offset in desc["columns"]
+        }
+    finally:
+        shm.close()
+    index = pd.DatetimeIndex(data.pop("__index__").view("M8[ns]"), name=desc["index_name"])
+    if desc["tz"]:
+        index = index.tz_localize("UTC").tz_convert(desc["tz"])
+    index = index.as_unit(desc["unit"])
+    if desc["freq"]:
+        index.freq = desc["freq"]
+    return pd.DataFrame(data, index=index)
+
+
+def _is_frame(value) -> bool:
+    return "pandas" in type(value).__module__ and isinstance(value, pd.DataFrame)
+
+
+def _export_arg(value, segments: list):
+    if _is_frame(value):
+        return ("frame", _export_frame(value, segments))
+    if isinstance(value, dict) and value and all(_is_frame(v) for v in value.values()):
+        return ("frames", {k: _export_frame(v, segments) for k, v in value.items()})
+    return ("value", value)
+
+
+def _import_arg(wrapped):
+    kind, value = wrapped
+    if kind == "frame":
+        return _import_frame(value)
+    if kind == "frames":
+        return {k: _import_frame(v) for k, v in value.items()}
+    return value
+
+
+# ── Worker side ───────────────────────────────────────────────────────────────
+
+
+_start_barrier = None  # set in each worker by _warm_worker
+
+
+def _warm_worker(barrier=None) -> None:
+    global _start_barrier
+    _start_barrier = barrier
+    for name in WARM_MODULES:
+        importlib.import_module(name)
+
+
+def _ping() -> int:
+    # Block until every worker holds a ping, so no worker answers two of them.
+    if _start_barrier is not None:
+        try:
+            _start_barrier.wait(timeout=START_BARRIER_SECONDS)
+        except threading.BrokenBarrierError:
+            pass
+    return os.getpid()
+
+
+def _invoke(
+    fn: Callable, args: tuple, kwargs: dict, submitted_at: float, trace: dict | None
+) -> tuple[Any, float, float, list[dict]]:
+    started = time.time()
+    # Spans recorded here go back to the parent's trace buffer with the result.
+    with capture() as spans, span(f"cpu_worker.{fn.__name__}", parent=trace, pid=os.getpid()):
+        real_args = tuple(_import_arg(a) for a in args)
+        real_kwargs = {k: _import_arg(v) for k, v in kwargs.items()}
+        result = fn(*real_args, **real_kwargs)
+    return result, max(0.0, started - submitted_at), time.time() - started, spans
+
+
+# ── Parent side ───────────────────────────────────────────────────────────────
+
+
+class CpuPool:
+    def __init__(self, workers: int):
+        self.workers = max(0, workers)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._started_at: float | None = None
+        self._pids: set[int] = set()
+        self._barrier = None
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "inline": 0,
+            "active": 0,
+            "restarts": 0,
+            "busy_seconds": 0.0,
+            "queue_wait_seconds": 0.0,
+            "shm_bytes": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                context = multiprocessing.get_context("spawn")
+                self._barrier = context.Barrier(self.workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_warm_worker,
+                    initargs=(self._barrier,),
+                )
+                self._started_at = time.monotonic()
+            return self._executor
+
+    async def start(self) -> dict:
+        """Spawn every worker now and wait until each has imported the pipeline modules."""
+        if not self.enabled:
+            return self.stats()
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        pids = set(await asyncio.gather(*(loop.run_in_executor(executor, _ping) for _ in range(self.workers))))
+        self._pids.update(pids)
+        if len(pids) < self.workers:
+            # A worker was busy past START_BARRIER_SECONDS; the barrier broke.
+            self._barrier.reset()
+            print(f"[CPU-POOL] only {len(pids)}/{self.workers} workers answered the warm-up")
+        else:
+            print(f"[CPU-POOL] {self.workers} workers warm (pids {sorted(pids)})")
+        return self.stats()
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        with span(f"cpu.{fn.__name__}", pool=self.enabled):
+            return await self._run(fn, *args, **kwargs)
+
+    async def _run(self, fn: Callable, *args, **kwargs):
+        if not self.enabled:
+            self._stats["inline"] += 1
+            return fn(*args, **kwargs)
+
+        segments: list[shared_memory.SharedMemory] = []
+        self._stats["submitted"] += 1
+        self._stats["active"] += 1
+        try:
+            wrapped_args = tuple(_export_arg(a, segments) for a in args)
+            wrapped_kwargs = {k: _export_arg(v, segments) for k, v in kwargs.items()}
+            self._stats["shm_bytes"] += sum(shm.size for shm in segments)
+            loop = asyncio.get_running_loop()
+            call = functools.partial(_invoke, fn, wrapped_args, wrapped_kwargs, time.time(), current_context())
+            try:
+                result, waited, busy, spans = await loop.run_in_executor(self._get_executor(), call)
+            except BrokenProcessPool:
+                # A worker died (OOM kill etc.): rebuild the pool and run this call inline.
+                self._reset()
+                self._stats["inline"] += 1
+                return fn(*args, **kwargs)
+            record(spans)
+            self._stats["completed"] += 1
+            self._stats["queue_wait_seconds"] += waited
+            self._stats["busy_seconds"] += busy
+            return result
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            self._stats["active"] -= 1
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+    def _reset(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pids.clear()
+            self._stats["restarts"] += 1
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        print("[CPU-POOL] worker crashed; pool will be recreated on next call")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        capacity = uptime * self.workers
+        busy = self._stats["busy_seconds"]
+        done = self._stats["completed"]
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "running": self._executor is not None,
+            "warm_workers": len(self._pids),
+            "utilization": round(busy / capacity, 4) if capacity else None,
+            "avg_queue_wait_ms": round(self._stats["queue_wait_seconds"] / done * 1000, 1) if done else None,
+            "avg_busy_ms": round(busy / done * 1000, 1) if done else None,
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in self._stats.items()},
+        }
+
+
+def _configured_workers() -> int:
+    workers = settings.cpu_pool_workers
+    return (os.cpu_count() or 1) if workers < 0 else workers
+
+
+cpu_pool = CpuPool(_configured_workers())
+
+
+async def run_cpu(fn: Callable, *args, **kwargs):
+    """Run a pure CPU-bound function in the process pool (inline when disabled)."""
+    return await cpu_pool.run(fn, *args, **kwargs)
@@ -14,10 +14,12 @@ PLUS:
   6.  10–20 Min Momentum Forecast
 """
 
+from __future__ import annotations
+
 import math
-import pandas as pd
 from datetime import datetime, timezone, timedelta
 
+from services.lazy_imports import lazy_module
 from services.market_data import (
     calc_ema,
     calc_ema9,
@@ -33,6 +35,9 @@ from services.market_data import (
     get_market_levels,
     get_latest_price,
 )
+from services.tracing import traced
+
+pd = lazy_module("pandas")
 
 IST = timezone(timedelta(hours=5, minutes=30))
 
@@ -45,6 +50,7 @@ SYMBOL_NAMES = {
 # ── Step 0: HTF Trend Filter ──────────────────────────────
 
 
+@traced("analysis.htf_trend_filter")
 def htf_trend_filter(df_15m: pd.DataFrame, df_1h: pd.DataFrame) -> dict:
     """
     Check 15m & 1h charts for trend alignment.
@@ -114,6 +120,7 @@ def htf_trend_filter(df_15m: pd.DataFrame, df_1h: pd.DataFrame) -> dict:
 # ── Step 0.5: Reversal / Exhaustion Filter ─────────────────
 
 
+@traced("analysis.reversal_filter")
 def reversal_filter(df_5m: pd.DataFrame, df_15m: pd.DataFrame, now: datetime) -> dict:
     """
     Check for exhaustion signals that should block entries.
@@ -174,6 +181,7 @@ def reversal_filter(df_5m: pd.DataFrame, df_15m: pd.DataFrame, now: datetime) ->
 # ── Step 1: Market Structure + Range Context ───────────────
 
 
+@traced("analysis.market_structure_analysis")
 def market_structure_analysis(df_15m: pd.DataFrame) -> dict:
     """Mark key levels and assess range."""
     result = {
@@ -205,6 +213,7 @@ def market_structure_analysis(df_15m: pd.DataFrame) -> dict:
 # ── Step 2: Scalp Analysis ─────────────────────────────────
 
 
+@traced("analysis.scalp_analysis")
 def scalp_analysis(
     df_1m: pd.DataFrame,
     df_3m: pd.DataFrame,
@@ -271,6 +280,7 @@ def scalp_analysis(
 # ── Step 3: 3-Min Confirmation ─────────────────────────────
 
 
+@traced("analysis.three_min_confirm")
 def three_min_confirm(df_3m: pd.DataFrame, df_5m: pd.DataFrame) -> dict:
     """3m + 5m confirmation check."""
     result = {"signal": "⚪ NEUTRAL", "details": []}
@@ -328,6 +338,7 @@ def three_min_confirm(df_3m: pd.DataFrame, df_5m: pd.DataFrame) -> dict:
 # ── Step 4: Option Strike Selection ────────────────────────
 
 
+@traced("analysis.option_strike_selection")
 def option_strike_selection(
     spot_price: float,
     direction: str,  # "CE" or "PE" or "NONE"
@@ -386,6 +397,7 @@ def option_strike_selection(
 # ── Step 5: Risk & Trade Management ───────────────────────
 
 
+@traced("analysis.risk_management")
 def risk_management(
     htf: dict,
     reversal: dict,
@@ -452,6 +464,7 @@ def risk_management(
 # ── Step 6: 10–20 Min Momentum Forecast ────────────────────────────────────
 
 
+@traced("analysis.momentum_forecast")
 def momentum_forecast(
     df_1m: pd.DataFrame,
     df_3m: pd.DataFrame,
@@ -553,6 +566,7 @@ def momentum_forecast(
 # ── Master Pipeline ────────────────────────────────────────
 
 
+@traced("analysis.pipeline")
 def run_advanced_analysis(
     frames: dict[str, pd.DataFrame],
     symbol: str,
@@ -0,0 +1,207 @@
+"""
+In-process event broadcaster for the /api/v1/stream push channel.
+
+Capture jobs call publish_event() once their writes are confirmed; every
+connected SSE client gets the event within the same event-loop tick instead
+of discovering it on its next poll.
+
+  - one Broadcaster per worker; each subscriber owns a bounded queue
+    (SUBSCRIBER_QUEUE_SIZE). A client that falls behind is not allowed to
+    grow memory: its queue is dropped and replaced by a single "resync"
+    event telling it to refetch everything once.
+  - the last EVENT_REPLAY_SIZE events are kept in a ring buffer so a client
+    reconnecting with Last-Event-ID gets what it missed (or "resync" if the
+    gap is older than the buffer).
+  - event ids come from one storage counter (EVENT_SEQ_KEY), so they are
+    ordered across workers and a Last-Event-ID from one worker means the
+    same point on every other.
+  - events are also PUBLISHed on EVENT_CHANNEL so clients connected to other
+    workers see captures that ran here; run_event_bridge() applies remote
+    events under their origin id and skips this worker's own echoes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from services.storage import get_storage
+
+EVENT_CHANNEL = "events:broadcast"
+EVENT_SEQ_KEY = "events:seq"
+EVENT_TOPICS = ("checkpoint", "ai_snapshot", "eod", "price")
+SUBSCRIBER_QUEUE_SIZE = 64
+EVENT_REPLAY_SIZE = 256
+
+IST = timezone(timedelta(hours=5, minutes=30))
+_ORIGIN = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+@dataclass
+class Event:
+    id: int
+    topic: str
+    data: dict
+
+    def frame(self) -> bytes:
+        """SSE wire frame."""
+        body = json.dumps(self.data, separators=(",", ":"), default=str)
+        return f"id: {self.id}\nevent: {self.topic}\ndata: {body}\n\n".encode("utf-8")
+
+
+@dataclass(eq=False)
+class Subscriber:
+    topics: frozenset[str]
+    symbols: frozenset[str] | None = None
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+    overflows: int = 0
+
+    def wants(self, event: Event) -> bool:
+        if event.topic == "resync":
+            return True
+        if event.topic not in self.topics:
+            return False
+        symbol = event.data.get("symbol")
+        return self.symbols is None or symbol is None or symbol in self.symbols
+
+
+class Broadcaster:
+    def __init__(self, replay_size: int = EVENT_REPLAY_SIZE):
+        self._subscribers: set[Subscriber] = set()
+        self._replay: deque[Event] = deque(maxlen=replay_size)
+        self.last_id = 0
+        self.published = 0
+        self.dropped_clients = 0
+
+    def subscribe(self, topics, symbols=None, last_event_id: str | None = None) -> Subscriber:
+        sub = Subscriber(
+            topics=frozenset(topics),
+            symbols=frozenset(symbols) if symbols else None,
+        )
+        self._subscribers.add(sub)
+        if last_event_id:
+            self._replay_since(sub, last_event_id)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subscribers.discard(sub)
+
+    def subscriber_count(self, topic: str | None = None) -> int:
+        if topic is None:
+            return len(self._subscribers)
+        return sum(1 for sub in self._subscribers if topic in sub.topics)
+
+    def subscribed_symbols(self, topic: str) -> set[str] | None:
+        """Union of symbols wanted for topic; None if any subscriber wants all."""
+        symbols: set[str] = set()
+        for sub in self._subscribers:
+            if topic not in sub.topics:
+                continue
+            if sub.symbols is None:
+                return None
+            symbols |= sub.symbols
+        return symbols
+
+    def publish(self, topic: str, data: dict, event_id: int | None = None) -> Event:
+        """Deliver to local subscribers; without an id the next local one is used."""
+        if event_id is None:
+            event_id = self.last_id + 1
+        self.last_id = max(self.last_id, event_id)
+        event = Event(id=event_id, topic=topic, data=data)
+        self._replay.append(event)
+        self.published += 1
+        for sub in list(self._subscribers):
+            if sub.wants(event):
+                self._offer(sub, event)
+        return event
+
+    def _offer(self, sub: Subscriber, event: Event) -> None:
+        try:
+            sub.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Backpressure: a slow client loses its backlog and resyncs once.
+            sub.overflows += 1
+            self.dropped_clients += 1
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+            sub.queue.put_nowait(Event(id=event.id, topic="resync", data={"reason": "slow_consumer"}))
+
+    def _replay_since(self, sub: Subscriber, last_event_id: str) -> None:
+        try:
+            last_id = int(last_event_id)
+        except ValueError:
+            return
+        if self._replay and self._replay[0].id > last_id + 1:
+            self._offer(sub, Event(id=self._replay[-1].id, topic="resync", data={"reason": "replay_gap"}))
+            return
+        for event in self._replay:
+            if event.id > last_id and sub.wants(event):
+                self._offer(sub, event)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped_clients": self.dropped_clients,
+            "replay_buffer": len(self._replay),
+        }
+
+
+broadcaster = Broadcaster()
+
+
+async def publish_event(topic: str, data: dict, local_only: bool = False) -> Event:
+    """Fan out to local clients now and to other workers via storage pub/sub."""
+    data = {"at": datetime.now(IST).isoformat(), **data}
+    storage = get_storage()
+    try:
+        event_id = await storage.aincr(EVENT_SEQ_KEY)
+    except Exception as exc:
+        # Storage down: a local id still reaches this worker's clients.
+        event_id = None
+        print(f"[EVENTS] id allocation failed for {topic}: {exc}")
+    event = broadcaster.publish(topic, data, event_id)
+    if local_only:
+        return event
+    message = json.dumps(
+        {"origin": _ORIGIN, "id": event.id, "topic": topic, "data": data},
+        separators=(",", ":"),
+        default=str,
+    )
+    try:
+        await storage.acall("PUBLISH", EVENT_CHANNEL, message)
+    except Exception as exc:
+        print(f"[EVENTS] publish failed for {topic}: {exc}")
+    return event
+
+
+async def run_event_bridge() -> None:
+    """Long-running task: re-broadcast events published by other workers."""
+    backoff = 1.0
+    while True:
+        try:
+            async for message in get_storage().subscribe(EVENT_CHANNEL):
+                backoff = 1.0
+                try:
+                    envelope = json.loads(message)
+                except ValueError:
+                    continue
+                if envelope.get("origin") == _ORIGIN or envelope.get("topic") not in EVENT_TOPICS:
+                    continue
+                broadcaster.publish(envelope["topic"], envelope.get("data") or {}, envelope.get("id"))
+        except asyncio.CancelledError:
+            raise
+        except NotImplementedError:
+            print("[EVENTS] storage backend has no pub/sub; events stay worker-local")
+            return
+        except Exception as exc:
+            print(f"[EVENTS] bridge error: {exc}; retry in {backoff:.0f}s")
+        # Remote events may have been missed while disconnected.
+        broadcaster.publish("resync", {"reason": "bridge_reconnect"}, broadcaster.last_id)
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 60.0)
@@ -0,0 +1,190 @@
+"""
+Conditional GET + compression middleware for polled dashboard endpoints.
+
+For GET 200 JSON responses on HTTP_CACHE_PATHS:
+  - strong ETag from the body bytes (suffixed per content-encoding)
+  - If-None-Match match -> 304 with no body
+  - Cache-Control: private, max-age=<seconds until valid_until_ist /
+    next_refresh_at_ist in the payload>, or private, no-cache when the
+    payload carries no refresh time (always revalidate, still cheap via 304)
+  - br (when the optional brotli package is installed) or gzip, negotiated
+    from Accept-Encoding; compressed bodies are memoized by ETag so a body
+    that does not change between captures is compressed once.
+
+Streaming responses (e.g. text/event-stream) are passed through untouched.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+HTTP_CACHE_PATHS = (
+    "/api/v1/ai-decision",
+    "/api/v1/checkpoints",
+    "/api/v1/career-pulse",
+    "/api/v1/market-focus",
+    "/api/v1/candles",
+)
+HTTP_CACHE_MAX_AGE_SECONDS = 3600
+COMPRESS_MIN_BYTES = 1024
+COMPRESSED_MEMO_MAX = 256
+
+_REFRESH_RE = re.compile(rb'"(?:valid_until_ist|next_refresh_at_ist)"\s*:\s*"([^"]+)"')
+
+
+def _max_age(body: bytes) -> int | None:
+    """Seconds until the earliest refresh time named in the body."""
+    now = datetime.now(timezone.utc)
+    remaining = None
+    for match in _REFRESH_RE.finditer(body[:65536]):
+        try:
+            refresh_at = datetime.fromisoformat(match.group(1).decode())
+        except ValueError:
+            continue
+        if refresh_at.tzinfo is None:
+            continue
+        seconds = int((refresh_at - now).total_seconds())
+        remaining = seconds if remaining is None else min(remaining, seconds)
+    if remaining is None:
+        return None
+    return max(0, min(remaining, HTTP_CACHE_MAX_AGE_SECONDS))
+
+
+def _pick_encoding(accept_encoding: str) -> str | None:
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[token.strip()] = q
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class _CompressedMemo:
+    def __init__(self, max_entries: int = COMPRESSED_MEMO_MAX):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, etag: str, encoding: str, body: bytes) -> bytes:
+        key = f"{etag}:{encoding}"
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=5)
+        else:
+            compressed = gzip.compress(body, compresslevel=6, mtime=0)
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+
+_compressed_memo = _CompressedMemo()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+class ConditionalCacheMiddleware:
+    """Pure ASGI middleware (buffers only matching GET responses)."""
+
+    def __init__(self, app, paths: tuple[str, ...] = HTTP_CACHE_PATHS):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        start_message: dict | None = None
+        chunks: list[bytes] = []
+        passthrough = False
+
+        async def buffered_send(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in message.get("headers", [])}
+                if (
+                    message["status"] != 200
+                    or not headers.get("content-type", "").startswith("application/json")
+                    or "content-encoding" in headers
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+            if message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self._finish(start_message, b"".join(chunks), request_headers, send)
+
+        await self.app(scope, receive, buffered_send)
+
+    async def _finish(self, start_message: dict, body: bytes, request_headers: dict, send) -> None:
+        base_tag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        encoding = _pick_encoding(request_headers.get("accept-encoding", "")) if len(body) >= COMPRESS_MIN_BYTES else None
+        etag = f'"{base_tag}-{encoding}"' if encoding else f'"{base_tag}"'
+
+        max_age = _max_age(body)
+        cache_control = f"private, max-age={max_age}" if max_age else "private, no-cache"
+
+        headers = [
+            (k, v)
+            for k, v in start_message.get("headers", [])
+            if k.lower() not in (b"content-length", b"etag", b"cache-control", b"vary")
+        ]
+        headers += [
+            (b"etag", etag.encode()),
+            (b"cache-control", cache_control.encode()),
+            (b"vary", b"Accept-Encoding, Authorization"),
+        ]
+
+        if _etag_matches(request_headers.get("if-none-match", ""), etag):
+            headers = [(k, v) for k, v in headers if k.lower() != b"content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if encoding:
+            body = _compressed_memo.get_or_compress(etag, encoding, body)
+            headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
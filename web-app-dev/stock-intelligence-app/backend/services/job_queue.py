@@ -0,0 +1,413 @@
+"""
+Job queue on the storage layer for heavy background work.
+
+Checkpoint captures, reconciles, EOD / AI snapshot generation and catch-ups
+used to run inside the API event loop. The API now enqueues them and a
+JobWorker executes them: in a separate process (`python worker.py`,
+JOB_WORKER_MODE=external) or, by default, as a task in the API process
+(JOB_WORKER_MODE=embedded) so single-service deploys keep working.
+
+Storage layout:
+  jobs:job:<id>      JSON job record (status, attempts, result, error, ...)
+  jobs:idem:<key>    idempotency key -> job id (SET NX)
+  jobs:queue         ready job ids (RPUSH to enqueue)
+  jobs:running       claimed ids; LMOVE from jobs:queue, so a claim is atomic
+  jobs:delayed       ids waiting for a retry backoff to pass
+
+Job status: queued -> running -> done | failed, or retrying -> queued.
+A worker that dies mid-job leaves its id in jobs:running; once the lease
+(timeout + JOB_LEASE_GRACE_SECONDS) has passed, any worker's reaper requeues
+it as a failed attempt. Enqueue PUBLISHes on jobs:wake so idle workers start
+at once instead of waiting for the next poll.
+
+A job holds one of its worker's JOB_WORKER_CONCURRENCY slots while it runs,
+except inside off_slot(): a capture queued ahead of its slot waits there, so
+the wait does not delay other jobs and the slot is taken back at the boundary.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import os
+import random
+import socket
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from config import settings
+from services.metrics import job_duration
+from services.storage import StorageError, get_storage
+from services.tracing import current_context, span
+from services.value_codec import dumps_json, loads_json
+
+JOB_KEY_PREFIX = "jobs:job:"
+IDEMPOTENCY_KEY_PREFIX = "jobs:idem:"
+QUEUE_KEY = "jobs:queue"
+RUNNING_KEY = "jobs:running"
+DELAYED_KEY = "jobs:delayed"
+WAKE_CHANNEL = "jobs:wake"
+
+JOB_TTL_SECONDS = 7 * 86400
+JOB_LEASE_GRACE_SECONDS = 60
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 600
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+JobHandler = Callable[..., Awaitable[dict | None]]
+JOB_HANDLERS: dict[str, JobHandler] = {}
+
+# Record of the job the current task is running, for report_progress().
+_current_job: contextvars.ContextVar[dict | None] = contextvars.ContextVar("current_job", default=None)
+# Worker slot held by the current task, for off_slot().
+_current_slot: contextvars.ContextVar["_WorkerSlot | None"] = contextvars.ContextVar("current_slot", default=None)
+
+
+def register_job(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Decorator: handler(**args) runs jobs of this kind; its return value is the job result."""
+
+    def decorator(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = handler
+        return handler
+
+    return decorator
+
+
+def _job_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+
+def _now_ist() -> str:
+    return datetime.now(IST).isoformat()
+
+
+async def _save_job(job: dict) -> None:
+    job["updated_at"] = time.time()
+    await get_storage().aset(_job_key(job["id"]), dumps_json(job).decode("utf-8"), ttl_seconds=JOB_TTL_SECONDS)
+
+
+async def get_job(job_id: str) -> dict | None:
+    raw = await get_storage().aget(_job_key(job_id))
+    return loads_json(raw) if raw else None
+
+
+def job_ref(job: dict) -> dict:
+    """Fields an endpoint returns after queueing a job."""
+    return {
+        "job_id": job["id"],
+        "job_status": job["status"],
+        "deduplicated": job.get("deduplicated", False),
+        "status_url": f"/api/v1/jobs/{job['id']}",
+    }
+
+
+def set_retry_args(**args) -> None:
+    """Change the running job's args for its next attempt (e.g. retry only what failed)."""
+    job = _current_job.get()
+    if job is not None:
+        job["args"] = {**job["args"], **args}
+
+
+@contextlib.asynccontextmanager
+async def off_slot():
+    """
+    Run the block without holding a worker slot (waiting, not working); on a
+    normal exit wait for a free slot again. No-op outside a job.
+    """
+    slot = _current_slot.get()
+    if slot is None:
+        yield
+        return
+    slot.release()
+    yield
+    await slot.acquire()
+
+
+async def report_progress(**fields) -> None:
+    """Merge fields into the running job's "progress" and save; no-op outside a job."""
+    job = _current_job.get()
+    if job is None:
+        return
+    job["progress"] = {**(job.get("progress") or {}), **fields}
+    try:
+        await _save_job(job)
+    except StorageError as exc:
+        print(f"[JOBS] progress update failed for {job['id']}: {exc}")
+
+
+async def enqueue(
+    kind: str,
+    args: dict | None = None,
+    idempotency_key: str | None = None,
+    max_attempts: int = 3,
+    timeout_seconds: int = 900,
+    replace_finished: bool = False,
+) -> dict:
+    """
+    Queue a job and return its record. With an idempotency_key, a job already
+    queued, running or done under that key is returned instead (with
+    "deduplicated": True); a failed one is replaced by a new job, and so is a
+    done one when replace_finished (forced re-runs).
+    """
+    storage = get_storage()
+    job_id = uuid.uuid4().hex
+    if idempotency_key:
+        idem_key = f"{IDEMPOTENCY_KEY_PREFIX}{idempotency_key}"
+        if not await storage.aset_if_absent(idem_key, job_id, JOB_TTL_SECONDS * 1000):
+            existing_id = await storage.aget(idem_key)
+            existing = await get_job(existing_id) if existing_id else None
+            if existing_id and existing is None:
+                # The winner of the SET NX has not saved its record yet: in flight.
+                return {"id": existing_id, "kind": kind, "status": "queued", "deduplicated": True}
+            finished = ("failed", "done") if replace_finished else ("failed",)
+            if existing is not None and existing["status"] not in finished:
+                return {**existing, "deduplicated": True}
+            await storage.aset(idem_key, job_id, ttl_seconds=JOB_TTL_SECONDS)
+
+    job = {
+        "id": job_id,
+        "kind": kind,
+        "args": args or {},
+        "idempotency_key": idempotency_key,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "timeout_seconds": timeout_seconds,
+        "enqueued_at": _now_ist(),
+        "started_at": None,
+        "finished_at": None,
+        "run_after": None,
+        "lease_until": None,
+        "worker": None,
+        "progress": None,
+        "result": None,
+        "error": None,
+        "trace": current_context(),
+    }
+    await _save_job(job)
+    await storage.apipeline([["RPUSH", QUEUE_KEY, job_id], ["PUBLISH", WAKE_CHANNEL, job_id]])
+    print(f"[JOBS] queued {kind} {job_id} key={idempotency_key}")
+    return {**job, "deduplicated": False}
+
+
+class _WorkerSlot:
+    """One of a worker's concurrency slots, as held by a single job task."""
+
+    def __init__(self, slots: asyncio.Semaphore, on_release: Callable[[], None]):
+        self._slots = slots
+        self._on_release = on_release
+        self.held = True
+
+    def release(self) -> None:
+        if self.held:
+            self.held = False
+            self._slots.release()
+            self._on_release()
+
+    async def acquire(self) -> None:
+        await self._slots.acquire()
+        self.held = True
+
+
+def _retry_delay(attempt: int) -> float:
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempt - 1), RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class JobWorker:
+    def __init__(self, poll_seconds: float | None = None, concurrency: int | None = None):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.poll_seconds = poll_seconds or settings.job_worker_poll_seconds
+        self.concurrency = max(1, concurrency or settings.job_worker_concurrency)
+        self._wake = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._active: set[asyncio.Task] = set()
+        self._stats = {"done": 0, "failed": 0, "retried": 0, "reaped": 0, "errors": 0}
+
+    async def run(self) -> None:
+        """Claim and run jobs until cancelled; running jobs are cancelled with it."""
+        listener = asyncio.create_task(self._listen_for_wakeups())
+        print(f"[JOBS] worker {self.worker_id} started (concurrency={self.concurrency})")
+        try:
+            while True:
+                self._wake.clear()  # before claiming, so a wakeup during the claim is kept
+                try:
+                    await self._promote_delayed()
+                    await self._reap_expired()
+                    # locked() is also true while a job leaving off_slot() waits, so it goes first.
+                    while not self._slots.locked():
+                        job_id = await get_storage().acall("LMOVE", QUEUE_KEY, RUNNING_KEY, "LEFT", "RIGHT")
+                        if job_id is None:
+                            break
+                        await self._slots.acquire()
+                        slot = _WorkerSlot(self._slots, self._wake.set)
+                        task = asyncio.create_task(self._execute(job_id, slot))
+                        self._active.add(task)
+                        task.add_done_callback(self._on_task_done)
+                except StorageError as exc:
+                    self._stats["errors"] += 1
+                    print(f"[JOBS] storage error: {exc}")
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            listener.cancel()
+            for task in list(self._active):
+                task.cancel()
+            if self._active:
+                await asyncio.gather(*self._active, return_exceptions=True)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._active.discard(task)
+
+    async def _listen_for_wakeups(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                async for _ in get_storage().subscribe(WAKE_CHANNEL):
+                    self._wake.set()
+                    backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except NotImplementedError:
+                return  # poll only
+            except Exception as exc:
+                print(f"[JOBS] wake listener error: {exc}; retry in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    async def _promote_delayed(self) -> None:
+        storage = get_storage()
+        delayed = await storage.acall("LRANGE", DELAYED_KEY, "0", "-1") or []
+        if not delayed:
+            return
+        records = await storage.amget([_job_key(job_id) for job_id in delayed])
+        now = time.time()
+        for job_id, raw in zip(delayed, records):
+            job = loads_json(raw) if raw else None
+            if job is not None and (job.get("run_after") or 0) > now:
+                continue
+            # LREM decides which worker moves it when several race.
+            if int(await storage.acall("LREM", DELAYED_KEY, "1", job_id) or 0) and job is not None:
+                job["status"] = "queued"
+                await _save_job(job)
+                await storage.acall("RPUSH", QUEUE_KEY, job_id)
+
+    async def _reap_expired(self) -> None:
+        storage = get_storage()
+        running = await storage.acall("LRANGE", RUNNING_KEY, "0", "-1") or []
+        if not running:
+            return
+        records = await storage.amget([_job_key(job_id) for job_id in running])
+        now = time.time()
+        for job_id, raw in zip(running, records):
+            job = loads_json(raw) if raw else None
+            if job is not None:
+                if job["status"] == "running" and (job.get("lease_until") or 0) > now:
+                    continue
+                # Claimed but never marked running: give the claimer a moment.
+                if job["status"] == "queued" and now - job.get("updated_at", 0) < JOB_LEASE_GRACE_SECONDS:
+                    continue
+            if not int(await storage.acall("LREM", RUNNING_KEY, "1", job_id) or 0) or job is None:
+                continue
+            self._stats["reaped"] += 1
+            print(f"[JOBS] reaped {job['kind']} {job_id} from {job.get('worker')}")
+            await self._finish_attempt(job, error="worker lease expired")
+
+    async def _execute(self, job_id: str, slot: _WorkerSlot) -> None:
+        _current_slot.set(slot)
+        try:
+            await self._run_job(job_id)
+        finally:
+            slot.release()  # wakes the claim loop
+
+    async def _run_job(self, job_id: str) -> None:
+        job = await get_job(job_id)
+        if job is None:
+            await get_storage().acall("LREM", RUNNING_KEY, "1", job_id)
+            return
+        handler = JOB_HANDLERS.get(job["kind"])
+        timeout = job.get("timeout_seconds") or 900
+        job.update(
+            status="running",
+            attempts=job["attempts"] + 1,
+            started_at=_now_ist(),
+            worker=self.worker_id,
+            lease_until=time.time() + timeout + JOB_LEASE_GRACE_SECONDS,
+        )
+        await _save_job(job)
+
+        started = time.perf_counter()
+        error = None
+        outcome = "ok"
+        try:
+            if handler is None:
+                raise LookupError(f"no handler registered for job kind {job['kind']!r}")
+            _current_job.set(job)
+            # Each attempt continues the trace of whoever queued the job.
+            with span(f"job.{job['kind']}", root=True, parent=job.get("trace"), job_id=job_id, attempt=job["attempts"]):
+                job["result"] = await asyncio.wait_for(handler(**job["args"]), timeout=timeout)
+        except asyncio.CancelledError:
+            await self._requeue_interrupted(job)
+            raise
+        except asyncio.TimeoutError:
+            error = f"timed out after {timeout}s"
+            outcome = "timeout"
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            outcome = "error"
+            print(f"[JOBS] {job['kind']} {job_id} failed: {traceback.format_exc()[-500:]}")
+        elapsed = time.perf_counter() - started
+        job["elapsed_seconds"] = round(elapsed, 2)
+        job_duration.observe(elapsed, job["kind"], outcome)
+
+        await get_storage().acall("LREM", RUNNING_KEY, "1", job_id)
+        await self._finish_attempt(job, error=error)
+
+    async def _requeue_interrupted(self, job: dict) -> None:
+        """Shutdown mid-job: hand it back without spending an attempt."""
+        try:
+            storage = get_storage()
+            if int(await storage.acall("LREM", RUNNING_KEY, "1", job["id"]) or 0):
+                job.update(status="queued", attempts=job["attempts"] - 1, lease_until=None, worker=None)
+                await _save_job(job)
+                await storage.acall("LPUSH", QUEUE_KEY, job["id"])
+                print(f"[JOBS] requeued interrupted {job['kind']} {job['id']}")
+        except StorageError as exc:
+            print(f"[JOBS] could not requeue {job['id']} ({exc}); lease expiry will")
+
+    async def _finish_attempt(self, job: dict, error: str | None) -> None:
+        job["lease_until"] = None
+        if error is None:
+            job.update(status="done", error=None, finished_at=_now_ist())
+            self._stats["done"] += 1
+            print(f"[JOBS] done {job['kind']} {job['id']} in {job.get('elapsed_seconds')}s")
+            await _save_job(job)
+            return
+        job["error"] = error
+        if job["attempts"] < job["max_attempts"]:
+            delay = _retry_delay(job["attempts"])
+            job.update(status="retrying", run_after=time.time() + delay)
+            self._stats["retried"] += 1
+            print(f"[JOBS] retry {job['kind']} {job['id']} in {delay:.0f}s ({job['attempts']}/{job['max_attempts']}): {error}")
+            await _save_job(job)
+            await get_storage().acall("RPUSH", DELAYED_KEY, job["id"])
+            return
+        job.update(status="failed", finished_at=_now_ist())
+        self._stats["failed"] += 1
+        print(f"[JOBS] failed {job['kind']} {job['id']} after {job['attempts']} attempts: {error}")
+        await _save_job(job)
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "active": len(self._active),
+            "concurrency": self.concurrency,
+            **self._stats,
+        }
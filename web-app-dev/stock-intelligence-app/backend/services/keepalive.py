@@ -7,6 +7,7 @@ import os
 import httpx
 
 from config import settings
+from services.metrics import track_upstream
 
 UPSTASH_URL = os.getenv("UPSTASH_REDIS_REST_URL", "").strip()
 UPSTASH_TOKEN = os.getenv("UPSTASH_REDIS_REST_TOKEN", "").strip()
@@ -31,7 +32,8 @@ async def ping_supabase_auth() -> dict:
 
     try:
         async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(url, headers=headers)
+            with track_upstream("supabase"):
+                resp = await client.get(url, headers=headers)
         return {
             "ok": resp.status_code < 500,
             "status_code": resp.status_code,
@@ -57,7 +59,8 @@ async def ping_upstash_redis() -> dict:
 
     try:
         async with httpx.AsyncClient(timeout=10.0) as client:
-            ping_resp = await client.get(f"{base}/ping", headers=headers)
+            with track_upstream("upstash"):
+                ping_resp = await client.get(f"{base}/ping", headers=headers)
             if ping_resp.status_code >= 400:
                 return {
                     "ok": False,
@@ -0,0 +1,159 @@
+"""
+Multi-keyword matcher for headline impact scoring.
+
+Builds one Aho-Corasick automaton over word tokens for a weighted keyword
+dictionary, so every headline is scored in a single pass no matter how many
+keywords (market, per-symbol or sector lexicons) are loaded.
+
+Keyword syntax:
+  "crude"          whole word only ("crude" but not "crudely")
+  "power bi"       multi-word phrase, matched on consecutive words
+  "sanction*"      trailing * = prefix match on the last word ("sanctions")
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Memo of raw token -> canonical token is bounded so long-running workers
+# do not grow it without limit.
+_TOKEN_MEMO_MAX = 50000
+
+
+def _tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class KeywordAutomaton:
+    """Token-level Aho-Corasick automaton with word-boundary semantics."""
+
+    def __init__(self, weights: dict[str, int], extra_terms: list[str] | tuple[str, ...] = ()):
+        self.weights: dict[str, int] = dict(weights)
+        # Matched but unweighted (e.g. relevance terms the caller scores itself).
+        self.extra_terms: tuple[str, ...] = tuple(extra_terms)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[str, ...]] = [()]
+        self._exact_tokens: set[str] = set()
+        self._stems: set[str] = set()
+        self._stem_lengths: list[int] = []
+        self._memo: dict[str, str] = {}
+
+        for keyword in list(self.weights) + [t for t in self.extra_terms if t not in self.weights]:
+            self._add(keyword)
+        self._stem_lengths = sorted({len(s) for s in self._stems}, reverse=True)
+        self._build_links()
+
+    def _add(self, keyword: str) -> None:
+        raw = keyword.strip().lower()
+        is_stem = raw.endswith("*")
+        tokens = _tokenize(raw.rstrip("*"))
+        if not tokens:
+            return
+
+        state = 0
+        for pos, token in enumerate(tokens):
+            if is_stem and pos == len(tokens) - 1:
+                self._stems.add(token)
+            else:
+                self._exact_tokens.add(token)
+            nxt = self._goto[state].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][token] = nxt
+            state = nxt
+        self._out[state] = self._out[state] + (keyword,)
+
+    def _build_links(self) -> None:
+        queue: list[int] = []
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Merge outputs along the suffix chain once, so matching never
+                # has to walk fail links to report shorter phrases.
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _canonical(self, token: str) -> str:
+        """Map inflected words onto registered stems ("sanctions" -> "sanction")."""
+        cached = self._memo.get(token)
+        if cached is not None:
+            return cached
+
+        canonical = token
+        for length in ([] if token in self._exact_tokens else self._stem_lengths):
+            if length <= len(token) and token[:length] in self._stems:
+                canonical = token[:length]
+                break
+        if len(self._memo) >= _TOKEN_MEMO_MAX:
+            self._memo.clear()
+        self._memo[token] = canonical
+        return canonical
+
+    def matches(self, text: str) -> set[str]:
+        """Return the set of keywords found in text (each reported once)."""
+        found: set[str] = set()
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        memo = self._memo
+        canonical = self._canonical if self._stems else None
+        state = 0
+        for token in _TOKEN_RE.findall((text or "").lower()):
+            if canonical is not None:
+                token = memo.get(token) or canonical(token)
+            edges = goto[state]
+            while state and token not in edges:
+                state = fail[state]
+                edges = goto[state]
+            state = edges.get(token, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def score(self, text: str) -> int:
+        """Sum of weights of distinct keywords present in text."""
+        weights = self.weights
+        return sum(weights.get(kw, 0) for kw in self.matches(text))
+
+    def extended(self, *lexicons: dict[str, int]) -> "KeywordAutomaton":
+        """Automaton with extra (e.g. per-symbol or sector) lexicons merged in; keeps extra_terms."""
+        return keyword_automaton_for(self.weights, *lexicons, extra_terms=self.extra_terms)
+
+
+# Distinct lexicon combinations kept built; the least recently used is dropped.
+AUTOMATON_CACHE_SIZE = 64
+
+
+@functools.lru_cache(maxsize=AUTOMATON_CACHE_SIZE)
+def _build_automaton(
+    lexicons: tuple[tuple[tuple[str, int], ...], ...],
+    extra_terms: tuple[str, ...],
+) -> KeywordAutomaton:
+    merged: dict[str, int] = {}
+    for lexicon in lexicons:
+        for keyword, weight in lexicon:
+            merged[keyword] = max(weight, merged.get(keyword, weight))
+    return KeywordAutomaton(merged, extra_terms=extra_terms)
+
+
+def keyword_automaton_for(*lexicons: dict[str, int], extra_terms: tuple[str, ...] = ()) -> KeywordAutomaton:
+    """Cached automaton for a combination of lexicons (LRU of AUTOMATON_CACHE_SIZE)."""
+    return _build_automaton(tuple(tuple(sorted(lexicon.items())) for lexicon in lexicons), tuple(extra_terms))
@@ -0,0 +1,84 @@
+"""
+Lazy accessors for heavy third-party modules (numpy, pandas, yfinance).
+
+Importing them costs most of the app's import time, which on a free-tier
+cold start or a keepalive wake-up delays the first response, including
+/health. Modules bind a proxy instead:
+
+    pd = lazy_module("pandas")
+
+and the real import happens on first attribute access (the first market-data
+fetch). Modules using a proxy in annotations need
+`from __future__ import annotations` so signatures don't touch it at import.
+
+With WARM_IMPORTS enabled the lifespan calls preload() in a worker thread
+right after startup, so the first real request does not pay for the import.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+import threading
+import time
+import types
+
+HEAVY_MODULES = ("numpy", "pandas", "yfinance")
+
+_load_lock = threading.Lock()
+_load_seconds: dict[str, float] = {}
+
+
+class _LazyModule(types.ModuleType):
+    """Module proxy that imports its target on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_target"] = None
+
+    def _load(self) -> types.ModuleType:
+        target = self.__dict__["_target"]
+        if target is None:
+            target = load(self.__name__)
+            self.__dict__["_target"] = target
+        return target
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_target"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    return _LazyModule(name)
+
+
+def load(name: str) -> types.ModuleType:
+    """Import name now (once), recording how long it took."""
+    module = sys.modules.get(name)
+    # A module still being imported by another thread (warm_imports) is already
+    # in sys.modules; only a fully initialised one may skip import_module, which
+    # waits on the per-module import lock until that import has finished.
+    if module is not None and not getattr(module.__spec__, "_initializing", False):
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    with _load_lock:
+        _load_seconds.setdefault(name, round(time.perf_counter() - started, 3))
+    return module
+
+
+def preload(names: tuple[str, ...] = HEAVY_MODULES) -> dict:
+    """Import all heavy modules; meant to run in a worker thread after startup."""
+    for name in names:
+        load(name)
+    return import_state()
+
+
+def import_state() -> dict:
+    return {
+        name: {"loaded": name in sys.modules, "load_seconds": _load_seconds.get(name)}
+        for name in HEAVY_MODULES
+    }
@@ -0,0 +1,202 @@
+"""
+Scheduler leader election over a storage lease.
+
+Every worker registers the same APScheduler jobs; only the worker holding the
+lease actually runs them, so extra uvicorn workers / instances add request
+throughput without repeating yfinance and Gemini calls.
+
+  - the lease is LEADER_KEY = "<instance id>|<term>" with a PX TTL, taken
+    with SET NX. The term comes from INCR on TERM_KEY, so every new term is
+    strictly larger than the previous one.
+  - the leader renews every lease/3 seconds with a compare-and-PEXPIRE; a
+    renewal that fails (lease lost or storage unreachable past the local
+    deadline) demotes the worker at once. Followers retry SET NX on the same
+    interval, so failover takes at most one lease period.
+  - leader_only() wraps scheduled jobs: before running it re-reads the lease
+    and skips unless it still names this worker's term, which covers a worker
+    that paused past its own lease.
+
+This is not fencing: a worker can still lose the lease between the check and
+its job. That is acceptable because scheduled jobs only enqueue work under
+idempotency keys (services/job_queue.py), so a stale leader at worst queues a
+job that is deduplicated, and the captures themselves run on any worker.
+
+With STORAGE_BACKEND=memory every process has its own store and therefore
+elects itself; use upstash (or sqlite on one host) for real coordination.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from config import settings
+from services.metrics import scheduler_runs
+from services.storage import StorageError, get_storage
+from services.tracing import span
+
+LEADER_KEY = "scheduler:leader"
+TERM_KEY = "scheduler:leader:term"
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+class LeaderElector:
+    def __init__(self, lease_seconds: int, renew_seconds: int):
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.renew_seconds = renew_seconds
+        self.term: int | None = None
+        self.leader: str | None = None  # lease value last observed
+        self.elected_at_ist: str | None = None
+        self._lease_deadline = 0.0  # monotonic; leadership is void after this
+        self._on_elected: list[Callable[[], Awaitable | None]] = []
+        self._stats = {"terms": 0, "renewals": 0, "lost": 0, "skipped_jobs": 0, "errors": 0}
+
+    @property
+    def lease_value(self) -> str | None:
+        return f"{self.instance_id}|{self.term}" if self.term is not None else None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.term is not None and time.monotonic() < self._lease_deadline
+
+    def on_elected(self, callback: Callable[[], Awaitable | None]) -> None:
+        """Run callback each time this worker becomes leader (e.g. catch-up backfills)."""
+        self._on_elected.append(callback)
+
+    async def campaign_once(self) -> bool:
+        """One election round: renew if leading, otherwise try to take a free lease."""
+        storage = get_storage()
+        ttl_ms = self.lease_seconds * 1000
+        started = time.monotonic()
+        try:
+            if self.term is not None:
+                if await storage.acompare_and_pexpire(LEADER_KEY, self.lease_value, ttl_ms):
+                    self._lease_deadline = started + self.lease_seconds
+                    self._stats["renewals"] += 1
+                    return True
+                self._step_down("lease taken over")
+                self.leader = await storage.aget(LEADER_KEY)
+                return False
+
+            self.leader = await storage.aget(LEADER_KEY)
+            if self.leader is not None:
+                return False
+            token = await storage.aincr(TERM_KEY)
+            value = f"{self.instance_id}|{token}"
+            if not await storage.aset_if_absent(LEADER_KEY, value, ttl_ms):
+                self.leader = await storage.aget(LEADER_KEY)
+                return False
+        except StorageError as exc:
+            self._stats["errors"] += 1
+            print(f"[LEADER] storage error: {exc}")
+            if self.term is not None and not self.is_leader:
+                self._step_down("lease deadline passed without renewal")
+            return self.is_leader
+
+        self.term = token
+        self.leader = value
+        self._lease_deadline = started + self.lease_seconds
+        self.elected_at_ist = datetime.now(IST).isoformat()
+        self._stats["terms"] += 1
+        print(f"[LEADER] elected {self.instance_id} term={token}")
+        for callback in self._on_elected:
+            result = callback()
+            if asyncio.iscoroutine(result):
+                await result
+        return True
+
+    def _step_down(self, reason: str) -> None:
+        print(f"[LEADER] {self.instance_id} stepped down (term {self.term}): {reason}")
+        self.term = None
+        self._lease_deadline = 0.0
+        self._stats["lost"] += 1
+
+    async def holds_lease(self) -> bool:
+        """Lease check: does storage still name this worker's current term?"""
+        if not self.is_leader:
+            return False
+        try:
+            current = await get_storage().aget(LEADER_KEY)
+        except StorageError:
+            return self.is_leader  # storage blip: trust the unexpired local lease
+        if current != self.lease_value:
+            self._step_down(f"lease now held by {current}")
+            return False
+        return True
+
+    async def run(self) -> None:
+        """Background loop: campaign every renew_seconds until cancelled."""
+        while True:
+            try:
+                await self.campaign_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # Includes on_elected callbacks; the loop must outlive any one round.
+                self._stats["errors"] += 1
+                print(f"[LEADER] campaign error: {type(exc).__name__}: {exc}")
+            await asyncio.sleep(self.renew_seconds)
+
+    async def release(self) -> None:
+        """Give up the lease on shutdown so a follower takes over without waiting for expiry."""
+        if self.term is None:
+            return
+        value = self.lease_value
+        self.term = None
+        self._lease_deadline = 0.0
+        try:
+            await get_storage().acompare_and_delete(LEADER_KEY, value)
+            print(f"[LEADER] {self.instance_id} released lease")
+        except StorageError as exc:
+            print(f"[LEADER] release failed: {exc}")
+
+    def note_skipped(self, job_name: str) -> None:
+        self._stats["skipped_jobs"] += 1
+        print(f"[LEADER] skipped {job_name}: follower (leader={self.status()['leader']})")
+
+    def status(self) -> dict:
+        return {
+            "enabled": settings.scheduler_leader_election,
+            "instance_id": self.instance_id,
+            "is_leader": self.is_leader,
+            "leader": (self.leader or "").split("|")[0] or None,
+            "term": self.term,
+            "elected_at_ist": self.elected_at_ist if self.is_leader else None,
+            "lease_seconds": self.lease_seconds,
+            **self._stats,
+        }
+
+
+elector = LeaderElector(
+    lease_seconds=settings.scheduler_lease_seconds,
+    renew_seconds=max(1, settings.scheduler_lease_seconds // 3),
+)
+
+
+def leader_only(job: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """Wrap a scheduled job so it runs only on the worker holding the lease."""
+
+    @functools.wraps(job)
+    async def guarded(*args, **kwargs):
+        if settings.scheduler_leader_election and not await elector.holds_lease():
+            elector.note_skipped(job.__name__)
+            scheduler_runs.inc(job.__name__, "skipped")
+            return None
+        try:
+            with span(f"scheduler.{job.__name__}", root=True, term=elector.term):
+                result = await job(*args, **kwargs)
+        except Exception:
+            scheduler_runs.inc(job.__name__, "error")
+            raise
+        scheduler_runs.inc(job.__name__, "ran")
+        return result
+
+    return guarded
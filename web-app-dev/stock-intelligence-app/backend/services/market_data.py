@@ -8,15 +8,25 @@ Render free-tier deploys do not install tvDatafeed, so yfinance is the active
 production market-data source.
 """
 
+from __future__ import annotations
+
 import asyncio
+import contextvars
 import logging
+import time as time_mod
 
-import numpy as np
-import pandas as pd
 import pytz
-import yfinance as yf
 from datetime import date as date_cls, datetime, time, timezone
 
+from services.lazy_imports import lazy_module
+from services.metrics import track_upstream
+from services.tracing import span
+
+# Heavy; imported on first use (see services/lazy_imports.py).
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+yf = lazy_module("yfinance")
+
 logger = logging.getLogger(__name__)
 
 NSE_HOLIDAYS_2026 = {
@@ -120,7 +130,8 @@ def _tv_fetch_sync(symbol: str, exchange: str, interval: str, n_bars: int) -> pd
     try:
         from tvDatafeed import Interval as TvInterval
         tv_interval = getattr(TvInterval, TV_INTERVAL_ATTR.get(interval, "in_5_minute"))
-        df = tv.get_hist(symbol=symbol, exchange=exchange, interval=tv_interval, n_bars=n_bars)
+        with track_upstream("tradingview"):
+            df = tv.get_hist(symbol=symbol, exchange=exchange, interval=tv_interval, n_bars=n_bars)
         if df is None or df.empty:
             return pd.DataFrame()
         df = df.rename(columns={"open": "Open", "high": "High",
@@ -135,35 +146,55 @@ def _tv_fetch_sync(symbol: str, exchange: str, interval: str, n_bars: int) -> pd
 # ── Data Fetching ──────────────────────────────────────────
 
 
+def _yf_history_sync(symbol: str, interval: str, period: str) -> pd.DataFrame:
+    with track_upstream("yfinance"):
+        return yf.Ticker(symbol).history(
+            period=period,
+            interval=interval,
+            auto_adjust=False,
+            actions=False,
+            prepost=False,
+        )
+
+
 async def fetch_intraday(
     symbol: str = "^NSEI", interval: str = "15m", period: str = "5d"
 ) -> pd.DataFrame:
     """
     Download intraday data. Tries TradingView first (more reliable for NSE/BSE),
     falls back to yfinance if tvDatafeed is unavailable or returns no data.
+    Inside a pre-warmed capture (serve_staged_frames) staged frames are served.
     """
+    with span("fetch_intraday", symbol=symbol, interval=interval) as s:
+        if _serve_staged.get() and STAGE_PERIODS.get(interval) == period and (symbol, interval) in _frame_stage:
+            staged = await _staged_frame(symbol, interval)
+            if staged is not None:
+                s.set(source="stage", bars=len(staged))
+                return staged
+        return await _fetch_intraday(symbol, interval, period, s)
+
+
+async def _fetch_intraday(symbol: str, interval: str, period: str, s) -> pd.DataFrame:
     # ── 1. Try TradingView ────────────────────────────────────────
     if (tv_info := _resolve_tv_info(symbol)) and interval in TV_INTERVAL_ATTR:
         tv_symbol, tv_exchange = tv_info
         n_bars = TV_N_BARS.get(interval, 100)
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         df_tv = await loop.run_in_executor(
             None, _tv_fetch_sync, tv_symbol, tv_exchange, interval, n_bars
         )
         if not df_tv.empty:
             logger.info("TradingView data OK: %s %s (%d bars)", symbol, interval, len(df_tv))
+            s.set(source="tradingview", bars=len(df_tv))
             return df_tv
         logger.warning("TradingView empty for %s %s, trying yfinance fallback", symbol, interval)
+        s.set(tradingview_empty=True)
 
     # ── 2. Fallback: yfinance ───────────────────────────────────
-    ticker = yf.Ticker(symbol)
-    df = ticker.history(
-        period=period,
-        interval=interval,
-        auto_adjust=False,
-        actions=False,
-        prepost=False,
-    )
+    # Off the event loop so startup backfills don't stall request handling.
+    s.set(source="yfinance")
+    loop = asyncio.get_running_loop()
+    df = await loop.run_in_executor(None, _yf_history_sync, symbol, interval, period)
     if df.empty:
         raise ValueError(f"No data for '{symbol}' at {interval} from TV or yfinance.")
     if isinstance(df.columns, pd.MultiIndex):
@@ -172,6 +203,7 @@ async def fetch_intraday(
     for col in required:
         if col not in df.columns:
             raise ValueError(f"Missing column '{col}' in yfinance data.")
+    s.set(bars=len(df))
     return _optimize_ohlcv_frame(df[required])
 
 
@@ -291,6 +323,154 @@ async def fetch_multi_timeframe_at_time(
     return frames
 
 
+# ── Pre-warm frame stage ───────────────────────────────────
+# services/prewarm.py stages each symbol's full frames shortly before a
+# scheduled capture. At the boundary one 1m fetch per symbol (today's bars)
+# rolls every staged interval forward: the 1m frame is merged, coarser frames
+# have their last (in-progress) bar and anything after it rebuilt from the 1m
+# bars. fetch_intraday serves staged frames while they are fresh, but only to
+# the capture that pre-warmed them (serve_staged_frames) and only for the
+# staged period; every other caller fetches as before.
+
+STAGE_PERIODS: dict[str, str] = {"1m": "7d", "5m": "5d", "15m": "5d", "1h": "5d"}
+FRAME_STAGE_MAX_AGE_SECONDS = 900   # staged history older than this is refetched in full
+FRAME_STAGE_REUSE_SECONDS = 10      # a refresh this recent is served without a fetch
+STAGE_TAIL_PERIOD = "1d"
+_RESAMPLE_RULES = {"5m": "5min", "15m": "15min", "1h": "60min"}
+_OHLCV_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+# (symbol, interval) -> {"frame", "staged_at", "refreshed_at"}
+_frame_stage: dict[tuple[str, str], dict] = {}
+_refresh_locks: dict[str, asyncio.Lock] = {}
+# True in a capture job after its pre-warm (job_handlers); see serve_staged_frames().
+_serve_staged: contextvars.ContextVar[bool] = contextvars.ContextVar("serve_staged", default=False)
+
+
+def serve_staged_frames() -> None:
+    """Let fetch_intraday serve staged frames for the rest of the current task (and tasks it starts)."""
+    _serve_staged.set(True)
+
+
+def _stage_entries(symbol: str) -> dict[str, dict]:
+    now = time_mod.time()
+    entries = {}
+    for (sym, interval), entry in list(_frame_stage.items()):
+        if sym != symbol:
+            continue
+        if now - entry["staged_at"] > FRAME_STAGE_MAX_AGE_SECONDS:
+            _frame_stage.pop((sym, interval), None)
+            continue
+        entries[interval] = entry
+    return entries
+
+
+async def stage_frames(symbols_intervals: dict[str, set[str] | list[str]]) -> dict:
+    """Fetch full frames for {symbol: intervals} into the stage, all concurrently."""
+
+    async def stage(symbol: str, interval: str) -> None:
+        with span("fetch_intraday", symbol=symbol, interval=interval, staging=True) as s:
+            df = await _fetch_intraday(symbol, interval, STAGE_PERIODS.get(interval, "5d"), s)
+        now = time_mod.time()
+        _frame_stage[(symbol, interval)] = {"frame": df, "staged_at": now, "refreshed_at": now}
+
+    pairs = [(sym, interval) for sym, intervals in symbols_intervals.items() for interval in intervals]
+    results = await asyncio.gather(*(stage(sym, interval) for sym, interval in pairs), return_exceptions=True)
+    failed = [f"{sym}:{interval}" for (sym, interval), res in zip(pairs, results) if isinstance(res, Exception)]
+    return {"staged": len(pairs) - len(failed), "failed": failed}
+
+
+def _merge_tail(base: pd.DataFrame, tail: pd.DataFrame) -> pd.DataFrame | None:
+    if tail.empty:
+        return base
+    if base.empty or (base.index.tz is None) != (tail.index.tz is None):
+        return None
+    if base.index.tz is not None:
+        tail = tail.tz_convert(base.index.tz)
+    merged = pd.concat([base, tail[base.columns]])
+    return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+
+def _roll_forward(base: pd.DataFrame, minute: pd.DataFrame, interval: str) -> pd.DataFrame | None:
+    """Bring a staged frame up to date from 1m bars; None when the 1m bars cannot cover it."""
+    if interval == "1m":
+        return _merge_tail(base, minute)
+    rule = _RESAMPLE_RULES.get(interval)
+    if rule is None or base.empty:
+        return None
+    if minute.empty:
+        return base
+    if (base.index.tz is None) != (minute.index.tz is None):
+        return None
+    if base.index.tz is not None:
+        minute = minute.tz_convert(base.index.tz)
+
+    cut = base.index[-1]
+    if minute.index[0] <= cut:
+        # Rebuild the staged (possibly in-progress) last bar and everything after it.
+        kept, source, origin = base[base.index < cut], minute[minute.index >= cut], cut
+    elif minute.index[0].date() > cut.date():
+        # A new session since staging: bars align to its first minute (session open).
+        kept, source, origin = base, minute, minute.index[0]
+    else:
+        return None
+    bars = source.resample(rule, origin=origin).agg(_OHLCV_AGG).dropna()
+    return pd.concat([kept, bars[base.columns]])
+
+
+async def refresh_staged_frames(symbol: str, force: bool = False) -> int:
+    """The final incremental fetch: roll one symbol's staged frames forward. Returns frames refreshed."""
+    lock = _refresh_locks.setdefault(symbol, asyncio.Lock())
+    async with lock:
+        entries = _stage_entries(symbol)
+        if not entries:
+            return 0
+        now = time_mod.time()
+        if not force and all(now - e["refreshed_at"] <= FRAME_STAGE_REUSE_SECONDS for e in entries.values()):
+            return 0
+
+        with span("refresh_stage", symbol=symbol, intervals=sorted(entries)) as s:
+            try:
+                minute = await _fetch_intraday(symbol, "1m", STAGE_TAIL_PERIOD, s)
+            except ValueError:
+                minute = pd.DataFrame()
+            refreshed = 0
+            for interval, entry in entries.items():
+                frame = _roll_forward(entry["frame"], minute, interval) if not minute.empty else None
+                if frame is None:
+                    # 1m bars missing or not covering the staged bar: tail-fetch this interval.
+                    try:
+                        tail = await _fetch_intraday(symbol, interval, STAGE_TAIL_PERIOD, s)
+                    except ValueError:
+                        _frame_stage.pop((symbol, interval), None)
+                        continue
+                    frame = _merge_tail(entry["frame"], tail)
+                if frame is None:
+                    _frame_stage.pop((symbol, interval), None)
+                    continue
+                entry.update(frame=frame, refreshed_at=time_mod.time())
+                refreshed += 1
+            s.set(refreshed=refreshed, minute_bars=len(minute))
+        return refreshed
+
+
+async def _staged_frame(symbol: str, interval: str) -> pd.DataFrame | None:
+    await refresh_staged_frames(symbol)
+    entry = _frame_stage.get((symbol, interval))
+    if entry is None or time_mod.time() - entry["refreshed_at"] > FRAME_STAGE_REUSE_SECONDS:
+        return None
+    # Callers re-index and slice frames in place; the stage keeps its own copy.
+    return entry["frame"].copy()
+
+
+def frame_stage_stats() -> dict:
+    now = time_mod.time()
+    return {
+        "frames": len(_frame_stage),
+        "symbols": sorted({sym for sym, _ in _frame_stage}),
+        "oldest_seconds": round(max((now - e["staged_at"] for e in _frame_stage.values()), default=0.0), 1),
+    }
+
+
 # ── Indicator Calculations ─────────────────────────────────
 
 
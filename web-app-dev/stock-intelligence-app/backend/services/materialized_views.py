@@ -0,0 +1,75 @@
+"""
+Materialized dashboard responses.
+
+Right after a scheduled capture, the final JSON body of the polled endpoints
+(/ai-decision, /checkpoints, /expiry-zero-hero) is rendered once per
+(endpoint, symbol) and stored with the window in which it is valid. A GET
+inside that window is a single key read (usually an L1 hit) plus a byte copy;
+outside it, the endpoint falls back to its normal build path.
+
+Windows are cut at every boundary where a response field would change (next
+snapshot / checkpoint slot, market close, next open), so the body is constant
+inside its window and nothing has to be patched per request.
+
+Stored value: "<valid_from_epoch> <valid_until_epoch>\\n<json body>".
+Keys include the build label so a deploy never serves another build's body.
+Endpoints with a lite projection also get a precomputed view=lite body.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import datetime
+
+from config import settings
+from services.ai_decision import cache_get, cache_set
+from services.projection import lite_projection
+from services.snapshot_cache import snapshot_cache
+from services.value_codec import dumps_json
+
+MATERIALIZED_PREFIX = "materialized:"
+snapshot_cache.track_prefix(MATERIALIZED_PREFIX)
+
+
+def view_key(endpoint: str, subject: str, view: str = "full") -> str:
+    variant = endpoint if view == "full" else f"{endpoint}:{view}"
+    return f"{MATERIALIZED_PREFIX}{settings.build_label}:{variant}:{subject}"
+
+
+def store_view(
+    endpoint: str,
+    subject: str,
+    payload: dict,
+    valid_from: datetime,
+    valid_until: datetime,
+) -> bool:
+    """Render payload and store it for [valid_from, valid_until). Returns False if the window is empty."""
+    start, end = valid_from.timestamp(), valid_until.timestamp()
+    if end <= max(start, time.time()):
+        return False
+    ttl = int(end - time.time()) + 60
+    variants = {"full": payload}
+    lite = lite_projection(endpoint, payload)
+    if lite is not None:
+        variants["lite"] = lite
+    for view, body in variants.items():
+        cache_set(view_key(endpoint, subject, view), f"{start:.0f} {end:.0f}\n{dumps_json(body).decode('utf-8')}", ttl)
+    return True
+
+
+def load_view(endpoint: str, subject: str, now: float | None = None, view: str = "full") -> bytes | None:
+    """Stored body if one is valid right now, else None."""
+    stored = cache_get(view_key(endpoint, subject, view))
+    if not stored:
+        return None
+    header, sep, body = stored.partition("\n")
+    if not sep:
+        return None
+    try:
+        start, end = (float(part) for part in header.split(" ", 1))
+    except ValueError:
+        return None
+    now = time.time() if now is None else now
+    if not (start <= now < end):
+        return None
+    return body.encode("utf-8")
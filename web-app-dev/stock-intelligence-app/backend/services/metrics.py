@@ -0,0 +1,226 @@
+"""
+In-process Prometheus metrics, rendered by GET /metrics.
+
+A deliberately small registry (counters and fixed-bucket histograms keyed by
+label tuples) instead of the prometheus_client dependency: an observation is
+one bisect plus a few integer adds under a per-metric lock, which stays well
+under a microsecond on the request path and is safe from executor threads
+(yfinance / TradingView fetches run there).
+
+    with track_upstream("yfinance"):
+        df = ticker.history(...)
+
+    record_cache("analyze_v2:^NSEI:...", "hit", "l1")
+
+Series:
+  http_request_duration_seconds{method,route,status}   route = path template
+  upstream_request_duration_seconds{upstream,outcome}  yfinance, tradingview,
+      upstash, gemini, rss, nse, bse, supabase; outcome ok | error
+  cache_requests_total{prefix,result,tier}             prefix = key up to ":"
+  job_duration_seconds{kind,outcome}                   queued job attempts
+  scheduler_runs_total{job,outcome}                    leader_only ticks
+  scheduled_run_start_lag_seconds{job}                 live run start - slot time
+
+Values are per process; with several uvicorn workers each scrape sees the
+worker that answered it (label `instance` at scrape time, as usual).
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPSTREAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 900.0)
+LAG_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+_registry: list[_Metric] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total!r}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+# ── Series ────────────────────────────────────────────────────────────────────
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+upstream_request_duration = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to external services.",
+    ("upstream", "outcome"),
+    buckets=UPSTREAM_BUCKETS,
+)
+cache_requests = Counter(
+    "cache_requests_total",
+    "cache_get lookups by key prefix, result and the tier that answered.",
+    ("prefix", "result", "tier"),
+)
+job_duration = Histogram(
+    "job_duration_seconds",
+    "Queued job attempt duration by kind and outcome.",
+    ("kind", "outcome"),
+    buckets=JOB_BUCKETS,
+)
+scheduler_runs = Counter(
+    "scheduler_runs_total",
+    "Scheduled job ticks by outcome (ran, skipped on a follower, error).",
+    ("job", "outcome"),
+)
+scheduled_start_lag = Histogram(
+    "scheduled_run_start_lag_seconds",
+    "Delay between a scheduled slot time and the start of its live run (run ledger).",
+    ("job",),
+    buckets=LAG_BUCKETS,
+)
+
+
+@contextmanager
+def track_upstream(upstream: str):
+    """Time a call to an external service; an exception marks it outcome="error"."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        upstream_request_duration.observe(time.perf_counter() - started, upstream, outcome)
+
+
+def cache_prefix(key: str) -> str:
+    head, sep, _ = key.partition(":")
+    return head + sep if sep else "other"
+
+
+def record_cache(key: str, result: str, tier: str) -> None:
+    cache_requests.inc(cache_prefix(key), result, tier)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request by its route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # Unmatched paths collapse into one series to keep cardinality bounded.
+            template = getattr(route, "path", None) or "<unmatched>"
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], template, str(status))
@@ -0,0 +1,141 @@
+"""
+Pre-warm stage run shortly before each scheduled capture.
+
+At 09:15, 10:00, 14:30 and 15:30 the capture used to start cold: heavy
+imports, TLS handshakes to Upstash / Gemini / Yahoo, full 5-7 day frame
+downloads and the RSS news sweep all happened after the labelled time.
+PREWARM_LEAD_SECONDS before each slot, main.py queues the capture job itself
+with prewarm=True. Its first phase (prewarm_then_wait) runs in the worker that
+will run the capture, since staged frames and open connections are per
+process, but off the worker's concurrency slot (job_queue.off_slot):
+
+  - preloads the heavy modules and starts the CPU pool,
+  - opens the Upstash and Gemini connections (kept alive until the slot),
+  - stages every symbol's full frames (market_data.stage_frames),
+  - collects headlines into the news cache bucket the slot will read.
+
+The job then sleeps until the boundary, takes a slot back, and the capture
+calls boundary_refresh(): one concurrent 1m fetch per symbol rolls all staged
+frames forward to the latest bar, and the per-symbol fetch_multi_timeframe
+calls that follow are served from memory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from config import settings
+from services.ai_decision import prewarm_market_news, warm_gemini_connection
+from services.cpu_pool import cpu_pool
+from services.lazy_imports import preload
+from services.market_data import frame_stage_stats, refresh_staged_frames, stage_frames
+from services.storage import get_storage
+from services.tracing import span
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+_last_run: dict | None = None
+
+
+def boundary_time(slot: str, now: datetime | None = None) -> datetime:
+    """Today's IST datetime for an "HHMM" slot."""
+    today = (now or datetime.now(timezone.utc)).astimezone(IST)
+    return today.replace(hour=int(slot[:2]), minute=int(slot[2:]), second=0, microsecond=0)
+
+
+async def _connect_storage() -> str:
+    storage = get_storage()
+    await storage.acall("PING")
+    # cache_get reads through the sync client; open that connection too.
+    await asyncio.to_thread(storage.pipeline, [["PING"]])
+    return storage.name
+
+
+async def _step(name: str, coro, steps: dict) -> None:
+    started = time.perf_counter()
+    try:
+        with span(f"prewarm.{name}"):
+            result = await coro
+        steps[name] = {"ok": True, "seconds": round(time.perf_counter() - started, 3)}
+        if isinstance(result, dict) and result.get("failed"):
+            steps[name]["failed"] = result["failed"]
+    except Exception as exc:
+        steps[name] = {
+            "ok": False,
+            "seconds": round(time.perf_counter() - started, 3),
+            "error": f"{type(exc).__name__}: {exc}"[:200],
+        }
+
+
+async def run_prewarm(slot: str, frames: dict[str, set[str]], news: bool) -> dict:
+    """
+    Stage everything a capture at `slot` needs; frames maps symbol -> intervals.
+    Stops at the boundary so it never delays the capture it prepares for.
+    """
+    global _last_run
+    boundary = boundary_time(slot)
+    remaining = (boundary - datetime.now(IST)).total_seconds()
+    if remaining <= 1:
+        return {"status": "skipped", "slot": slot, "reason": "boundary_passed"}
+
+    steps: dict[str, dict] = {}
+    tasks = [
+        _step("imports", asyncio.to_thread(preload), steps),
+        _step("storage", _connect_storage(), steps),
+        _step("frames", stage_frames(frames), steps),
+    ]
+    if cpu_pool.enabled:
+        tasks.append(_step("cpu_pool", cpu_pool.start(), steps))
+    if settings.gemini_api_key:
+        tasks.append(_step("gemini", warm_gemini_connection(), steps))
+    if news:
+        tasks.append(_step("news", prewarm_market_news(boundary), steps))
+
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=remaining - 1)
+    except asyncio.TimeoutError:
+        status = "timeout"
+
+    _last_run = {
+        "slot": slot,
+        "status": status,
+        "finished_at": datetime.now(IST).isoformat(),
+        "seconds": round(time.perf_counter() - started, 3),
+        "lead_seconds": round(remaining, 1),
+        "steps": steps,
+    }
+    print(f"[PREWARM] {slot} {status} in {_last_run['seconds']}s | {sorted(k for k, v in steps.items() if v['ok'])}")
+    return _last_run
+
+
+async def prewarm_then_wait(slot: str, frames: dict[str, set[str]], news: bool) -> dict:
+    """First phase of a capture queued ahead of its slot: stage, then sleep until the boundary."""
+    result = await run_prewarm(slot, frames, news)
+    remaining = (boundary_time(slot) - datetime.now(IST)).total_seconds()
+    if remaining > 0:
+        await asyncio.sleep(remaining)
+    return result
+
+
+async def boundary_refresh(symbols: list[str]) -> int:
+    """The final incremental bar fetch at the slot: roll every staged frame of `symbols` forward."""
+    with span("prewarm.boundary_refresh", symbols=len(symbols)) as s:
+        counts = await asyncio.gather(
+            *(refresh_staged_frames(sym, force=True) for sym in symbols),
+            return_exceptions=True,
+        )
+        refreshed = sum(c for c in counts if isinstance(c, int))
+        s.set(frames=refreshed)
+    return refreshed
+
+
+def prewarm_stats() -> dict:
+    return {
+        "lead_seconds": settings.prewarm_lead_seconds,
+        "last_run": _last_run,
+        "stage": frame_stage_stats(),
+    }
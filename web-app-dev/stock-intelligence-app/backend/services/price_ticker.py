@@ -0,0 +1,61 @@
+"""
+Price ticks for the /api/v1/stream push channel.
+
+Runs only while at least one client on this worker subscribes to "price" and
+the NSE session is open; otherwise it sleeps without touching the data
+providers. Ticks are published worker-locally (every worker with price
+subscribers runs its own ticker) and only when the last price changed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+from services.event_bus import broadcaster, publish_event
+from services.market_data import fetch_intraday, get_latest_price, is_indian_market_open
+
+PRICE_TICK_SECONDS = 15
+PRICE_IDLE_SECONDS = 5
+PRICE_TICK_DEFAULT_SYMBOLS = ("^NSEI", "^NSEBANK", "^BSESN")
+PRICE_TICK_MAX_SYMBOLS = 8
+
+_last_prices: dict[str, float] = {}
+
+
+async def _tick_once(symbols: list[str]) -> None:
+    for sym in symbols:
+        try:
+            df = await fetch_intraday(sym, interval="1m", period="1d")
+            price = get_latest_price(df)
+        except Exception as exc:
+            print(f"[PRICE-TICK] {sym} fetch failed: {exc}")
+            continue
+        previous = _last_prices.get(sym)
+        if previous == price:
+            continue
+        _last_prices[sym] = price
+        change_pct = round((price - previous) / previous * 100.0, 3) if previous else None
+        await publish_event("price", {"symbol": sym, "price": price, "change_pct": change_pct}, local_only=True)
+
+
+async def run_price_ticker() -> None:
+    """Long-running task: poll latest prices on behalf of subscribed clients."""
+    while True:
+        try:
+            if not broadcaster.subscriber_count("price"):
+                _last_prices.clear()
+                await asyncio.sleep(PRICE_IDLE_SECONDS)
+                continue
+            is_open, _ = is_indian_market_open(datetime.now(timezone.utc))
+            if not is_open:
+                await asyncio.sleep(PRICE_TICK_SECONDS)
+                continue
+            wanted = broadcaster.subscribed_symbols("price")
+            symbols = sorted(wanted) if wanted is not None else list(PRICE_TICK_DEFAULT_SYMBOLS)
+            await _tick_once(symbols[:PRICE_TICK_MAX_SYMBOLS])
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            print(f"[PRICE-TICK] error: {exc}")
+        await asyncio.sleep(PRICE_TICK_SECONDS)
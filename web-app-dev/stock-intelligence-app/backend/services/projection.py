@@ -0,0 +1,105 @@
+"""
+Response projection: view=lite|full and sparse fieldsets (fields=).
+
+Paths are dotted; "*" matches every list item or dict key, e.g.
+  panels.*.data.steps_detail     (every checkpoint panel's step detail)
+  forecast.reasons
+
+  view=lite   drops LITE_OMIT[endpoint] (blocks most UI views never read)
+  fields=a,b  keeps only the listed paths (applied after the view)
+
+Projections copy only along the paths they touch, so cached payloads are
+never mutated. Lite bodies for materialized endpoints are precomputed at
+capture time (see materialized_views.store_view).
+"""
+
+from __future__ import annotations
+
+import re
+
+from fastapi import HTTPException
+
+VIEWS = ("full", "lite")
+MAX_FIELDS = 32
+
+LITE_OMIT: dict[str, tuple[str, ...]] = {
+    "advanced-analyze": ("steps_detail",),
+    "checkpoints": ("panels.*.data.steps_detail", "panels.*.data.forecast.reasons"),
+    "ai-decision": ("reasoning", "news_items", "news_tomorrow"),
+}
+
+_FIELD_RE = re.compile(r"^[A-Za-z0-9_*]+(\.[A-Za-z0-9_*]+)*$")
+
+
+def parse_fields(fields: str | None) -> tuple[tuple[str, ...], ...] | None:
+    """Split a fields= query value into path tuples; HTTP 400 on malformed input."""
+    if fields is None or not fields.strip():
+        return None
+    paths = [part.strip() for part in fields.split(",") if part.strip()]
+    if len(paths) > MAX_FIELDS or not all(_FIELD_RE.match(path) for path in paths):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid fields. Use up to {MAX_FIELDS} comma-separated dotted paths (letters, digits, _, *).",
+        )
+    return tuple(tuple(path.split(".")) for path in paths)
+
+
+def check_view(view: str) -> str:
+    if view not in VIEWS:
+        raise HTTPException(status_code=400, detail=f"Invalid view. Use one of: {list(VIEWS)}")
+    return view
+
+
+def _omit(obj, parts: tuple[str, ...]):
+    head, rest = parts[0], parts[1:]
+    if isinstance(obj, dict):
+        keys = list(obj) if head == "*" else ([head] if head in obj else [])
+        if not keys:
+            return obj
+        out = dict(obj)
+        for key in keys:
+            if rest:
+                out[key] = _omit(obj[key], rest)
+            else:
+                del out[key]
+        return out
+    if isinstance(obj, list) and head == "*":
+        return [_omit(item, rest) for item in obj] if rest else []
+    return obj
+
+
+def _select(obj, paths: list[tuple[str, ...]]):
+    if any(not path for path in paths):
+        return obj
+    if isinstance(obj, list):
+        item_paths = [path[1:] for path in paths if path[0] == "*"]
+        return [_select(item, item_paths) for item in obj] if item_paths else []
+    if not isinstance(obj, dict):
+        return obj
+    grouped: dict[str, list[tuple[str, ...]]] = {}
+    for path in paths:
+        for key in (obj if path[0] == "*" else (path[0],)):
+            grouped.setdefault(key, []).append(path[1:])
+    return {key: _select(obj[key], sub) for key, sub in grouped.items() if key in obj}
+
+
+def lite_projection(endpoint: str, payload: dict) -> dict | None:
+    """Lite variant of payload, or None when endpoint has no lite view."""
+    omit = LITE_OMIT.get(endpoint)
+    if not omit:
+        return None
+    for path in omit:
+        payload = _omit(payload, tuple(path.split(".")))
+    return payload
+
+
+def project(endpoint: str, payload: dict, view: str = "full", fields: tuple[tuple[str, ...], ...] | None = None) -> dict:
+    if view == "lite":
+        payload = lite_projection(endpoint, payload) or payload
+    if fields:
+        payload = _select(payload, list(fields))
+    return payload
+
+
+def is_projected(view: str, fields) -> bool:
+    return view != "full" or bool(fields)
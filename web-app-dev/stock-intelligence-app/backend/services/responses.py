@@ -0,0 +1,31 @@
+"""
+Fast JSON responses.
+
+FastAPI's default path for a returned dict/model is: validate against
+response_model, run jsonable_encoder over the whole tree, then json.dumps.
+Handlers on hot paths instead return one of these Response objects, which
+FastAPI sends as-is; response_model= stays on the route so the OpenAPI
+schema is unchanged.
+
+  FastJSONResponse(obj)   serialize once with dumps_json (orjson if installed)
+  raw_json_response(b)    pre-encoded JSON bytes/text (cache hits), no parsing
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+
+from services.value_codec import dumps_json
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+def raw_json_response(body: bytes | str, status_code: int = 200) -> Response:
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return Response(content=body, status_code=status_code, media_type="application/json")
@@ -0,0 +1,274 @@
+"""
+Persistent ledger of scheduled job runs.
+
+Every checkpoint capture, AI snapshot, EOD outlook and career pulse run writes
+one record for its (date, job, slot), where slot is the scheduled IST time
+("0930", "1530", ...):
+
+    run = start_run("checkpoint", checkpoint_id, date_str, mode="live")
+    ...
+    await run.finish(saved=summary["saved_symbols"], failed=summary["failed_symbols"])
+
+Storage layout:
+  ledger:run:<date>:<job>:<slot>   JSON run record, kept LEDGER_TTL_SECONDS
+
+A record holds the scheduled time, first start, start lag, duration, outcome
+(ok | partial | failed), mode (live | backfill), the symbols saved and failed,
+the attempt count, the start lag of the first live attempt and the last few
+attempts. Keys are derived from the schedule, so a day's expected runs are
+read with one MGET: catch-up code asks the ledger which slots already
+succeeded instead of probing cache keys symbol by symbol, and run_report()
+turns the same reads into drift and missed-run statistics
+(GET /api/v1/scheduler/runs). Ledger writes never fail a run.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from services.metrics import scheduled_start_lag
+from services.storage import StorageError, get_storage
+from services.value_codec import dumps_json, loads_json
+
+LEDGER_KEY_PREFIX = "ledger:run:"
+LEDGER_TTL_SECONDS = 14 * 86400
+LEDGER_HISTORY = 5
+
+# A live run starting later than this after its slot counts as late.
+LATE_AFTER_SECONDS = 60
+# A slot with no record this long after its scheduled time counts as missed.
+MISSED_AFTER_SECONDS = 900
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# job -> (slots, trading_days_only); filled by expect_runs() next to the cron jobs.
+EXPECTED_RUNS: dict[str, tuple[list[str], bool]] = {}
+
+# Recent writes in this process, for /health (no storage I/O there).
+_recent: deque[dict] = deque(maxlen=20)
+
+
+def expect_runs(job: str, slots: list[str], trading_days_only: bool = True) -> None:
+    """Declare the slots a job is scheduled for, so missing records count as missed."""
+    EXPECTED_RUNS[job] = (list(slots), trading_days_only)
+
+
+def _ledger_key(date_str: str, job: str, slot: str) -> str:
+    return f"{LEDGER_KEY_PREFIX}{date_str}:{job}:{slot}"
+
+
+def scheduled_at(date_str: str, slot: str) -> datetime:
+    day = datetime.strptime(date_str, "%Y-%m-%d")
+    return day.replace(hour=int(slot[:2]), minute=int(slot[2:]), tzinfo=IST)
+
+
+def _outcome(saved: list[str], failed: list[str]) -> str:
+    if not failed:
+        return "ok"
+    return "partial" if saved else "failed"
+
+
+class LedgerRun:
+    """One attempt at a scheduled slot; finish() writes it to the ledger."""
+
+    def __init__(self, job: str, slot: str, date_str: str, mode: str):
+        self.job = job
+        self.slot = slot
+        self.date_str = date_str
+        self.mode = mode
+        self.started_at = datetime.now(IST)
+        self._t0 = time.perf_counter()
+
+    async def finish(
+        self,
+        saved: list[str] | tuple = (),
+        failed: list[str] | tuple = (),
+        outcome: str | None = None,
+    ) -> dict | None:
+        failed = list(failed)
+        attempt = {
+            "started_at": self.started_at.isoformat(),
+            "start_lag_seconds": round((self.started_at - scheduled_at(self.date_str, self.slot)).total_seconds(), 3),
+            "duration_seconds": round(time.perf_counter() - self._t0, 3),
+            "mode": self.mode,
+        }
+        if self.mode == "live":
+            scheduled_start_lag.observe(max(0.0, attempt["start_lag_seconds"]), self.job)
+
+        key = _ledger_key(self.date_str, self.job, self.slot)
+        storage = get_storage()
+        try:
+            raw = await storage.aget(key)
+            previous = loads_json(raw) if raw else {}
+            # A retry may cover only the symbols that failed before; keep the earlier saves.
+            kept = [sym for sym in previous.get("saved_symbols", []) if sym not in failed and sym not in saved]
+            saved = kept + list(saved)
+            attempt["outcome"] = outcome or _outcome(saved, failed)
+            first_live_lag = _first_live_lag(previous)
+            if first_live_lag is None and self.mode == "live":
+                first_live_lag = attempt["start_lag_seconds"]
+            entry = {
+                "job": self.job,
+                "slot": self.slot,
+                "date": self.date_str,
+                "scheduled_at_ist": scheduled_at(self.date_str, self.slot).isoformat(),
+                "first_started_at": previous.get("first_started_at", attempt["started_at"]),
+                **attempt,
+                "saved_symbols": saved,
+                "failed_symbols": failed,
+                "attempts": int(previous.get("attempts", 0)) + 1,
+                # Kept on the record: history drops the oldest attempts.
+                "first_live_start_lag_seconds": first_live_lag,
+                "history": [*previous.get("history", []), attempt][-LEDGER_HISTORY:],
+            }
+            await storage.aset(key, dumps_json(entry).decode("utf-8"), ttl_seconds=LEDGER_TTL_SECONDS)
+        except StorageError as exc:
+            print(f"[LEDGER] write failed {key}: {exc}")
+            return None
+
+        _recent.append({"job": self.job, "slot": self.slot, "date": self.date_str, **attempt})
+        return entry
+
+
+def _first_live_lag(entry: dict) -> float | None:
+    """Start lag of the first live attempt (from history for records written before the field)."""
+    if "first_live_start_lag_seconds" in entry:
+        return entry["first_live_start_lag_seconds"]
+    return next((a["start_lag_seconds"] for a in entry.get("history", []) if a.get("mode") == "live"), None)
+
+
+def start_run(job: str, slot: str, date_str: str, *, mode: str = "live") -> LedgerRun:
+    return LedgerRun(job, slot, date_str, mode)
+
+
+async def load_runs(date_str: str, job: str, slots: list[str]) -> dict[str, dict | None]:
+    """Ledger records of one job's slots on a date, in one MGET (None = no record)."""
+    raws = await get_storage().amget([_ledger_key(date_str, job, slot) for slot in slots])
+    return {slot: (loads_json(raw) if raw else None) for slot, raw in zip(slots, raws)}
+
+
+async def succeeded_slots(date_str: str, job: str, slots: list[str]) -> tuple[set[str], set[str]]:
+    """
+    (slots whose last attempt was ok, slots with no record at all).
+
+    Slots in neither set ran and failed or were partial: catch-up reruns them
+    without probing. Slots without a record predate the ledger or never ran;
+    callers fall back to probing the cache for those.
+    """
+    try:
+        runs = await load_runs(date_str, job, slots)
+    except StorageError as exc:
+        print(f"[LEDGER] read failed {date_str} {job}: {exc}")
+        return set(), set(slots)
+    ok = {slot for slot, entry in runs.items() if entry and entry.get("outcome") == "ok"}
+    unknown = {slot for slot, entry in runs.items() if entry is None}
+    return ok, unknown
+
+
+# ── Drift and missed-run statistics ───────────────────────────────────────────
+
+
+def _classify(entry: dict | None, due: datetime, now: datetime) -> str:
+    if entry is None:
+        return "missed" if now >= due + timedelta(seconds=MISSED_AFTER_SECONDS) else "pending"
+    if entry.get("outcome") in ("failed", "partial"):
+        return entry["outcome"]
+    lag = _first_live_lag(entry)
+    if lag is None:
+        return "backfilled"
+    return "late" if lag > LATE_AFTER_SECONDS else "on_time"
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def run_report(days: int = 7, now: datetime | None = None) -> dict:
+    """
+    Per-slot status and per-job drift / missed statistics for the last `days` IST dates.
+    Each slot has exactly one status, so a job's status counts add up to "expected";
+    start lag samples cover every slot with a live attempt, partial ones included.
+    """
+    from services.market_data import is_nse_trading_day
+
+    now_ist = (now or datetime.now(timezone.utc)).astimezone(IST)
+    dates = [now_ist.date() - timedelta(days=offset) for offset in range(days)]
+
+    expected: list[tuple[str, str, str]] = []
+    for day in dates:
+        trading = is_nse_trading_day(day)
+        for job, (slots, trading_days_only) in EXPECTED_RUNS.items():
+            if trading or not trading_days_only:
+                expected.extend((day.isoformat(), job, slot) for slot in slots)
+
+    raws = await get_storage().amget([_ledger_key(*run) for run in expected]) if expected else []
+
+    runs = []
+    jobs: dict[str, dict] = {}
+    lags: dict[str, list[float]] = {}
+    durations: dict[str, list[float]] = {}
+    for (date_str, job, slot), raw in zip(expected, raws):
+        entry = loads_json(raw) if raw else None
+        due = scheduled_at(date_str, slot)
+        if due > now_ist:
+            continue
+        status = _classify(entry, due, now_ist)
+        stats = jobs.setdefault(job, {
+            "expected": 0, "on_time": 0, "late": 0, "backfilled": 0,
+            "failed": 0, "partial": 0, "missed": 0, "pending": 0,
+        })
+        stats["expected"] += 1
+        stats[status] += 1
+        row = {"date": date_str, "job": job, "slot": slot, "status": status}
+        if entry is not None:
+            row.update(
+                outcome=entry.get("outcome"),
+                mode=entry.get("mode"),
+                start_lag_seconds=entry.get("start_lag_seconds"),
+                duration_seconds=entry.get("duration_seconds"),
+                attempts=entry.get("attempts"),
+                failed_symbols=entry.get("failed_symbols") or [],
+            )
+            lag = _first_live_lag(entry)
+            if lag is not None:
+                lags.setdefault(job, []).append(lag)
+            durations.setdefault(job, []).append(entry.get("duration_seconds") or 0.0)
+        runs.append(row)
+
+    for job, stats in jobs.items():
+        job_lags, job_durations = lags.get(job, []), durations.get(job, [])
+        stats["start_lag_seconds"] = {
+            "p50": _percentile(job_lags, 50),
+            "p95": _percentile(job_lags, 95),
+            "max": max(job_lags) if job_lags else None,
+        }
+        stats["duration_seconds"] = {
+            "avg": round(sum(job_durations) / len(job_durations), 3) if job_durations else None,
+            "max": max(job_durations) if job_durations else None,
+        }
+
+    return {
+        "from": dates[-1].isoformat(),
+        "to": dates[0].isoformat(),
+        "late_after_seconds": LATE_AFTER_SECONDS,
+        "missed_after_seconds": MISSED_AFTER_SECONDS,
+        "jobs": jobs,
+        "runs": runs,
+    }
+
+
+def ledger_summary() -> dict:
+    """Recent ledger writes in this process, for /health."""
+    recent = list(_recent)
+    return {
+        "recorded": len(recent),
+        "late": sum(1 for r in recent if r["mode"] == "live" and r["start_lag_seconds"] > LATE_AFTER_SECONDS),
+        "not_ok": sum(1 for r in recent if r["outcome"] != "ok"),
+        "last": recent[-3:],
+    }
@@ -0,0 +1,149 @@
+"""
+In-process L1 cache for saved snapshots (AI decision, EOD, zero-hero,
+career pulse) in front of the storage backend (L2).
+
+Snapshots only change at scheduled capture times, so dashboard polls can be
+served from memory. Each entry lives until the payload's next_refresh_at_ist
+(capped at L1_MAX_TTL_SECONDS). Writers invalidate locally and PUBLISH the key
+on L1_INVALIDATION_CHANNEL; every worker runs run_invalidation_listener() and
+drops the key on receipt, so workers stay coherent.
+
+Only key prefixes registered with track_prefix() are cached here.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from services.storage import get_storage
+from services.write_behind import current_batch
+
+L1_MAX_ENTRIES = 512
+L1_MAX_TTL_SECONDS = 900  # bound on staleness if an invalidation is lost
+L1_DEFAULT_TTL_SECONDS = 120
+L1_MISS_TTL_SECONDS = 5  # short negative cache while a snapshot is pending
+L1_INVALIDATION_CHANNEL = "cache:invalidate"
+
+_NEXT_REFRESH_RE = re.compile(r'"next_refresh_at_ist"\s*:\s*"([^"]+)"')
+
+MISSING = object()
+
+
+class SnapshotCache:
+    """Bounded LRU of key -> (stored JSON text | None, expires_at monotonic)."""
+
+    def __init__(self, max_entries: int = L1_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str | None, float]] = OrderedDict()
+        self._prefixes: tuple[str, ...] = ()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def track_prefix(self, prefix: str) -> None:
+        if prefix not in self._prefixes:
+            self._prefixes = self._prefixes + (prefix,)
+
+    def tracks(self, key: str) -> bool:
+        return key.startswith(self._prefixes) if self._prefixes else False
+
+    def get(self, key: str):
+        """Cached JSON text, None for a cached miss, or MISSING when not cached."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, text: str | None) -> None:
+        ttl = ttl_from_text(text) if text else L1_MISS_TTL_SECONDS
+        with self._lock:
+            self._entries[key] = (text, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+            "invalidations": self.invalidations,
+        }
+
+
+def ttl_from_text(text: str) -> float:
+    """Seconds until the payload's next_refresh_at_ist, clamped to [1, L1_MAX_TTL_SECONDS]."""
+    match = _NEXT_REFRESH_RE.search(text)
+    if not match:
+        return L1_DEFAULT_TTL_SECONDS
+    try:
+        refresh_at = datetime.fromisoformat(match.group(1))
+    except ValueError:
+        return L1_DEFAULT_TTL_SECONDS
+    if refresh_at.tzinfo is None:
+        return L1_DEFAULT_TTL_SECONDS
+    remaining = (refresh_at - datetime.now(timezone.utc)).total_seconds()
+    return min(max(remaining, 1.0), L1_MAX_TTL_SECONDS)
+
+
+snapshot_cache = SnapshotCache()
+
+
+def publish_invalidation(key: str) -> None:
+    """Drop key locally and tell other workers (queued behind the current write batch if any)."""
+    snapshot_cache.invalidate(key)
+    batch = current_batch()
+    if batch is not None:
+        batch.publish(L1_INVALIDATION_CHANNEL, key)
+        return
+    try:
+        get_storage().publish(L1_INVALIDATION_CHANNEL, key)
+    except Exception as exc:
+        print(f"[L1] invalidation publish failed for {key}: {exc}")
+
+
+async def run_invalidation_listener() -> None:
+    """Long-running task: apply invalidations published by other workers."""
+    backoff = 1.0
+    while True:
+        try:
+            async for key in get_storage().subscribe(L1_INVALIDATION_CHANNEL):
+                snapshot_cache.invalidate(key)
+                backoff = 1.0
+        except asyncio.CancelledError:
+            raise
+        except NotImplementedError:
+            print("[L1] storage backend has no pub/sub; relying on TTLs")
+            return
+        except Exception as exc:
+            print(f"[L1] invalidation listener error: {exc}; retry in {backoff:.0f}s")
+        # The stream ended or failed: anything published meanwhile was missed.
+        snapshot_cache.clear()
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 60.0)
@@ -6,11 +6,14 @@ import hashlib
 import json
 from datetime import datetime
 
-import pandas as pd
-import yfinance as yf
-
 from services.ai_decision import IST, _collect_live_market_news, cache_get, cache_set, logger
+from services.cpu_pool import run_cpu
+from services.lazy_imports import lazy_module
 from services.market_data import fetch_multi_timeframe, is_indian_market_open
+from services.metrics import track_upstream
+
+pd = lazy_module("pandas")
+yf = lazy_module("yfinance")
 
 STOCK_LIVE_CACHE_KEY_PREFIX = "stock_focus_live:"
 STOCK_EOD_CACHE_KEY_PREFIX = "stock_focus_eod:"
@@ -461,12 +464,12 @@ async def _fetch_focus_frames(symbol: str) -> tuple[pd.DataFrame, pd.DataFrame]:
 
     ticker = yf.Ticker(symbol)
     if intraday_df.empty:
-        intraday_df = _normalize_intraday_index(
-            ticker.history(period="5d", interval="5m", auto_adjust=False, actions=False, prepost=False)
-        )
-    daily_df = _normalize_daily_frame(
-        ticker.history(period="3mo", interval="1d", auto_adjust=False, actions=False, prepost=False)
-    )
+        with track_upstream("yfinance"):
+            intraday_raw = ticker.history(period="5d", interval="5m", auto_adjust=False, actions=False, prepost=False)
+        intraday_df = _normalize_intraday_index(intraday_raw)
+    with track_upstream("yfinance"):
+        daily_raw = ticker.history(period="3mo", interval="1d", auto_adjust=False, actions=False, prepost=False)
+    daily_df = _normalize_daily_frame(daily_raw)
     return intraday_df, daily_df
 
 
@@ -656,9 +659,9 @@ async def get_stock_focus_outlook(
 
         news_ctx = await _collect_live_market_news(now, max_items=5)
         if market_open:
-            payload = _build_live_payload(symbol, label, now, intraday_df, daily_df, news_ctx)
+            payload = await run_cpu(_build_live_payload, symbol, label, now, intraday_df, daily_df, news_ctx)
         else:
-            payload = _build_eod_payload(symbol, label, now, intraday_df, daily_df, news_ctx)
+            payload = await run_cpu(_build_eod_payload, symbol, label, now, intraday_df, daily_df, news_ctx)
 
         cache_set(cache_key, json.dumps(payload), ttl_seconds)
         return payload
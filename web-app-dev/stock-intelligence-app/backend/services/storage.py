@@ -0,0 +1,615 @@
+"""
+Key-value storage backends for cache and checkpoint data.
+
+Every backend speaks Redis-style command arrays (["SET", key, value, "EX", 60])
+so callers and the Upstash pipeline format stay identical:
+
+  upstash  Upstash Redis REST API (default, shared across instances)
+  memory   in-process dict with a TTL heap (tests, benchmarks, offline dev)
+  sqlite   single-file embedded store (single-node deployments)
+
+Select with STORAGE_BACKEND=upstash|memory|sqlite (config.Settings).
+Compare-and-set operations (leases) use EVAL with the scripts in
+LOCAL_SCRIPTS; local backends run the equivalent Python instead of Lua.
+Backends raise StorageError on transport failures; callers decide whether
+to swallow it (cache helpers) or report it (checkpoint saves).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fnmatch
+import heapq
+import json
+import sqlite3
+import threading
+import time
+
+import httpx
+
+from config import settings
+from services.metrics import track_upstream
+from services.tracing import span
+
+
+# Idle keep-alive for Upstash connections: long enough for a connection opened
+# by the pre-warm stage (services/prewarm.py) to still be open at the slot.
+UPSTASH_KEEPALIVE_SECONDS = 300
+
+
+class StorageError(RuntimeError):
+    """Raised when a storage backend cannot complete a command."""
+
+
+class StorageBackend:
+    """Common interface. Subclasses implement pipeline() and apipeline()."""
+
+    name = "base"
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    def pipeline(self, commands: list[list]) -> list[dict]:
+        """Run commands in order; returns one {"result": ...} or {"error": ...} per command."""
+        raise NotImplementedError
+
+    async def apipeline(self, commands: list[list]) -> list[dict]:
+        raise NotImplementedError
+
+    def _span(self, commands: list[list]):
+        """Tracing span for one pipeline round trip (a no-op outside a trace)."""
+        return span("store.pipeline", backend=self.name, op=str(commands[0][0]) if commands else None, commands=len(commands))
+
+    # -- Convenience wrappers (sync) --
+
+    def get(self, key: str) -> str | None:
+        return _result(self.pipeline([["GET", key]])[0])
+
+    def set(self, key: str, value: str, ttl_seconds: int | None = None) -> bool:
+        return _result(self.pipeline([_set_command(key, value, ttl_seconds)])[0]) == "OK"
+
+    def mget(self, keys: list[str]) -> list[str | None]:
+        if not keys:
+            return []
+        return list(_result(self.pipeline([["MGET", *keys]])[0]) or [None] * len(keys))
+
+    def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        return int(_result(self.pipeline([["DEL", *keys]])[0]) or 0)
+
+    def publish(self, channel: str, message: str) -> int:
+        return int(_result(self.pipeline([["PUBLISH", channel, message]])[0]) or 0)
+
+    async def subscribe(self, channel: str):
+        """Async iterator of messages published on channel (runs until cancelled)."""
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    def scan(self, match: str = "*", count: int = 200) -> list[str]:
+        keys: list[str] = []
+        cursor = "0"
+        while True:
+            cursor, batch = _result(self.pipeline([["SCAN", cursor, "MATCH", match, "COUNT", count]])[0])
+            keys.extend(batch or [])
+            if str(cursor) == "0":
+                return keys
+
+    # -- Convenience wrappers (async) --
+
+    async def acall(self, *command) -> object:
+        """Run one command and return its result (raises StorageError on error)."""
+        return _result((await self.apipeline([list(command)]))[0])
+
+    async def aget(self, key: str) -> str | None:
+        return _result((await self.apipeline([["GET", key]]))[0])
+
+    async def aset(self, key: str, value: str, ttl_seconds: int | None = None) -> bool:
+        return _result((await self.apipeline([_set_command(key, value, ttl_seconds)]))[0]) == "OK"
+
+    async def amget(self, keys: list[str]) -> list[str | None]:
+        if not keys:
+            return []
+        return list(_result((await self.apipeline([["MGET", *keys]]))[0]) or [None] * len(keys))
+
+    async def adelete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        return int(_result((await self.apipeline([["DEL", *keys]]))[0]) or 0)
+
+    async def aincr(self, key: str) -> int:
+        return int(_result((await self.apipeline([["INCR", key]]))[0]))
+
+    async def aset_if_absent(self, key: str, value: str, ttl_ms: int) -> bool:
+        """SET NX PX: True when this call created the key."""
+        command = ["SET", key, value, "NX", "PX", str(int(ttl_ms))]
+        return _result((await self.apipeline([command]))[0]) == "OK"
+
+    async def acompare_and_pexpire(self, key: str, expected: str, ttl_ms: int) -> bool:
+        """Extend key's TTL only while it still holds expected (lease renewal)."""
+        command = ["EVAL", COMPARE_AND_PEXPIRE, "1", key, expected, str(int(ttl_ms))]
+        return int(_result((await self.apipeline([command]))[0]) or 0) == 1
+
+    async def acompare_and_delete(self, key: str, expected: str) -> bool:
+        """Delete key only while it still holds expected (lease release)."""
+        command = ["EVAL", COMPARE_AND_DELETE, "1", key, expected]
+        return int(_result((await self.apipeline([command]))[0]) or 0) == 1
+
+    async def ascan(self, match: str = "*", count: int = 200) -> list[str]:
+        keys: list[str] = []
+        cursor = "0"
+        while True:
+            cursor, batch = _result((await self.apipeline([["SCAN", cursor, "MATCH", match, "COUNT", count]]))[0])
+            keys.extend(batch or [])
+            if str(cursor) == "0":
+                return keys
+
+
+COMPARE_AND_PEXPIRE = (
+    "if redis.call('GET', KEYS[1]) == ARGV[1] then "
+    "return redis.call('PEXPIRE', KEYS[1], ARGV[2]) else return 0 end"
+)
+COMPARE_AND_DELETE = (
+    "if redis.call('GET', KEYS[1]) == ARGV[1] then "
+    "return redis.call('DEL', KEYS[1]) else return 0 end"
+)
+
+
+def _set_command(key: str, value: str, ttl_seconds: int | None) -> list:
+    command = ["SET", key, value]
+    if ttl_seconds:
+        command += ["EX", str(int(ttl_seconds))]
+    return command
+
+
+def _result(entry: dict):
+    if "error" in entry:
+        raise StorageError(str(entry["error"]))
+    return entry.get("result")
+
+
+# ── Upstash REST ──────────────────────────────────────────────────────────────
+
+
+class UpstashRestBackend(StorageBackend):
+    """Upstash Redis over HTTPS. Clients are reused to keep TLS connections warm."""
+
+    name = "upstash"
+
+    def __init__(self, url: str, token: str, timeout: float = 10.0):
+        base = (url or "").strip().rstrip("/")
+        for suffix in ("/set", "/get", "/keys", "/pipeline"):
+            if base.endswith(suffix):
+                base = base[: -len(suffix)]
+        self.base_url = base
+        self.token = (token or "").strip()
+        self.timeout = timeout
+        self._client: httpx.Client | None = None
+        self._aclient: httpx.AsyncClient | None = None
+        self._aclient_loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.base_url and self.token)
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
+
+    def _sync_client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None or self._client.is_closed:
+                self._client = httpx.Client(
+                    timeout=self.timeout,
+                    headers=self._headers(),
+                    limits=httpx.Limits(keepalive_expiry=UPSTASH_KEEPALIVE_SECONDS),
+                )
+            return self._client
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient.is_closed or self._aclient_loop is not loop:
+            self._aclient = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers=self._headers(),
+                limits=httpx.Limits(keepalive_expiry=UPSTASH_KEEPALIVE_SECONDS),
+            )
+            self._aclient_loop = loop
+        return self._aclient
+
+    @staticmethod
+    def _parse(resp: httpx.Response, count: int) -> list[dict]:
+        if resp.status_code != 200:
+            raise StorageError(f"Upstash HTTP {resp.status_code}: {resp.text[:200]}")
+        data = resp.json()
+        if not isinstance(data, list) or len(data) != count:
+            raise StorageError(f"Unexpected Upstash pipeline response: {str(data)[:200]}")
+        return data
+
+    def pipeline(self, commands: list[list]) -> list[dict]:
+        if not commands:
+            return []
+        if not self.configured:
+            raise StorageError("Upstash credentials are not configured.")
+        try:
+            with self._span(commands), track_upstream("upstash"):
+                resp = self._sync_client().post(f"{self.base_url}/pipeline", json=commands)
+                return self._parse(resp, len(commands))
+        except httpx.HTTPError as exc:
+            raise StorageError(f"Upstash connection error: {exc}") from exc
+
+    async def apipeline(self, commands: list[list]) -> list[dict]:
+        if not commands:
+            return []
+        if not self.configured:
+            raise StorageError("Upstash credentials are not configured.")
+        try:
+            with self._span(commands), track_upstream("upstash"):
+                resp = await self._async_client().post(f"{self.base_url}/pipeline", json=commands)
+                return self._parse(resp, len(commands))
+        except httpx.HTTPError as exc:
+            raise StorageError(f"Upstash connection error: {exc}") from exc
+
+    async def subscribe(self, channel: str):
+        """Upstash REST SUBSCRIBE streams server-sent events: "data: message,<channel>,<payload>"."""
+        if not self.configured:
+            raise StorageError("Upstash credentials are not configured.")
+        prefix = f"message,{channel},"
+        timeout = httpx.Timeout(self.timeout, read=None)
+        async with httpx.AsyncClient(timeout=timeout, headers=self._headers()) as client:
+            async with client.stream(
+                "GET",
+                f"{self.base_url}/subscribe/{channel}",
+                headers={"Accept": "text/event-stream"},
+            ) as resp:
+                if resp.status_code != 200:
+                    raise StorageError(f"Upstash SUBSCRIBE HTTP {resp.status_code}")
+                async for line in resp.aiter_lines():
+                    if line.startswith("data: ") and line[6:].startswith(prefix):
+                        yield line[6 + len(prefix):]
+
+
+# ── Local embedded backends ───────────────────────────────────────────────────
+
+
+class LocalBackend(StorageBackend):
+    """
+    Interprets the Redis command subset used by this app on top of four
+    primitives (_read, _write, _remove, _all_keys). Expiry times are wall-clock
+    epoch seconds so the sqlite store survives restarts.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._subscribers: list[tuple[str, asyncio.AbstractEventLoop, asyncio.Queue]] = []
+
+    # Primitives: value + expires_at (None = no TTL).
+    def _read(self, key: str) -> tuple[str, float | None] | None:
+        raise NotImplementedError
+
+    def _write(self, key: str, value: str, expires_at: float | None) -> None:
+        raise NotImplementedError
+
+    def _remove(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def _all_keys(self) -> list[str]:
+        raise NotImplementedError
+
+    def _sweep(self, now: float) -> None:
+        """Drop expired keys; backends may override with something cheaper."""
+
+    def _live(self, key: str, now: float) -> tuple[str, float | None] | None:
+        entry = self._read(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= now:
+            self._remove(key)
+            return None
+        return entry
+
+    def pipeline(self, commands: list[list]) -> list[dict]:
+        out: list[dict] = []
+        with self._span(commands), self._lock:
+            now = time.time()
+            self._sweep(now)
+            for command in commands:
+                try:
+                    out.append({"result": self._execute([str(c) for c in command], now)})
+                except Exception as exc:
+                    out.append({"error": f"ERR {exc}"})
+        return out
+
+    async def apipeline(self, commands: list[list]) -> list[dict]:
+        return self.pipeline(commands)
+
+    def _execute(self, command: list[str], now: float):
+        op = command[0].upper()
+        args = command[1:]
+
+        if op == "PING":
+            return "PONG"
+        if op == "GET":
+            entry = self._live(args[0], now)
+            return entry[0] if entry else None
+        if op == "MGET":
+            return [(e[0] if (e := self._live(k, now)) else None) for k in args]
+        if op == "SET":
+            key, value = args[0], args[1]
+            expires_at = None
+            nx = xx = False
+            i = 2
+            while i < len(args):
+                flag = args[i].upper()
+                if flag == "EX":
+                    expires_at = now + float(args[i + 1])
+                    i += 2
+                elif flag == "PX":
+                    expires_at = now + float(args[i + 1]) / 1000.0
+                    i += 2
+                elif flag == "NX":
+                    nx, i = True, i + 1
+                elif flag == "XX":
+                    xx, i = True, i + 1
+                else:
+                    raise ValueError(f"unsupported SET option {flag}")
+            exists = self._live(key, now) is not None
+            if (nx and exists) or (xx and not exists):
+                return None
+            self._write(key, value, expires_at)
+            return "OK"
+        if op == "DEL":
+            return sum(1 for k in args if self._live(k, now) is not None and self._remove(k))
+        if op == "EXISTS":
+            return sum(1 for k in args if self._live(k, now) is not None)
+        if op == "INCR":
+            entry = self._live(args[0], now)
+            value = int(entry[0]) + 1 if entry else 1
+            self._write(args[0], str(value), entry[1] if entry else None)
+            return value
+        if op in ("EXPIRE", "PEXPIRE"):
+            entry = self._live(args[0], now)
+            if entry is None:
+                return 0
+            seconds = float(args[1]) / (1000.0 if op == "PEXPIRE" else 1.0)
+            self._write(args[0], entry[0], now + seconds)
+            return 1
+        if op == "TTL":
+            entry = self._live(args[0], now)
+            if entry is None:
+                return -2
+            return -1 if entry[1] is None else max(int(entry[1] - now), 0)
+        if op in _LIST_OPS:
+            return self._execute_list(op, args, now)
+        if op == "EVAL":
+            script, numkeys = args[0], int(args[1])
+            keys, argv = args[2:2 + numkeys], args[2 + numkeys:]
+            if script not in LOCAL_SCRIPTS:
+                raise ValueError("EVAL supports only the scripts in LOCAL_SCRIPTS")
+            return LOCAL_SCRIPTS[script](self, keys, argv, now)
+        if op == "PUBLISH":
+            return self._deliver(args[0], args[1])
+        if op in ("KEYS", "SCAN"):
+            pattern = "*"
+            if op == "KEYS":
+                pattern = args[0]
+            elif "MATCH" in [a.upper() for a in args]:
+                pattern = args[[a.upper() for a in args].index("MATCH") + 1]
+            keys = [k for k in self._all_keys() if fnmatch.fnmatchcase(k, pattern) and self._live(k, now)]
+            return keys if op == "KEYS" else ["0", keys]
+        raise ValueError(f"unknown command '{op}'")
+
+    # Lists are stored as JSON arrays; an emptied list deletes its key, as in Redis.
+    def _load_list(self, key: str, now: float) -> tuple[list[str], float | None]:
+        entry = self._live(key, now)
+        if entry is None:
+            return [], None
+        return json.loads(entry[0]), entry[1]
+
+    def _store_list(self, key: str, items: list[str], expires_at: float | None) -> None:
+        if items:
+            self._write(key, json.dumps(items), expires_at)
+        else:
+            self._remove(key)
+
+    def _execute_list(self, op: str, args: list[str], now: float):
+        items, expires_at = self._load_list(args[0], now)
+        if op in ("RPUSH", "LPUSH"):
+            values = args[1:]
+            items = items + values if op == "RPUSH" else list(reversed(values)) + items
+            self._store_list(args[0], items, expires_at)
+            return len(items)
+        if op in ("LPOP", "RPOP"):
+            if not items:
+                return None
+            value = items.pop(0 if op == "LPOP" else -1)
+            self._store_list(args[0], items, expires_at)
+            return value
+        if op == "LLEN":
+            return len(items)
+        if op == "LRANGE":
+            start, stop = int(args[1]), int(args[2])
+            stop = len(items) - 1 if stop == -1 else stop
+            return items[start:stop + 1]
+        if op == "LREM":
+            count, value = int(args[1]), args[2]
+            kept, removed = [], 0
+            for item in items:
+                if item == value and (count == 0 or removed < abs(count)):
+                    removed += 1
+                else:
+                    kept.append(item)
+            self._store_list(args[0], kept, expires_at)
+            return removed
+        if op == "LMOVE":
+            source_end, dest_end = args[2].upper(), args[3].upper()
+            if not items:
+                return None
+            value = items.pop(0 if source_end == "LEFT" else -1)
+            self._store_list(args[0], items, expires_at)
+            dest, dest_expires = self._load_list(args[1], now)
+            dest = [value] + dest if dest_end == "LEFT" else dest + [value]
+            self._store_list(args[1], dest, dest_expires)
+            return value
+        raise ValueError(f"unknown command '{op}'")
+
+    def _deliver(self, channel: str, message: str) -> int:
+        receivers = 0
+        for sub_channel, loop, queue in list(self._subscribers):
+            if sub_channel != channel or loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+            receivers += 1
+        return receivers
+
+    async def subscribe(self, channel: str):
+        """In-process pub/sub; only publishers in this process are seen."""
+        entry = (channel, asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.append(entry)
+        try:
+            while True:
+                yield await entry[2].get()
+        finally:
+            with self._lock:
+                self._subscribers.remove(entry)
+
+
+_LIST_OPS = {"RPUSH", "LPUSH", "LPOP", "RPOP", "LLEN", "LRANGE", "LREM", "LMOVE"}
+
+
+def _local_compare_and_pexpire(backend: LocalBackend, keys: list[str], argv: list[str], now: float) -> int:
+    entry = backend._live(keys[0], now)
+    if entry is None or entry[0] != argv[0]:
+        return 0
+    backend._write(keys[0], entry[0], now + float(argv[1]) / 1000.0)
+    return 1
+
+
+def _local_compare_and_delete(backend: LocalBackend, keys: list[str], argv: list[str], now: float) -> int:
+    entry = backend._live(keys[0], now)
+    if entry is None or entry[0] != argv[0]:
+        return 0
+    return 1 if backend._remove(keys[0]) else 0
+
+
+# Lua script text -> Python equivalent, run under the backend lock (atomic like EVAL).
+LOCAL_SCRIPTS = {
+    COMPARE_AND_PEXPIRE: _local_compare_and_pexpire,
+    COMPARE_AND_DELETE: _local_compare_and_delete,
+}
+
+
+class MemoryBackend(LocalBackend):
+    """In-process store; expiry is lazy on read plus a heap swept on each call."""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self._data: dict[str, tuple[str, float | None]] = {}
+        self._expiry_heap: list[tuple[float, str]] = []
+
+    def _read(self, key):
+        return self._data.get(key)
+
+    def _write(self, key, value, expires_at):
+        self._data[key] = (value, expires_at)
+        if expires_at is not None:
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+
+    def _remove(self, key):
+        return self._data.pop(key, None) is not None
+
+    def _all_keys(self):
+        return list(self._data)
+
+    def _sweep(self, now):
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._data.get(key)
+            # Skip stale heap entries left behind by a later SET / EXPIRE.
+            if entry is not None and entry[1] == expires_at:
+                del self._data[key]
+
+
+class SqliteBackend(LocalBackend):
+    """Embedded single-file store for single-node deployments."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS kv_expires ON kv (expires_at)")
+        self._last_sweep = 0.0
+
+    def _read(self, key):
+        row = self._conn.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _write(self, key, value, expires_at):
+        self._conn.execute(
+            "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, value, expires_at),
+        )
+
+    def _remove(self, key):
+        return self._conn.execute("DELETE FROM kv WHERE key = ?", (key,)).rowcount > 0
+
+    def _all_keys(self):
+        return [row[0] for row in self._conn.execute("SELECT key FROM kv")]
+
+    def _sweep(self, now):
+        if now - self._last_sweep < 60:
+            return
+        self._last_sweep = now
+        self._conn.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+    def pipeline(self, commands: list[list]) -> list[dict]:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                return super().pipeline(commands)
+            finally:
+                self._conn.execute("COMMIT")
+
+
+# ── Backend selection ────────────────────────────────────────────────────────
+
+_backend: StorageBackend | None = None
+
+
+def build_storage_backend(kind: str | None = None) -> StorageBackend:
+    kind = (kind or settings.storage_backend or "upstash").strip().lower()
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "sqlite":
+        return SqliteBackend(settings.storage_sqlite_path)
+    if kind != "upstash":
+        print(f"[STORAGE] unknown STORAGE_BACKEND={kind!r}; using upstash")
+    return UpstashRestBackend(settings.upstash_redis_rest_url, settings.upstash_redis_rest_token)
+
+
+def get_storage() -> StorageBackend:
+    """Process-wide backend chosen by settings.storage_backend."""
+    global _backend
+    if _backend is None:
+        _backend = build_storage_backend()
+        print(f"[STORAGE] backend={_backend.name} configured={_backend.configured}")
+    return _backend
+
+
+def set_storage(backend: StorageBackend | None) -> None:
+    """Swap the process-wide backend (tests / benchmarks)."""
+    global _backend
+    _backend = backend
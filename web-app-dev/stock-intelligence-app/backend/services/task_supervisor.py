@@ -0,0 +1,76 @@
+"""
+Supervised background tasks (startup backfills).
+
+The app starts serving as soon as the tasks are scheduled; each task runs
+concurrently under its own timeout and its progress is reported in /health.
+Endpoints keep answering from caches / fallbacks while a backfill is still
+running, and pick up its results from storage once it finishes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from services.tracing import span
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+class TaskSupervisor:
+    def __init__(self):
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._state: dict[str, dict] = {}
+
+    def start(self, name: str, factory: Callable[[], Awaitable], timeout: float) -> asyncio.Task:
+        """Run factory() in the background; a running task of the same name is left alone."""
+        running = self._tasks.get(name)
+        if running is not None and not running.done():
+            return running
+        self._state[name] = {
+            "status": "running",
+            "started_at_ist": datetime.now(IST).isoformat(),
+            "timeout_seconds": timeout,
+        }
+        task = asyncio.create_task(self._run(name, factory, timeout), name=f"supervised:{name}")
+        self._tasks[name] = task
+        return task
+
+    async def _run(self, name: str, factory, timeout: float) -> None:
+        state = self._state[name]
+        started = time.perf_counter()
+        try:
+            with span(f"startup.{name}", root=True):
+                state["result"] = await asyncio.wait_for(factory(), timeout=timeout)
+            state["status"] = "done"
+        except asyncio.TimeoutError:
+            state["status"] = "timeout"
+            print(f"[SUPERVISOR] {name} timed out after {timeout:.0f}s")
+        except asyncio.CancelledError:
+            state["status"] = "cancelled"
+            raise
+        except Exception as exc:
+            state["status"] = "failed"
+            state["error"] = str(exc)
+            print(f"[SUPERVISOR] {name} failed: {exc}")
+        finally:
+            state["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+            state["finished_at_ist"] = datetime.now(IST).isoformat()
+
+    def running(self) -> list[str]:
+        return [name for name, task in self._tasks.items() if not task.done()]
+
+    async def cancel_all(self) -> None:
+        pending = [task for task in self._tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def status(self) -> dict:
+        return {name: dict(state) for name, state in self._state.items()}
+
+
+startup_tasks = TaskSupervisor()
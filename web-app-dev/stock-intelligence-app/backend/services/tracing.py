@@ -0,0 +1,353 @@
+"""
+Lightweight in-process tracing: nested timing spans per request or job.
+
+    with span("fetch_intraday", symbol=symbol, interval=interval) as s:
+        ...
+        s.set(source="yfinance")
+
+    @traced("gemini.call")
+    async def _call_gemini(...): ...
+
+Spans nest through a contextvar, so the current span follows awaits and
+asyncio tasks (create_task / gather / to_thread copy the context). Trace
+roots are opened explicitly (root=True): HTTP requests (TracingMiddleware,
+continuing an incoming W3C `traceparent`), scheduler ticks (leader_only),
+startup tasks and queued jobs. A job stores the enqueuer's context and each
+attempt continues that trace, so a cron request, the job it queued and the
+storage writes the job made share one trace id. A span opened outside any
+trace (lease renewals, worker polling) is a no-op, which keeps background
+noise out of the buffer and costs one contextvar read.
+
+Finished spans go to a ring buffer of TRACE_BUFFER_SPANS entries and, when
+TRACE_FILE is set, to a JSON-lines file (appended in batches by a writer
+thread, so the event loop never waits on disk). Spans recorded in cpu_pool workers
+are captured there and replayed into the parent's buffer. No collector is
+involved; read traces from the dev-only GET /api/v1/debug/traces.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import settings
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("trace_span", default=None)
+# Set by capture(): finished spans are appended here instead of the buffer.
+_sink: contextvars.ContextVar[list | None] = contextvars.ContextVar("trace_sink", default=None)
+
+_buffer: deque[dict] = deque(maxlen=max(100, settings.trace_buffer_spans))
+_buffer_lock = threading.Lock()
+_file_lock = threading.Lock()
+_file_queue: queue.SimpleQueue[dict] = queue.SimpleQueue()
+_file_writer: threading.Thread | None = None
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attrs", "start", "_t0", "duration_ms", "status", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, attrs: dict):
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: float | None = None
+        self.status = "ok"
+        self.error: str | None = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+@contextmanager
+def span(name: str, *, root: bool = False, parent: dict | None = None, **attrs):
+    """
+    Time a block as a child of the current span.
+
+    root=True starts a new trace when there is no current span; parent (a
+    current_context() dict, e.g. stored on a job) continues that trace.
+    """
+    current = _current.get()
+    if not settings.tracing_enabled or (current is None and not root and parent is None):
+        yield _NOOP
+        return
+    if parent is not None and parent.get("trace_id"):
+        s = Span(name, parent["trace_id"], parent.get("span_id"), attrs)
+    elif current is not None:
+        s = Span(name, current.trace_id, current.span_id, attrs)
+    else:
+        s = Span(name, _new_id(16), None, attrs)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as exc:
+        s.status = "cancelled" if type(exc).__name__ == "CancelledError" else "error"
+        s.error = f"{type(exc).__name__}: {exc}"[:300]
+        raise
+    finally:
+        _current.reset(token)
+        s.duration_ms = round((time.perf_counter() - s._t0) * 1000, 3)
+        _record(s.to_dict())
+
+
+def traced(name: str):
+    """Decorator form of span() for sync and async functions."""
+
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def current_context() -> dict | None:
+    """{"trace_id", "span_id"} of the current span, for handing to another task or process."""
+    current = _current.get()
+    if current is None:
+        return None
+    return {"trace_id": current.trace_id, "span_id": current.span_id}
+
+
+def current_trace_id() -> str | None:
+    current = _current.get()
+    return current.trace_id if current is not None else None
+
+
+@contextmanager
+def capture():
+    """Collect spans finished in this block into a list instead of the buffer (pool workers)."""
+    spans: list[dict] = []
+    token = _sink.set(spans)
+    try:
+        yield spans
+    finally:
+        _sink.reset(token)
+
+
+def record(spans: list[dict]) -> None:
+    """Add spans captured elsewhere (another process) to this process's buffer."""
+    for entry in spans:
+        _record(entry)
+
+
+def _record(entry: dict) -> None:
+    sink = _sink.get()
+    if sink is not None:
+        sink.append(entry)
+        return
+    with _buffer_lock:
+        _buffer.append(entry)
+    if settings.trace_file:
+        _file_queue.put(entry)
+        if _file_writer is None:
+            _start_file_writer()
+
+
+def _start_file_writer() -> None:
+    global _file_writer
+    with _file_lock:
+        if _file_writer is None:
+            _file_writer = threading.Thread(target=_file_writer_loop, name="trace-file", daemon=True)
+            _file_writer.start()
+
+
+def _drain(entries: list[dict]) -> list[dict]:
+    while True:
+        try:
+            entries.append(_file_queue.get_nowait())
+        except queue.Empty:
+            return entries
+
+
+def _file_writer_loop() -> None:
+    while True:
+        _write_entries(_drain([_file_queue.get()]))
+
+
+def flush_trace_file() -> None:
+    """Append every queued span to TRACE_FILE now (called on shutdown)."""
+    _write_entries(_drain([]))
+
+
+def _write_entries(entries: list[dict]) -> None:
+    if not entries:
+        return
+    lines = "".join(json.dumps(entry, default=str) + "\n" for entry in entries)
+    with _file_lock:
+        try:
+            with open(settings.trace_file, "a", encoding="utf-8") as fh:
+                fh.write(lines)
+        except OSError as exc:
+            print(f"[TRACE] write to {settings.trace_file} failed: {exc}")
+
+
+# ── Reading traces ────────────────────────────────────────────────────────────
+
+
+def _grouped() -> dict[str, list[dict]]:
+    with _buffer_lock:
+        entries = list(_buffer)
+    traces: dict[str, list[dict]] = {}
+    for entry in entries:
+        traces.setdefault(entry["trace_id"], []).append(entry)
+    return traces
+
+
+def _root_of(spans: list[dict]) -> dict:
+    ids = {s["span_id"] for s in spans}
+    roots = [s for s in spans if s["parent_id"] not in ids]
+    return min(roots or spans, key=lambda s: s["start"])
+
+
+def recent_traces(limit: int = 20, min_ms: float = 0.0, name: str | None = None) -> list[dict]:
+    summaries = []
+    for trace_id, spans in _grouped().items():
+        root = _root_of(spans)
+        started = min(s["start"] for s in spans)
+        ended = max(s["start"] + (s["duration_ms"] or 0) / 1000 for s in spans)
+        duration_ms = round((ended - started) * 1000, 3)
+        if duration_ms < min_ms or (name and name not in root["name"]):
+            continue
+        summaries.append({
+            "trace_id": trace_id,
+            "root": root["name"],
+            "started_at": started,
+            "duration_ms": duration_ms,
+            "spans": len(spans),
+            "errors": sum(1 for s in spans if s["status"] == "error"),
+        })
+    summaries.sort(key=lambda item: item["started_at"], reverse=True)
+    return summaries[:limit]
+
+
+def get_trace(trace_id: str) -> list[dict] | None:
+    """Spans of one trace in start order, with depth and offset from the trace start."""
+    spans = _grouped().get(trace_id)
+    if not spans:
+        return None
+    by_id = {s["span_id"]: s for s in spans}
+    started = min(s["start"] for s in spans)
+
+    def depth(entry: dict) -> int:
+        level = 0
+        while entry["parent_id"] in by_id and level < 64:
+            entry = by_id[entry["parent_id"]]
+            level += 1
+        return level
+
+    return [
+        {**s, "depth": depth(s), "offset_ms": round((s["start"] - started) * 1000, 3)}
+        for s in sorted(spans, key=lambda s: s["start"])
+    ]
+
+
+def buffer_stats() -> dict:
+    with _buffer_lock:
+        size = len(_buffer)
+    return {
+        "enabled": settings.tracing_enabled,
+        "buffered_spans": size,
+        "capacity": _buffer.maxlen,
+        "file": settings.trace_file or None,
+    }
+
+
+# ── HTTP roots ────────────────────────────────────────────────────────────────
+
+# Polled or self-referential paths that would otherwise flood the buffer.
+UNTRACED_PREFIXES = ("/health", "/metrics", "/api/v1/debug/")
+
+
+def _parse_traceparent(value: str) -> dict | None:
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    if parts[1] == "0" * 32:
+        return None
+    return {"trace_id": parts[1], "span_id": parts[2]}
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware: one root span per HTTP request, trace id echoed as X-Trace-Id."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.tracing_enabled or scope["path"].startswith(UNTRACED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                parent = _parse_traceparent(value.decode("latin-1"))
+                break
+
+        with span(f"{scope['method']} {scope['path']}", root=True, parent=parent) as root:
+            trace_header = (b"x-trace-id", root.trace_id.encode())
+
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": [*message.get("headers", []), trace_header]}
+                    root.set(http_status=message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                route = scope.get("route")
+                if getattr(route, "path", None):
+                    root.name = f"{scope['method']} {route.path}"
+                root.set(path=scope["path"])
@@ -0,0 +1,139 @@
+"""
+Versioned value codec for stored cache / checkpoint payloads.
+
+Stored values must stay text (Upstash REST takes JSON command arrays), so a
+compressed value is written as:
+
+    "~1z" + base85(zlib(json bytes))
+
+  ~   magic (plain JSON never starts with "~")
+  1   codec version
+  z   zlib; base85 is JSON-safe and ~8% denser than base64
+
+Values under VALUE_COMPRESS_MIN_BYTES stay plain compact JSON. Anything
+without the header decodes as legacy plain JSON, so keys written before this
+codec keep working until they expire.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import threading
+import zlib
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional: faster, compact dumps/loads
+    orjson = None
+
+VALUE_CODEC_VERSION = "1"
+VALUE_COMPRESS_MIN_BYTES = 512
+VALUE_COMPRESS_LEVEL = 6
+
+_MAGIC = "~"
+_ZLIB_HEADER = f"{_MAGIC}{VALUE_CODEC_VERSION}z"
+
+_stats_lock = threading.Lock()
+_stats = {
+    "encoded_values": 0,
+    "compressed_values": 0,
+    "encoded_raw_bytes": 0,
+    "encoded_stored_bytes": 0,
+    "decoded_values": 0,
+    "decoded_legacy_values": 0,
+    "decoded_stored_bytes": 0,
+    "decoded_raw_bytes": 0,
+}
+
+
+def _record(**deltas: int) -> None:
+    with _stats_lock:
+        for name, delta in deltas.items():
+            _stats[name] += delta
+
+
+def dumps_json(obj: Any) -> bytes:
+    """Compact JSON bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY, default=str)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def loads_json(raw: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def json_fragment(raw: bytes) -> Any:
+    """Embed pre-encoded JSON in a dumps_json() payload without re-parsing it (orjson>=3.9), else parse."""
+    fragment = getattr(orjson, "Fragment", None)
+    if fragment is not None:
+        return fragment(raw)
+    return loads_json(raw)
+
+
+def encode_text(json_text: str) -> str:
+    """Encode an already-serialized JSON string for storage."""
+    return _encode_bytes(json_text.encode("utf-8"))
+
+
+def encode_value(obj: Any) -> str:
+    """Serialize obj compactly and encode it for storage."""
+    return _encode_bytes(dumps_json(obj))
+
+
+def _encode_bytes(raw: bytes) -> str:
+    if len(raw) < VALUE_COMPRESS_MIN_BYTES:
+        _record(encoded_values=1, encoded_raw_bytes=len(raw), encoded_stored_bytes=len(raw))
+        return raw.decode("utf-8")
+
+    stored = _ZLIB_HEADER + base64.b85encode(zlib.compress(raw, VALUE_COMPRESS_LEVEL)).decode("ascii")
+    _record(
+        encoded_values=1,
+        compressed_values=1,
+        encoded_raw_bytes=len(raw),
+        encoded_stored_bytes=len(stored),
+    )
+    return stored
+
+
+def decode_text(stored: str | None) -> str | None:
+    """Return the JSON text for a stored value (new or legacy format)."""
+    if stored is None:
+        return None
+    if not stored.startswith(_MAGIC):
+        _record(decoded_values=1, decoded_legacy_values=1, decoded_stored_bytes=len(stored), decoded_raw_bytes=len(stored))
+        return stored
+    if not stored.startswith(_ZLIB_HEADER):
+        raise ValueError(f"Unsupported stored value header: {stored[:3]!r}")
+
+    raw = zlib.decompress(base64.b85decode(stored[len(_ZLIB_HEADER):]))
+    _record(decoded_values=1, decoded_stored_bytes=len(stored), decoded_raw_bytes=len(raw))
+    return raw.decode("utf-8")
+
+
+def decode_value(stored: str | None) -> Any:
+    """Decode a stored value into Python objects; None / empty -> None."""
+    if not stored:
+        return None
+    if not stored.startswith(_MAGIC):
+        _record(decoded_values=1, decoded_legacy_values=1, decoded_stored_bytes=len(stored), decoded_raw_bytes=len(stored))
+        return loads_json(stored)
+    return loads_json(decode_text(stored))
+
+
+def codec_stats() -> dict:
+    """Counters since process start plus write/read compression ratios."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["write_compression_ratio"] = (
+        round(stats["encoded_raw_bytes"] / stats["encoded_stored_bytes"], 2) if stats["encoded_stored_bytes"] else None
+    )
+    stats["read_compression_ratio"] = (
+        round(stats["decoded_raw_bytes"] / stats["decoded_stored_bytes"], 2) if stats["decoded_stored_bytes"] else None
+    )
+    stats["orjson"] = orjson is not None
+    return stats
@@ -0,0 +1,213 @@
+"""
+Write-behind buffer for storage writes.
+
+Scheduler jobs make a burst of writes (one checkpoint / AI snapshot per
+symbol plus debug logs). Inside `async with write_batch("label")` those writes
+are buffered and sent as one storage pipeline when the block exits, so a job
+costs one round trip instead of one per key. Per-key delivery is recorded in
+batch.results for the job summary.
+
+Async writes made outside a job (e.g. concurrent request handlers) are
+coalesced over WRITE_BEHIND_WINDOW_SECONDS into a shared batch; each caller
+still awaits its own key's confirmation.
+
+Reads of a key still pending in the current batch see the buffered value.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from services.storage import StorageError, get_storage
+
+WRITE_BEHIND_WINDOW_SECONDS = 0.02
+# Keep each pipeline request well under Upstash's request-size limit.
+WRITE_BEHIND_MAX_COMMANDS = 50
+WRITE_BEHIND_MAX_BYTES = 512 * 1024
+
+_current_batch: ContextVar["WriteBatch | None"] = ContextVar("write_behind_batch", default=None)
+_open_batches: "weakref.WeakSet[WriteBatch]" = weakref.WeakSet()
+
+
+class WriteBatch:
+    """Buffered SET commands keyed by storage key (last write per key wins)."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self._pending: dict[str, tuple[str, int | None]] = {}
+        self._publishes: list[tuple[str, str]] = []
+        self.results: dict[str, bool] = {}
+        self.round_trips = 0
+        _open_batches.add(self)
+
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._publishes)
+
+    def add(self, key: str, value: str, ttl_seconds: int | None = None) -> None:
+        self._pending[key] = (value, ttl_seconds)
+
+    def publish(self, channel: str, message: str) -> None:
+        """Queue a PUBLISH sent after this batch's writes (same pipeline when possible)."""
+        self._publishes.append((channel, message))
+
+    def pending_value(self, key: str) -> str | None:
+        entry = self._pending.get(key)
+        return entry[0] if entry else None
+
+    def confirmed(self, key: str) -> bool:
+        return self.results.get(key, False)
+
+    @property
+    def failed_keys(self) -> list[str]:
+        return [key for key, ok in self.results.items() if not ok]
+
+    def _chunks(self) -> list[list[tuple[str, str, int | None]]]:
+        chunks: list[list[tuple[str, str, int | None]]] = []
+        current: list[tuple[str, str, int | None]] = []
+        size = 0
+        for key, (value, ttl) in self._pending.items():
+            item_size = len(key) + len(value)
+            if current and (len(current) >= WRITE_BEHIND_MAX_COMMANDS or size + item_size > WRITE_BEHIND_MAX_BYTES):
+                chunks.append(current)
+                current, size = [], 0
+            current.append((key, value, ttl))
+            size += item_size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def flush(self) -> dict[str, bool]:
+        """Send buffered writes; returns {key: delivered} for this flush."""
+        chunks = self._chunks()
+        publishes = [["PUBLISH", channel, message] for channel, message in self._publishes]
+        self._pending.clear()
+        self._publishes.clear()
+        flushed: dict[str, bool] = {}
+        storage = get_storage()
+        if publishes and not chunks:
+            chunks = [[]]
+
+        for index, chunk in enumerate(chunks):
+            commands = []
+            for key, value, ttl in chunk:
+                command = ["SET", key, value]
+                if ttl:
+                    command += ["EX", str(int(ttl))]
+                commands.append(command)
+            if index == len(chunks) - 1:
+                # Invalidations go out only after every write they describe.
+                commands += publishes
+            try:
+                entries = await storage.apipeline(commands)
+                self.round_trips += 1
+                for (key, _, _), entry in zip(chunk, entries):
+                    flushed[key] = "error" not in entry and entry.get("result") == "OK"
+            except StorageError as exc:
+                print(f"[WRITE-BEHIND] {self.label} pipeline failed ({len(chunk)} keys): {exc}")
+                for key, _, _ in chunk:
+                    flushed[key] = False
+
+        failed = [key for key, ok in flushed.items() if not ok]
+        if failed:
+            print(f"[WRITE-BEHIND] {self.label} undelivered keys: {failed}")
+        self.results.update(flushed)
+        return flushed
+
+
+def current_batch() -> WriteBatch | None:
+    return _current_batch.get()
+
+
+def pending_write(key: str) -> str | None:
+    """Value buffered for key in the current job batch (read-your-writes)."""
+    batch = _current_batch.get()
+    return batch.pending_value(key) if batch is not None else None
+
+
+@asynccontextmanager
+async def write_batch(label: str):
+    """Buffer storage writes made in this block; flush them together on exit."""
+    batch = WriteBatch(label)
+    token = _current_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _current_batch.reset(token)
+        if len(batch):
+            await batch.flush()
+
+
+# ── Windowed coalescing for writes outside a job ─────────────────────────────
+
+_window_batch: WriteBatch | None = None
+_window_waiters: dict[str, list[asyncio.Future]] = {}
+_window_task: asyncio.Task | None = None
+
+
+async def _flush_window_after_delay() -> None:
+    await asyncio.sleep(WRITE_BEHIND_WINDOW_SECONDS)
+    await _flush_window()
+
+
+async def _flush_window() -> None:
+    global _window_batch, _window_waiters, _window_task
+    batch, waiters = _window_batch, _window_waiters
+    _window_batch, _window_waiters, _window_task = None, {}, None
+    if batch is None:
+        return
+    try:
+        results = await batch.flush()
+    except Exception as exc:
+        print(f"[WRITE-BEHIND] window flush failed: {exc}")
+        results = {}
+    for key, futures in waiters.items():
+        for future in futures:
+            if not future.done():
+                future.set_result(results.get(key, False))
+
+
+async def write(key: str, value: str, ttl_seconds: int | None = None) -> bool:
+    """
+    Buffered async write.
+
+    Inside write_batch() the value is queued and True means "accepted"; the
+    delivery result lands in batch.results when the job's batch flushes.
+    Outside a batch the write joins a short coalescing window and the return
+    value is the delivery confirmation for this key.
+    """
+    global _window_batch, _window_task
+    batch = _current_batch.get()
+    if batch is not None:
+        batch.add(key, value, ttl_seconds)
+        return True
+
+    if _window_batch is None:
+        _window_batch = WriteBatch("window")
+    _window_batch.add(key, value, ttl_seconds)
+    future = asyncio.get_running_loop().create_future()
+    _window_waiters.setdefault(key, []).append(future)
+    if _window_task is None:
+        _window_task = asyncio.create_task(_flush_window_after_delay())
+    return await future
+
+
+def write_sync(key: str, value: str, ttl_seconds: int | None = None) -> None:
+    """Sync write: queued when a job batch is active, otherwise written through."""
+    batch = _current_batch.get()
+    if batch is not None:
+        batch.add(key, value, ttl_seconds)
+        return
+    get_storage().set(key, value, ttl_seconds)
+
+
+async def flush_pending_writes() -> None:
+    """Flush the coalescing window and any open job batches (app shutdown)."""
+    if _window_task is not None:
+        await _window_task
+    await _flush_window()
+    for batch in list(_open_batches):
+        if len(batch):
+            await batch.flush()
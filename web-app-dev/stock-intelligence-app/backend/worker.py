@@ -0,0 +1,40 @@
+"""
+Job worker entry point: runs queued background jobs outside the API process.
+
+    cd backend && python worker.py
+
+Run it next to the API with JOB_WORKER_MODE=external so heavy captures,
+reconciles and AI generation no longer share the event loop that serves
+requests. Several workers may run at once; each job is claimed by one.
+Needs shared storage (STORAGE_BACKEND=upstash, or sqlite on one host).
+"""
+
+import asyncio
+import signal
+
+import job_handlers  # noqa: F401  (registers job kinds)
+from config import settings
+from services.cpu_pool import cpu_pool
+from services.job_queue import JOB_HANDLERS, JobWorker
+from services.write_behind import flush_pending_writes
+
+
+async def main() -> None:
+    worker = JobWorker()
+    print(f"[WORKER] {settings.app_name} job worker | kinds={sorted(JOB_HANDLERS)}")
+    await cpu_pool.start()
+    task = asyncio.create_task(worker.run())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, task.cancel)
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    cpu_pool.shutdown()
+    await flush_pending_writes()
+    print(f"[WORKER] stopped | {worker.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,7 +1,9 @@
 "use client";
 
 import { authedFetch } from "@/lib/authedFetch";
+import { useSectionSeed, type SectionSeed } from "@/lib/dashboardBundle";
 import { onDashboardRefresh } from "@/lib/dashboardRefresh";
+import { onServerEvent } from "@/lib/serverEvents";
 import { SYMBOL_LABELS } from "@/lib/indices";
 import { useState, useEffect, useCallback } from "react";
 
@@ -311,16 +313,17 @@ function getEodSlHuntNote(data: EODData): { label: string; value: string; color:
     };
 }
 
-export default function AIDecision({ symbol }: { symbol: string }) {
+export default function AIDecision({ symbol, seed }: { symbol: string; seed?: SectionSeed }) {
     const [data, setData] = useState<AIData | null>(null);
     const [isLoading, setIsLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
     const [showReasoning, setShowReasoning] = useState(false);
     const [countdown, setCountdown] = useState(300);
+    const takeSeed = useSectionSeed<AIData>(seed);
 
     const fetchDecision = useCallback(async () => {
         const runOnce = async (): Promise<AIData> => {
-            const res = await authedFetch(`/api/v1/ai-decision?symbol=${encodeURIComponent(symbol)}`, { cache: "no-store" });
+            const res = await authedFetch(`/api/v1/ai-decision?symbol=${encodeURIComponent(symbol)}`, { cache: "no-cache" });
             if (!res.ok) {
                 let detail = `API error ${res.status}`;
                 try {
@@ -376,13 +379,27 @@ export default function AIDecision({ symbol }: { symbol: string }) {
     }, [symbol]);
 
     useEffect(() => {
-        fetchDecision();
-    }, [fetchDecision]);
+        // First load comes from the dashboard bundle when it has this section.
+        void takeSeed().then((seeded) => {
+            if (!seeded) {
+                void fetchDecision();
+                return;
+            }
+            setData(seeded);
+            setError(null);
+            setCountdown(getRefreshSeconds(seeded));
+            setIsLoading(false);
+        });
+    }, [fetchDecision, takeSeed]);
 
     useEffect(() => onDashboardRefresh(() => {
         void fetchDecision();
     }), [fetchDecision]);
 
+    useEffect(() => onServerEvent(["ai_snapshot", "eod"], () => {
+        void fetchDecision();
+    }, symbol), [fetchDecision, symbol]);
+
     useEffect(() => {
         const tick = setInterval(() => {
             setCountdown((c) => {
@@ -1,7 +1,9 @@
 "use client";
 
 import { authedFetch } from "@/lib/authedFetch";
+import { useSectionSeed, type SectionSeed } from "@/lib/dashboardBundle";
 import { onDashboardRefresh } from "@/lib/dashboardRefresh";
+import { isServerStreamConnected, onServerEvent } from "@/lib/serverEvents";
 import { usePageVisible } from "@/hooks/usePageVisible";
 import { useSettings } from "../context/SettingsContext";
 import { useState, useEffect, useCallback, useMemo } from "react";
@@ -524,14 +526,23 @@ function EvalResultPanel({ rows, boardDate }: { rows: EvalRow[]; boardDate: stri
     );
 }
 
+interface CheckpointsBody {
+    panels?: Panel[];
+    eod_close?: EodCloseData | null;
+    date?: string | null;
+    catchup_triggered?: boolean;
+}
+
 export default function CheckpointBoard({
     symbol,
     date = null,
     mode = "live",
+    seed,
 }: {
     symbol: string;
     date?: string | null;
     mode?: "live" | "history";
+    seed?: SectionSeed;
 }) {
     const [panels, setPanels] = useState<Panel[]>([]);
     const [eodClose, setEodClose] = useState<EodCloseData | null>(null);
@@ -544,6 +555,15 @@ export default function CheckpointBoard({
     const { settings } = useSettings();
     const refreshMs = (catchingUp ? settings.checkpointCatchupSec : settings.checkpointRefreshSec) * 1000;
 
+    const takeSeed = useSectionSeed<CheckpointsBody>(seed);
+
+    const applyBody = useCallback((json: CheckpointsBody) => {
+        setPanels(json.panels || []);
+        setEodClose(json.eod_close ?? null);
+        setBoardDate(json.date ?? null);
+        setCatchingUp(!isHistory && json.catchup_triggered === true);
+    }, [isHistory]);
+
     const fetchPanels = useCallback(async () => {
         try {
             const params = new URLSearchParams({ symbol });
@@ -551,17 +571,13 @@ export default function CheckpointBoard({
             if (isHistory) params.set("allow_catchup", "false");
             const res = await authedFetch(`${API_BASE}/v1/checkpoints?${params.toString()}`);
             if (!res.ok) return;
-            const json = await res.json();
-            setPanels(json.panels || []);
-            setEodClose(json.eod_close ?? null);
-            setBoardDate(json.date ?? null);
-            setCatchingUp(!isHistory && json.catchup_triggered === true);
+            applyBody((await res.json()) as CheckpointsBody);
         } catch (err) {
             console.error("Failed to fetch checkpoints:", err);
         } finally {
             setLoading(false);
         }
-    }, [symbol, date, isHistory]);
+    }, [symbol, date, isHistory, applyBody]);
 
     useEffect(() => {
         setPanels([]);
@@ -577,9 +593,22 @@ export default function CheckpointBoard({
             if (!isHistory && typeof document !== "undefined" && document.hidden) return;
             fetchPanels();
         };
-        run();
+        // The first load for a symbol comes from the dashboard bundle when it has the section.
+        void takeSeed().then((seeded) => {
+            if (!seeded) {
+                run();
+                return;
+            }
+            applyBody(seeded);
+            setLoading(false);
+        });
         if (isHistory) return;
-        const interval = setInterval(run, refreshMs);
+        // While the push stream is up, new captures arrive as events; the
+        // interval only covers catch-up progress and stream outages.
+        const interval = setInterval(() => {
+            if (!catchingUp && isServerStreamConnected()) return;
+            run();
+        }, refreshMs);
         return () => clearInterval(interval);
     }, [fetchPanels, catchingUp, isHistory, pageVisible, refreshMs]);
 
@@ -590,6 +619,13 @@ export default function CheckpointBoard({
         });
     }, [fetchPanels, isHistory]);
 
+    useEffect(() => {
+        if (isHistory || date) return;
+        return onServerEvent(["checkpoint", "eod"], () => {
+            void fetchPanels();
+        }, symbol);
+    }, [fetchPanels, isHistory, date, symbol]);
+
     const latestIndex = panels.length - 1 - [...panels].reverse().findIndex((p) => p.data);
     const effectiveLatestIndex = latestIndex >= 0 ? latestIndex : -1;
     const evalRows = useMemo(() => buildEvalRows(panels, eodClose), [panels, eodClose]);
@@ -1,6 +1,7 @@
 "use client";
 
 import { authedFetch } from "@/lib/authedFetch";
+import { useSectionSeed, type SectionSeed } from "@/lib/dashboardBundle";
 import { onDashboardRefresh } from "@/lib/dashboardRefresh";
 import { useCallback, useEffect, useState } from "react";
 
@@ -87,14 +88,15 @@ function makeFallback(): CareerPulseData {
     };
 }
 
-export default function DataAIPulsePanel() {
+export default function DataAIPulsePanel({ seed }: { seed?: SectionSeed }) {
     const [data, setData] = useState<CareerPulseData | null>(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
+    const takeSeed = useSectionSeed<CareerPulseData>(seed);
 
     const fetchPulse = useCallback(async () => {
         try {
-            const res = await authedFetch("/api/v1/career-pulse", { cache: "no-store" });
+            const res = await authedFetch("/api/v1/career-pulse", { cache: "no-cache" });
             if (!res.ok) {
                 throw new Error(`HTTP ${res.status}`);
             }
@@ -117,11 +119,20 @@ export default function DataAIPulsePanel() {
     }, []);
 
     useEffect(() => {
-        fetchPulse();
+        // First load comes from the dashboard bundle when it has this section.
+        void takeSeed().then((seeded) => {
+            if (!seeded) {
+                void fetchPulse();
+                return;
+            }
+            setData(seeded);
+            setError(null);
+            setLoading(false);
+        });
         return onDashboardRefresh(() => {
             fetchPulse();
         });
-    }, [fetchPulse]);
+    }, [fetchPulse, takeSeed]);
 
     useEffect(() => {
         const interval = setInterval(fetchPulse, FALLBACK_REFRESH_SECONDS * 1000);
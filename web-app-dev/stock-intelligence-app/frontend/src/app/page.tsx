@@ -2,7 +2,7 @@
 
 import { authedFetch } from "@/lib/authedFetch";
 import dynamic from "next/dynamic";
-import { useState, useEffect, useCallback } from "react";
+import { useState, useEffect, useCallback, useMemo, useRef } from "react";
 import { useSymbol } from "./context/SymbolContext";
 import { useSettings } from "./context/SettingsContext";
 import StockHeader from "./components/StockHeader";
@@ -20,6 +20,7 @@ import DataAIPulsePanel from "./components/DataAIPulsePanel";
 import ISTClock from "./components/ISTClock";
 import ExpiryBanner from "./components/ExpiryBanner";
 import TraderJourneyLine from "./components/TraderJourneyLine";
+import { loadDashboardBundle } from "@/lib/dashboardBundle";
 import { triggerDashboardRefresh } from "@/lib/dashboardRefresh";
 
 const CandlestickChart = dynamic(() => import("./components/CandlestickChart"), {
@@ -79,6 +80,20 @@ interface AnalyzeData {
     candles: OhlcBar[];
 }
 
+interface CandlesDelta {
+    symbol: string;
+    frame_version: number;
+    full: boolean;
+    bars: OhlcBar[];
+}
+
+function mergeBars(current: OhlcBar[], bars: OhlcBar[]): OhlcBar[] {
+    if (!bars.length) return current;
+    const firstTime = Date.parse(bars[0].time);
+    const kept = current.filter((bar) => Date.parse(bar.time) < firstTime);
+    return [...kept, ...bars].slice(-180);
+}
+
 // Use relative path — proxied to backend via next.config.mjs rewrites
 const API_BASE = "/api";
 
@@ -145,6 +160,13 @@ export default function Dashboard() {
     const [error, setError] = useState<string | null>(null);
     const [lastRefresh, setLastRefresh] = useState<number>(0);
 
+    // One bundle request seeds the first load of the AI decision, checkpoint
+    // board and career pulse panels for each symbol (browser only).
+    const bundle = useMemo(
+        () => (typeof window === "undefined" ? undefined : loadDashboardBundle(selectedSymbol)),
+        [selectedSymbol]
+    );
+
     const fetchData = useCallback(async (symbol: string, options?: { silent?: boolean }) => {
         const silent = options?.silent ?? false;
         try {
@@ -183,20 +205,30 @@ export default function Dashboard() {
         }
     }, []);
 
+    // Last chart frame held by the client, so refreshes only ask for new bars.
+    const chartFrame = useRef<{ symbol: string; version: number; candles: OhlcBar[] } | null>(null);
+
     const fetchChartData = useCallback(async (symbol: string) => {
-        setChartLoading(true);
+        const held = chartFrame.current?.symbol === symbol ? chartFrame.current : null;
+        const lastBar = held?.candles[held.candles.length - 1];
+        if (!held) setChartLoading(true);
         try {
-            const res = await authedFetch(
-                `${API_BASE}/v1/analyze?symbol=${encodeURIComponent(symbol)}&include_candles=true`
-            );
+            const params = new URLSearchParams({ symbol });
+            if (held && lastBar) {
+                params.set("since", lastBar.time);
+                params.set("version", String(held.version));
+            }
+            const res = await authedFetch(`${API_BASE}/v1/candles?${params.toString()}`, { cache: "no-cache" });
             if (!res.ok) {
-                setChartCandles([]);
+                if (!held) setChartCandles([]);
                 return;
             }
-            const json: AnalyzeData = await res.json();
-            setChartCandles(json.candles || []);
+            const json: CandlesDelta = await res.json();
+            const candles = json.full || !held ? json.bars || [] : mergeBars(held.candles, json.bars || []);
+            chartFrame.current = { symbol, version: json.frame_version, candles };
+            setChartCandles(candles);
         } catch {
-            setChartCandles([]);
+            if (!held) setChartCandles([]);
         } finally {
             setChartLoading(false);
         }
@@ -222,6 +254,7 @@ export default function Dashboard() {
 
     useEffect(() => {
         if (!settings.showCandlestickChart) {
+            chartFrame.current = null;
             setChartCandles([]);
             setChartLoading(false);
             return;
@@ -332,7 +365,7 @@ export default function Dashboard() {
             />
 
             {/* ── AI Price Action Decision ── */}
-            <AIDecision symbol={selectedSymbol} />
+            <AIDecision symbol={selectedSymbol} seed={bundle?.ai_decision} />
             <ExpiryZeroHeroPanel />
 
             {settings.showCandlestickChart && (
@@ -343,11 +376,11 @@ export default function Dashboard() {
 
             {/* ── Checkpoint Board ── */}
             <div className="border-t border-terminal-border pt-2">
-                <CheckpointBoard symbol={selectedSymbol} />
+                <CheckpointBoard symbol={selectedSymbol} seed={bundle?.checkpoints} />
             </div>
 
             {/* ── Data & AI Pulse (BI / analytics career brief) ── */}
-            <DataAIPulsePanel />
+            <DataAIPulsePanel seed={bundle?.career_pulse} />
 
             {/* ── Footer ── */}
             <div className="text-center pt-2">
@@ -52,7 +52,6 @@ interface FocusResponse {
     global_news_items: string[];
     news_tomorrow: string[];
     captured_at: string;
-    served_at?: string;
     analysis_status: "full" | "fallback";
     free_tier_mode: boolean;
     source: string;
@@ -176,7 +175,7 @@ export default function WatchlistPage() {
                 params.set("refresh", "true");
             }
             const res = await authedFetch(`/api/v1/market-focus?${params.toString()}`, {
-                cache: "no-store",
+                cache: "no-cache",
             });
             if (!res.ok) {
                 const raw = await res.text();
@@ -316,7 +315,7 @@ export default function WatchlistPage() {
                                 <p className="text-[0.62rem] uppercase tracking-[0.18em] text-gray-500 font-extrabold">Last Price</p>
                                 <p className="text-3xl font-black text-white mt-1">{fmtPrice(data.price)}</p>
                                 <p className="text-[11px] text-gray-500 mt-2">Snapshot {fmtStamp(data.captured_at)} IST</p>
-                                <p className="text-[11px] text-gray-500 mt-1">Checked {fmtStamp(data.served_at || data.captured_at)} IST</p>
+                                <p className="text-[11px] text-gray-500 mt-1">Checked {fmtStamp(data.captured_at)} IST</p>
                             </div>
                         </div>
 
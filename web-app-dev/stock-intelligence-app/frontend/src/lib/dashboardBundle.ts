@@ -0,0 +1,51 @@
+import { useCallback, useEffect, useRef } from "react";
+import { authedFetch } from "./authedFetch";
+
+// One GET /api/v1/dashboard for the first load of the dashboard panels; the
+// panels keep their own endpoints for refreshes, events and retries.
+
+export type DashboardSectionName = "ai_decision" | "checkpoints" | "career_pulse";
+
+export interface DashboardSection<T = unknown> {
+    status: "ok" | "error" | "timeout";
+    elapsed_ms: number;
+    data?: T;
+    error?: string;
+    status_code?: number;
+}
+
+export type SectionSeed = Promise<DashboardSection | null>;
+
+export type DashboardBundle = Record<DashboardSectionName, SectionSeed>;
+
+const BUNDLE_SECTIONS: DashboardSectionName[] = ["ai_decision", "checkpoints", "career_pulse"];
+
+export function loadDashboardBundle(symbol: string): DashboardBundle {
+    const params = new URLSearchParams({ symbol, sections: BUNDLE_SECTIONS.join(",") });
+    const body = authedFetch(`/api/v1/dashboard?${params.toString()}`, { cache: "no-cache" })
+        .then((res) => (res.ok ? res.json() : null))
+        .catch(() => null) as Promise<{ sections?: Partial<Record<DashboardSectionName, DashboardSection>> } | null>;
+    const bundle = {} as DashboardBundle;
+    for (const name of BUNDLE_SECTIONS) {
+        bundle[name] = body.then((json) => json?.sections?.[name] ?? null);
+    }
+    return bundle;
+}
+
+/**
+ * Returns take(): the seed's data the first time it is called after the seed
+ * changes (null when the bundle failed, timed out or there is no seed), so a
+ * panel's initial load can skip its own request.
+ */
+export function useSectionSeed<T>(seed?: SectionSeed): () => Promise<T | null> {
+    const pending = useRef(seed);
+    useEffect(() => {
+        pending.current = seed;
+    }, [seed]);
+    return useCallback(async () => {
+        const current = pending.current;
+        pending.current = undefined;
+        const section = current ? await current : null;
+        return section?.status === "ok" && section.data ? (section.data as T) : null;
+    }, []);
+}
@@ -0,0 +1,142 @@
+import { authedFetch } from "./authedFetch";
+import { triggerDashboardRefresh } from "./dashboardRefresh";
+
+export type ServerEventTopic = "checkpoint" | "ai_snapshot" | "eod" | "price";
+
+export type ServerEvent = {
+    id: string;
+    topic: ServerEventTopic | "resync";
+    data: Record<string, unknown>;
+};
+
+type Listener = {
+    topics: ServerEventTopic[];
+    symbol?: string;
+    callback: (event: ServerEvent) => void;
+};
+
+// One fetch-based SSE connection per tab (EventSource cannot send the
+// Authorization header). The stream only asks for topics someone listens to.
+const listeners = new Set<Listener>();
+let controller: AbortController | null = null;
+let connectedTopics = "";
+let connected = false;
+let lastEventId = "";
+
+export function isServerStreamConnected(): boolean {
+    return connected;
+}
+
+export function onServerEvent(
+    topics: ServerEventTopic[],
+    callback: (event: ServerEvent) => void,
+    symbol?: string,
+): () => void {
+    if (typeof window === "undefined") return () => undefined;
+    const listener: Listener = { topics, symbol, callback };
+    listeners.add(listener);
+    syncConnection();
+    return () => {
+        listeners.delete(listener);
+        syncConnection();
+    };
+}
+
+function wantedTopics(): string {
+    const topics = new Set<string>();
+    listeners.forEach((l) => l.topics.forEach((t) => topics.add(t)));
+    return [...topics].sort().join(",");
+}
+
+function syncConnection(): void {
+    const topics = wantedTopics();
+    if (topics === connectedTopics && controller) return;
+    controller?.abort();
+    controller = null;
+    connected = false;
+    connectedTopics = topics;
+    if (!topics) return;
+    controller = new AbortController();
+    void runStream(topics, controller.signal);
+}
+
+function dispatch(event: ServerEvent): void {
+    if (event.topic === "resync") {
+        triggerDashboardRefresh();
+        return;
+    }
+    const symbol = typeof event.data.symbol === "string" ? event.data.symbol : undefined;
+    listeners.forEach((l) => {
+        if (!l.topics.includes(event.topic as ServerEventTopic)) return;
+        if (l.symbol && symbol && l.symbol !== symbol) return;
+        l.callback(event);
+    });
+}
+
+function parseFrame(frame: string): ServerEvent | null {
+    let id = "";
+    let topic = "message";
+    const data: string[] = [];
+    for (const line of frame.split("\n")) {
+        if (!line || line.startsWith(":")) continue;
+        const sep = line.indexOf(":");
+        const field = sep === -1 ? line : line.slice(0, sep);
+        const value = sep === -1 ? "" : line.slice(sep + 1).replace(/^ /, "");
+        if (field === "id") id = value;
+        else if (field === "event") topic = value;
+        else if (field === "data") data.push(value);
+    }
+    if (!data.length) return null;
+    try {
+        return { id, topic: topic as ServerEvent["topic"], data: JSON.parse(data.join("\n")) };
+    } catch {
+        return null;
+    }
+}
+
+async function runStream(topics: string, signal: AbortSignal): Promise<void> {
+    let retryMs = 3000;
+    while (!signal.aborted) {
+        try {
+            const headers: Record<string, string> = { Accept: "text/event-stream" };
+            if (lastEventId) headers["Last-Event-ID"] = lastEventId;
+            const res = await authedFetch(`/api/v1/stream?topics=${encodeURIComponent(topics)}`, {
+                headers,
+                cache: "no-store",
+                signal,
+            });
+            if (!res.ok || !res.body) throw new Error(`Stream error ${res.status}`);
+
+            connected = true;
+            retryMs = 3000;
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            while (!signal.aborted) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, "\n");
+                let boundary = buffer.indexOf("\n\n");
+                while (boundary !== -1) {
+                    const frame = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    const retry = /^retry: (\d+)$/m.exec(frame);
+                    if (retry) retryMs = Number(retry[1]);
+                    const event = parseFrame(frame);
+                    if (event) {
+                        if (event.id) lastEventId = event.id;
+                        dispatch(event);
+                    }
+                    boundary = buffer.indexOf("\n\n");
+                }
+            }
+        } catch (err) {
+            if (signal.aborted) return;
+            console.warn("Server event stream disconnected:", err);
+        }
+        if (signal.aborted) return;
+        connected = false;
+        await new Promise((r) => setTimeout(r, retryMs));
+        retryMs = Math.min(retryMs * 2, 30000);
+    }
+}